@@ -1,9 +1,56 @@
 # metadata/admin.py
 from django.contrib import admin
-from .models import DataSource, Schema, Table, Column, DataLineage, Glossary, DataQualityRule, DataQualityCheck
+from .models import DataSource, Schema, Table, Column, DataLineage, Glossary, DataQualityRule, DataQualityCheck, CatalogExport
+from .models import TableGlossaryMapping, GlossaryTaggingRun, ColumnLineage, SchemaVersion, SchemaChange
+from .models import DataQualityStatus, DataQualityRollup
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from .db import ESTIMATED_COUNT_THRESHOLD, estimated_count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Pages unfiltered changelists of large tables from the planner's row estimate instead of COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+def _source_paths(model, paths):
+    """list_select_related paths that end at a DataSource."""
+    for path in paths:
+        related = model
+        for name in path.split('__'):
+            related = related._meta.get_field(name).related_model
+        if related is DataSource:
+            yield path
+
+
+class CatalogAdmin(admin.ModelAdmin):
+    """
+    Admin whose changelists and autocomplete lookups stay fast on catalog-sized
+    tables: estimated page counts, no extra full-table count, and the
+    list_select_related joins (which __str__ follows) applied to every query
+    with the joined sources' parser output left deferred.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if isinstance(self.list_select_related, (list, tuple)) and self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related).defer(*(
+                f'{path}__processed_metadata' for path in _source_paths(self.model, self.list_select_related)
+            ))
+        return queryset
 
 @admin.register(DataSource)
-class DataSourceAdmin(admin.ModelAdmin):
+class DataSourceAdmin(CatalogAdmin):
     # Fixes admin.E108, admin.E116: Replaces old fields with new file/metadata fields
     list_display = (
         'name', 
@@ -16,6 +63,7 @@ class DataSourceAdmin(admin.ModelAdmin):
     list_filter = ('status',) 
     
     search_fields = ('name', 'description')
+    autocomplete_fields = ('parent',)
     
     # Fixes admin.E035: Makes the UUID and date fields read-only
     readonly_fields = (
@@ -23,15 +71,17 @@ class DataSourceAdmin(admin.ModelAdmin):
         'status', 
         'upload_date', 
         'uploaded_file',
-        'processed_metadata'
+        'processed_metadata',
+        'metadata_digest',
+        'metadata_size'
     )
     
     fieldsets = (
         (None, {
-            'fields': ('name', 'description', 'uploaded_file', 'uuid', 'upload_date', 'status')
+            'fields': ('name', 'description', 'uploaded_file', 'parent', 'uuid', 'upload_date', 'status')
         }),
         ('Metadata Details', {
-            'fields': ('processed_metadata',),
+            'fields': ('processed_metadata', 'metadata_digest', 'metadata_size'),
             'classes': ('collapse',),
         })
     )
@@ -47,45 +97,115 @@ class DataSourceAdmin(admin.ModelAdmin):
     # Table, Column, etc., if their models also changed.
 
 @admin.register(Schema)
-class SchemaAdmin(admin.ModelAdmin):
+class SchemaAdmin(CatalogAdmin):
     list_display = ['name', 'data_source', 'created_at']
     list_filter = ['data_source']
+    list_select_related = ['data_source']
     search_fields = ['name', 'description']
+    autocomplete_fields = ['data_source']
 
 @admin.register(Table)
-class TableAdmin(admin.ModelAdmin):
+class TableAdmin(CatalogAdmin):
     list_display = ['name', 'schema', 'table_type', 'owner', 'row_count', 'created_at']
     list_filter = ['table_type', 'schema__data_source']
+    list_select_related = ['schema__data_source', 'owner']
     search_fields = ['name', 'description', 'tags']
+    autocomplete_fields = ['schema', 'owner']
     readonly_fields = ['created_at', 'updated_at']
 
 @admin.register(Column)
-class ColumnAdmin(admin.ModelAdmin):
+class ColumnAdmin(CatalogAdmin):
     list_display = ['name', 'table', 'data_type', 'is_primary_key', 'is_foreign_key', 'is_nullable']
     list_filter = ['data_type', 'is_primary_key', 'is_foreign_key', 'is_nullable']
+    list_select_related = ['table__schema__data_source']
     search_fields = ['name', 'description']
+    autocomplete_fields = ['table']
 
 @admin.register(DataLineage)
-class DataLineageAdmin(admin.ModelAdmin):
+class DataLineageAdmin(CatalogAdmin):
     list_display = ['source_table', 'target_table', 'lineage_type', 'created_by', 'created_at']
     list_filter = ['lineage_type']
+    list_select_related = ['source_table__schema__data_source', 'target_table__schema__data_source', 'created_by']
     search_fields = ['source_table__name', 'target_table__name', 'description']
+    autocomplete_fields = ['source_table', 'target_table', 'created_by']
+
+@admin.register(ColumnLineage)
+class ColumnLineageAdmin(CatalogAdmin):
+    list_display = ['source_column', 'target_column', 'lineage', 'created_at']
+    list_select_related = ['source_column__table', 'target_column__table', 'lineage__source_table__schema__data_source',
+                           'lineage__target_table__schema__data_source']
+    search_fields = ['source_column__name', 'target_column__name']
+    autocomplete_fields = ['lineage', 'source_column', 'target_column']
 
 @admin.register(Glossary)
-class GlossaryAdmin(admin.ModelAdmin):
+class GlossaryAdmin(CatalogAdmin):
     list_display = ['term', 'category', 'owner', 'created_at']
     list_filter = ['category']
+    list_select_related = ['owner']
     search_fields = ['term', 'definition']
-    filter_horizontal = ['related_terms']
+    autocomplete_fields = ['related_terms', 'owner']
 
 @admin.register(DataQualityRule)
-class DataQualityRuleAdmin(admin.ModelAdmin):
+class DataQualityRuleAdmin(CatalogAdmin):
     list_display = ['name', 'table', 'column', 'rule_type', 'is_active']
     list_filter = ['rule_type', 'is_active']
+    list_select_related = ['table__schema__data_source', 'column__table']
     search_fields = ['name', 'table__name']
+    autocomplete_fields = ['table', 'column']
 
 @admin.register(DataQualityCheck)
-class DataQualityCheckAdmin(admin.ModelAdmin):
+class DataQualityCheckAdmin(CatalogAdmin):
     list_display = ['rule', 'executed_at', 'passed', 'failed_count']
     list_filter = ['passed', 'executed_at']
-    readonly_fields = ['executed_at']
\ No newline at end of file
+    list_select_related = ['rule__table']
+    # Results are folded into statuses and rollups when inserted; editing one would skew them
+    readonly_fields = ['executed_at', 'passed', 'failed_count']
+    autocomplete_fields = ['rule']
+
+@admin.register(DataQualityStatus)
+class DataQualityStatusAdmin(CatalogAdmin):
+    list_display = ['rule', 'executed_at', 'passed', 'failed_count']
+    list_filter = ['passed']
+    list_select_related = ['rule__table']
+    readonly_fields = ['rule', 'executed_at', 'passed', 'failed_count']
+
+@admin.register(DataQualityRollup)
+class DataQualityRollupAdmin(CatalogAdmin):
+    list_display = ['rule', 'granularity', 'bucket_start', 'checks', 'passed', 'failed_count']
+    list_filter = ['granularity']
+    list_select_related = ['rule__table']
+    readonly_fields = ['rule', 'granularity', 'bucket_start', 'checks', 'passed', 'failed_count']
+
+@admin.register(CatalogExport)
+class CatalogExportAdmin(CatalogAdmin):
+    list_display = ['started_at', 'finished_at', 'export_format', 'since', 'output']
+    list_filter = ['export_format']
+    readonly_fields = ['started_at', 'finished_at', 'export_format', 'since', 'output', 'row_counts']
+
+@admin.register(TableGlossaryMapping)
+class TableGlossaryMappingAdmin(CatalogAdmin):
+    list_display = ['glossary_term', 'table', 'column', 'auto_tagged', 'created_at']
+    list_filter = ['auto_tagged']
+    list_select_related = ['glossary_term', 'table__schema__data_source', 'column__table']
+    search_fields = ['glossary_term__term', 'table__name', 'column__name']
+    autocomplete_fields = ['glossary_term', 'table', 'column']
+
+@admin.register(GlossaryTaggingRun)
+class GlossaryTaggingRunAdmin(CatalogAdmin):
+    list_display = ['started_at', 'finished_at', 'full', 'created', 'removed']
+    readonly_fields = ['started_at', 'finished_at', 'full', 'scanned', 'created', 'removed']
+
+@admin.register(SchemaVersion)
+class SchemaVersionAdmin(CatalogAdmin):
+    list_display = ['data_source', 'version', 'created_at', 'snapshot_digest']
+    list_select_related = ['data_source']
+    search_fields = ['data_source__name']
+    readonly_fields = ['data_source', 'version', 'created_at', 'snapshot_digest', 'summary']
+
+@admin.register(SchemaChange)
+class SchemaChangeAdmin(CatalogAdmin):
+    list_display = ['change_type', 'schema_name', 'table_name', 'column_name', 'version']
+    list_filter = ['change_type']
+    list_select_related = ['version__data_source']
+    search_fields = ['table_name', 'column_name']
+    autocomplete_fields = ['version', 'table']
@@ -0,0 +1,265 @@
+# metadata/api.py
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.response import Response
+
+from .bulk import bulk_upsert, BulkValidationError
+from .caching import cached_payload
+from .history import table_history
+from .indexing import search_sources
+from .ingestion import ingest_upload
+from .models import DataSource, Schema, Table, Column, DataLineage, Glossary
+from .quality import GRANULARITIES, quality_summary
+from .serializers import (
+    DataSourceSerializer, SchemaSerializer, TableSerializer,
+    ColumnSerializer, DataLineageSerializer, GlossarySerializer
+)
+from .similarity import DEFAULT_THRESHOLD, similar_columns
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+# Rows fetched per server-side cursor round trip and flushed per response chunk
+STREAM_CHUNK_SIZE = 2000
+# Upper bound on items accepted by one batch request
+MAX_BATCH_ITEMS = 100000
+
+
+class NDJSONParser(BaseParser):
+    """Parses newline-delimited JSON request bodies into a list of objects."""
+    media_type = NDJSON_CONTENT_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        items = []
+        if stream is None:
+            return items
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f"NDJSON parse error on line {number}: {e}")
+        return items
+
+
+def stream_ndjson(queryset, fields, chunk_size=STREAM_CHUNK_SIZE):
+    """Yields one JSON document per row, reading the queryset through a server-side cursor."""
+    lines = []
+    for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+        lines.append(json.dumps(row, cls=DjangoJSONEncoder))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class CatalogViewSet(viewsets.ModelViewSet):
+    """
+    CRUD endpoints plus `stream/` (NDJSON reads) and `batch/` (bulk upsert).
+    Subclasses set `upsert_unique_fields` to enable the batch endpoint, and
+    `cache_kind` to serve detail payloads from the version-stamped cache.
+    """
+    filter_fields = []
+    upsert_unique_fields = None
+    upsert_update_fields = []
+    cache_kind = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for name in self.filter_fields:
+            value = self.request.query_params.get(name)
+            if value not in (None, ''):
+                queryset = queryset.filter(**{name: value})
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.cache_kind is None:
+            return super().retrieve(request, *args, **kwargs)
+        # File URLs are absolute, so payloads are cached per host
+        name = f'api:{self.basename}:{request.get_host()}'
+        payload = cached_payload(name, self.cache_kind, kwargs[self.lookup_field],
+                                 lambda: dict(super(CatalogViewSet, self).retrieve(request, *args, **kwargs).data))
+        return Response(payload)
+
+    def get_stream_fields(self):
+        model = self.queryset.model
+        many_to_many = {f.name for f in model._meta.many_to_many}
+        return [f for f in self.get_serializer_class().Meta.fields if f not in many_to_many]
+
+    @action(detail=False, methods=['get'])
+    def stream(self, request):
+        """Streams every matching row as NDJSON without loading the result set into memory."""
+        queryset = self.get_queryset().order_by('pk')
+        return StreamingHttpResponse(
+            stream_ndjson(queryset, self.get_stream_fields()),
+            content_type=NDJSON_CONTENT_TYPE
+        )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def batch(self, request):
+        """Upserts a JSON array (or NDJSON body) of objects in one transaction."""
+        if not self.upsert_unique_fields:
+            return Response({'detail': 'Batch upsert is not supported for this resource.'},
+                            status=status.HTTP_405_METHOD_NOT_ALLOWED)
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Expected a list of objects.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_ITEMS:
+            return Response({'detail': f'At most {MAX_BATCH_ITEMS} items per batch.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            written = bulk_upsert(
+                self.queryset.model, items,
+                unique_fields=self.upsert_unique_fields,
+                update_fields=self.upsert_update_fields
+            )
+        except BulkValidationError as e:
+            return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'received': len(items), 'upserted': written})
+
+
+class DataSourceViewSet(CatalogViewSet):
+    # Summaries are small, so the API loads them rather than deferring per row
+    queryset = DataSource.objects.with_metadata()
+    serializer_class = DataSourceSerializer
+    filter_fields = ['status', 'name']
+    cache_kind = 'source'
+
+    def perform_create(self, serializer):
+        """Uploaded files are processed like UI uploads; ?split_archive=1 splits archives by member."""
+        ingest_upload(serializer.save(status='PENDING'),
+                      split_members=self.request.query_params.get('split_archive') in ('1', 'true'))
+
+    @action(detail=True, methods=['get'])
+    def metadata(self, request, pk=None):
+        """The complete parser output, loaded from the blob store when offloaded."""
+        return Response(self.get_object().full_metadata)
+
+    @action(detail=False, methods=['get'], url_path='search-metadata')
+    def search_metadata(self, request):
+        """
+        Sources by metadata key path and value, answered from the metadata index:
+        ?path=creator (exists), ?key=creator, ?path=column_names[]&value=sample_id,
+        ?path_prefix=sheets.&value_prefix=sam. Parameters form one condition.
+        """
+        condition = {
+            name: request.query_params[name]
+            for name in ('path', 'key', 'value', 'path_prefix', 'value_prefix')
+            if name in request.query_params
+        }
+        try:
+            queryset = search_sources(condition, queryset=self.get_queryset())
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        page = self.paginate_queryset(queryset.order_by('pk'))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class SchemaViewSet(CatalogViewSet):
+    queryset = Schema.objects.all()
+    serializer_class = SchemaSerializer
+    filter_fields = ['data_source', 'name']
+    upsert_unique_fields = ['name', 'data_source']
+    upsert_update_fields = ['description']
+
+
+class TableViewSet(CatalogViewSet):
+    queryset = Table.objects.all()
+    serializer_class = TableSerializer
+    filter_fields = ['schema', 'schema__data_source', 'name', 'table_type']
+    upsert_unique_fields = ['name', 'schema']
+    upsert_update_fields = [
+        'description', 'table_type', 'row_count', 'size_bytes', 'owner', 'tags', 'view_definition'
+    ]
+    cache_kind = 'table'
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Schema change timeline of the table, newest first: ?limit=50."""
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 500)
+        except ValueError:
+            return Response({'detail': "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response([
+            {'version': change.version.version, 'created_at': change.version.created_at,
+             'change_type': change.change_type, 'column': change.column_name, 'details': change.details}
+            for change in table_history(self.get_object(), limit=limit)
+        ])
+
+    @action(detail=True, methods=['get'])
+    def quality(self, request, pk=None):
+        """
+        Latest status and pass-rate trend of the table's quality rules, read
+        from the rollups: ?granularity=day|hour&days=30.
+        """
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return Response({'detail': f"granularity must be one of {', '.join(GRANULARITIES)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            days = min(int(request.query_params.get('days', 30)), 366)
+        except ValueError:
+            return Response({'detail': "days must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        rules = list(self.get_object().quality_rules.values_list('id', 'name', 'column_id', 'is_active'))
+        summary = quality_summary([rule[0] for rule in rules], granularity=granularity, days=days)
+        return Response([
+            {'rule': rule_id, 'name': name, 'column': column_id, 'is_active': is_active, **summary[rule_id]}
+            for rule_id, name, column_id, is_active in rules
+        ])
+
+
+class ColumnViewSet(CatalogViewSet):
+    queryset = Column.objects.all()
+    serializer_class = ColumnSerializer
+    filter_fields = ['table', 'name', 'data_type']
+    upsert_unique_fields = ['name', 'table']
+    upsert_update_fields = [
+        'data_type', 'description', 'is_primary_key', 'is_foreign_key', 'is_nullable',
+        'default_value', 'max_length', 'precision', 'scale', 'ordinal_position', 'tags'
+    ]
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Columns whose name, type and description resemble this one, from the
+        MinHash LSH index (find_similar_columns): ?threshold=0.5&limit=20.
+        """
+        try:
+            threshold = float(request.query_params.get('threshold', DEFAULT_THRESHOLD))
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            return Response({'detail': "threshold and limit must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        scores = dict(similar_columns(self.get_object(), threshold=threshold, limit=limit))
+        columns = Column.objects.filter(pk__in=scores).values(
+            'id', 'name', 'data_type', 'table_id', 'table__name', 'table__schema__data_source__name'
+        )
+        results = sorted(
+            ({'id': c['id'], 'name': c['name'], 'data_type': c['data_type'], 'table': c['table_id'],
+              'table_name': c['table__name'], 'data_source_name': c['table__schema__data_source__name'],
+              'similarity': scores[c['id']]} for c in columns),
+            key=lambda item: (-item['similarity'], item['id']),
+        )
+        return Response(results)
+
+
+class DataLineageViewSet(CatalogViewSet):
+    queryset = DataLineage.objects.all()
+    serializer_class = DataLineageSerializer
+    filter_fields = ['source_table', 'target_table', 'lineage_type']
+    upsert_unique_fields = ['source_table', 'target_table', 'lineage_type']
+    upsert_update_fields = ['description', 'transformation_logic', 'created_by']
+
+
+class GlossaryViewSet(CatalogViewSet):
+    # related_terms is not written by batch upserts; use the regular endpoints for it
+    queryset = Glossary.objects.prefetch_related('related_terms')
+    serializer_class = GlossarySerializer
+    filter_fields = ['category', 'term']
+    upsert_unique_fields = ['term']
+    upsert_update_fields = ['definition', 'category', 'owner']
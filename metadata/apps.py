@@ -0,0 +1,13 @@
+# metadata/apps.py
+from django.apps import AppConfig
+
+
+class MetadataConfig(AppConfig):
+    name = 'metadata'
+    default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        # Connects the per-connection SQLite tuning and cached-page invalidation
+        from . import db  # noqa: F401
+        from . import signals
+        signals.connect()
@@ -0,0 +1,193 @@
+# metadata/archives.py
+import multiprocessing
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from django.conf import settings
+from django.db import connections, transaction
+
+from .metrics import record_parse
+from .models import DataSource
+from .utils import SUPPORTED_EXTENSIONS, _route_file_metadata
+
+ZIP_SUFFIXES = ('.zip',)
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# Caps the manifest of a hostile archive; members past this are not read
+DEFAULT_MAX_MEMBERS = 10000
+
+
+def archive_format(file_name):
+    """'zip' or 'tar' when the file name has an archive suffix, else None."""
+    name = (file_name or '').lower()
+    if name.endswith(ZIP_SUFFIXES):
+        return 'zip'
+    if name.endswith(TAR_SUFFIXES):
+        return 'tar'
+    return None
+
+
+def memory_budget():
+    return getattr(settings, 'ARCHIVE_MEMORY_BUDGET_BYTES', 256 * 1024 * 1024)
+
+
+def parse_workers():
+    return getattr(settings, 'ARCHIVE_PARSE_WORKERS', 1)
+
+
+def _member_extension(name):
+    return os.path.splitext(name)[-1].lower().strip('.')
+
+
+def _skip_reason(name, size, limit):
+    base = os.path.basename(name)
+    if name.startswith('__MACOSX/') or base.startswith('.') or not base:
+        return 'hidden'
+    if archive_format(name):
+        return 'nested archive'
+    if _member_extension(name) not in SUPPORTED_EXTENSIONS:
+        return 'unsupported type'
+    if size is not None and size > limit:
+        return 'too large'
+    return None
+
+
+def iter_members(fileobj, kind, limit):
+    """
+    Yields (name, content or None, skip reason) for every file member, one at
+    a time and without extracting anything to disk. Zip members are read
+    through the central directory (the file must be seekable); tar archives
+    are read as a forward-only stream. No member is read past `limit` bytes,
+    whatever size its header claims.
+    """
+    def read(handle):
+        content = handle.read(limit + 1)
+        return (None, 'too large') if len(content) > limit else (content, None)
+
+    if kind == 'zip':
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                reason = _skip_reason(info.filename, info.file_size, limit)
+                if reason:
+                    yield info.filename, None, reason
+                    continue
+                with archive.open(info) as handle:
+                    yield (info.filename, *read(handle))
+    else:
+        with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                reason = _skip_reason(info.name, info.size, limit)
+                if reason:
+                    yield info.name, None, reason
+                    continue
+                yield (info.name, *read(archive.extractfile(info)))
+
+
+def _parse_member(name, content, exact_types):
+    """Runs in a worker process: parses one member and reports the time it took."""
+    started = time.perf_counter()
+    try:
+        result, failed = _route_file_metadata(content, _member_extension(name), exact_types), False
+    except Exception as e:
+        result, failed = {'error': f"Parsing Error: {e}"}, True
+    return result, time.perf_counter() - started, failed
+
+
+def parse_archive(fileobj, file_name, exact_types=False, workers=None, budget=None,
+                  max_members=DEFAULT_MAX_MEMBERS):
+    """
+    Parses every metadata member of a zip or tar archive with the format
+    parsers, in `workers` forked processes. Members are read as they are
+    needed: no more than `budget` bytes of member content are held at once
+    (read and waiting to be parsed), and members larger than the budget are
+    skipped. Returns {'file_type': 'Archive', 'members': {name: parser
+    output}, 'skipped': [...], ...} in archive order.
+    """
+    kind = archive_format(file_name)
+    workers = parse_workers() if workers is None else workers
+    budget = memory_budget() if budget is None else budget
+    results, skipped, order = {}, [], []
+    metadata = {'file_type': 'Archive', 'archive_format': kind}
+
+    def finish(name, size, outcome):
+        result, seconds, failed = outcome
+        record_parse(_member_extension(name), size, result, seconds, failed=failed)
+        results[name] = result
+
+    def accepted(members):
+        seen = set()
+        for name, content, reason in members:
+            if not reason and name in seen:
+                reason = 'duplicate name'
+            elif not reason and len(order) >= max_members:
+                reason = 'member limit reached'
+            if reason:
+                skipped.append({'name': name, 'reason': reason})
+                continue
+            seen.add(name)
+            order.append(name)
+            yield name, content
+
+    try:
+        members = accepted(iter_members(fileobj, kind, budget))
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # Children must not inherit (and later close) the parent's database connections
+            if not transaction.get_connection().in_atomic_block:
+                connections.close_all()
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                pending, in_flight = {}, 0
+                for name, content in members:
+                    while pending and in_flight + len(content) > budget:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            done_name, size = pending.pop(future)
+                            in_flight -= size
+                            finish(done_name, size, future.result())
+                    pending[pool.submit(_parse_member, name, content, exact_types)] = (name, len(content))
+                    in_flight += len(content)
+                for future, (name, size) in pending.items():
+                    finish(name, size, future.result())
+        else:
+            for name, content in members:
+                finish(name, len(content), _parse_member(name, content, exact_types))
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        return {**metadata, 'error': f"Archive Error: {e}"}
+
+    metadata.update({
+        'member_count': len(order),
+        'failed_members': sum('error' in results[name] for name in order),
+        'members': {name: results[name] for name in order},
+        'skipped': skipped,
+    })
+    return metadata
+
+
+def split_archive(source, metadata):
+    """
+    Creates one child DataSource per parsed member of an archive source and
+    replaces the archive's own metadata with a manifest of its members.
+    Returns [(member name, child)] in archive order.
+    """
+    children = []
+    for name, result in metadata.get('members', {}).items():
+        child = DataSource(
+            name=f"{source.name}/{name}"[:255], parent=source, uploaded_file=source.uploaded_file.name,
+            description=f"Member {name} of {os.path.basename(source.uploaded_file.name)}",
+            status='FAILED' if 'error' in result else 'SUCCESS',
+        )
+        child.set_processed_metadata(result)
+        children.append((name, child))
+    manifest = {key: value for key, value in metadata.items() if key != 'members'}
+    manifest['members'] = {
+        name: result.get('error') or result.get('file_type', '') for name, result in metadata.get('members', {}).items()
+    }
+    with transaction.atomic():
+        DataSource.objects.bulk_create([child for _, child in children])
+        source.set_processed_metadata(manifest)
+        source.save()
+    return children
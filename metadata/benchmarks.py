@@ -0,0 +1,78 @@
+# metadata/benchmarks.py
+import json
+import platform
+import sys
+import django
+from django.db import connection
+from django.utils import timezone
+
+
+def percentile(samples, q):
+    """Linear-interpolated percentile of a non-empty list, q in [0, 100]."""
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(samples_ms):
+    """Latency percentiles (milliseconds) for a list of samples."""
+    return {
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p90_ms': round(percentile(samples_ms, 90), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'min_ms': round(min(samples_ms), 3),
+        'max_ms': round(max(samples_ms), 3),
+        'samples': len(samples_ms),
+    }
+
+
+def environment():
+    return {
+        'timestamp': timezone.now().isoformat(),
+        'python': sys.version.split()[0],
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'database': connection.vendor,
+    }
+
+
+def save_results(path, kind, results):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'kind': kind, 'environment': environment(), 'results': results}, handle, indent=2)
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def compare_results(current, baseline, metrics, threshold=1.2, min_delta=1.0):
+    """
+    Compares two result lists matched on their 'key' entry. `metrics` is a list
+    of (name, exact) pairs: exact metrics such as query counts regress on any
+    increase, the others when they exceed baseline * threshold by at least
+    `min_delta` (which keeps sub-millisecond noise out of the report).
+    Returns a list of (key, metric, baseline_value, current_value).
+    """
+    previous = {r['key']: r for r in baseline}
+    regressions = []
+    for result in current:
+        before = previous.get(result['key'])
+        if before is None:
+            continue
+        for metric, exact in metrics:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if exact:
+                regressed = new > old
+            else:
+                regressed = new > old * threshold and new - old >= min_delta
+            if regressed:
+                regressions.append((result['key'], metric, old, new))
+    return regressions
@@ -0,0 +1,117 @@
+# metadata/blobs.py
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import zstandard
+except ImportError:  # gzip is always available
+    zstandard = None
+
+# File suffix per codec; the preferred codec is tried first when reading
+CODECS = {'zstd': '.json.zst', 'gzip': '.json.gz'}
+
+
+def blob_root():
+    return str(getattr(settings, 'METADATA_BLOB_ROOT', os.path.join(settings.BASE_DIR, 'metadata_blobs')))
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def encode_metadata(metadata):
+    """Canonical JSON bytes, so equal metadata always hashes to the same digest."""
+    return json.dumps(metadata, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("Reading zstd metadata blobs requires zstandard (pip install zstandard).")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def blob_path(digest, codec):
+    # Two levels of fan-out keep directories small
+    return os.path.join(blob_root(), digest[:2], digest[2:4], digest + CODECS[codec])
+
+
+def find_blob(digest):
+    """Returns (path, codec) of a stored blob, or (None, None)."""
+    for codec in sorted(CODECS, key=lambda c: c != default_codec()):
+        path = blob_path(digest, codec)
+        if os.path.exists(path):
+            return path, codec
+    return None, None
+
+
+def store_blob(data):
+    """
+    Stores already-encoded JSON bytes under their SHA-256 digest and returns
+    the digest. Identical metadata is written once; writes are atomic.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if find_blob(digest)[0] is not None:
+        return digest
+    codec = default_codec()
+    path = blob_path(digest, codec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(_compress(data, codec))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return digest
+
+
+def load_blob(digest):
+    path, codec = find_blob(digest)
+    if path is None:
+        raise FileNotFoundError(f"Metadata blob {digest} is missing from {blob_root()}")
+    with open(path, 'rb') as handle:
+        return json.loads(_decompress(handle.read(), codec))
+
+
+def iter_blobs():
+    """Yields (digest, path) for every stored blob."""
+    suffixes = tuple(CODECS.values())
+    for directory, _, files in os.walk(blob_root()):
+        for name in files:
+            if name.endswith(suffixes):
+                yield name.split('.', 1)[0], os.path.join(directory, name)
+
+
+def summarize_metadata(value, max_items=20, max_chars=200, depth=2):
+    """
+    Shape-preserving excerpt of parser output: the first `max_items` entries
+    of each container and the first `max_chars` of each string, with
+    containers below `depth` replaced by their size.
+    """
+    if isinstance(value, dict):
+        if depth <= 0:
+            return f'{{{len(value)} keys}}'
+        return {k: summarize_metadata(v, max_items, max_chars, depth - 1)
+                for k, v in list(value.items())[:max_items]}
+    if isinstance(value, list):
+        if depth <= 0:
+            return f'[{len(value)} items]'
+        return [summarize_metadata(v, max_items, max_chars, depth - 1) for v in value[:max_items]]
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + '…'
+    return value
@@ -0,0 +1,131 @@
+# metadata/budgets.py
+from django.urls import URLPattern, URLResolver, reverse
+from .models import DataSource, Table, Column, DataLineage, Glossary, Schema
+
+# Maximum SQL queries per GET, by URL name. Budgets must not depend on catalog
+# size: a page whose query count grows with the number of rows is an N+1 bug.
+# Every named route in metadata/urls.py needs an entry here.
+QUERY_BUDGETS = {
+    'dashboard': 6,
+    'data_source_list': 1,
+    'data_source_detail': 2,
+    'data_source_create': 0,
+    'data_source_upload': 0,
+    'data_source_update': 1,
+    'table_list': 2,
+    'table_detail': 6,
+    'table_create': 0,
+    'table_update': 3,
+    'lineage_view': 2,
+    'glossary_list': 2,
+    'api_search_tables': 1,
+    'autocomplete': 1,
+    'catalog_export': 1,
+    'metrics': 1,
+    # REST API (DRF router names)
+    'api-root': 0,
+    'datasource-list': 2,
+    'datasource-detail': 1,
+    'datasource-stream': 1,
+    'datasource-metadata': 1,
+    'datasource-search-metadata': 2,
+    'schema-list': 2,
+    'schema-detail': 1,
+    'schema-stream': 1,
+    'table-list': 2,
+    'table-detail': 1,
+    'table-stream': 1,
+    'table-history': 2,
+    'table-quality': 4,
+    'column-list': 2,
+    'column-detail': 1,
+    'column-stream': 1,
+    'column-similar': 5,
+    'datalineage-list': 2,
+    'datalineage-detail': 1,
+    'datalineage-stream': 1,
+    'glossary-list': 3,
+    'glossary-detail': 2,
+    'glossary-stream': 1,
+}
+
+# Routes served from the version-stamped cache (metadata.caching): a repeat GET
+# of an unchanged object must issue no queries at all
+CACHED_ROUTES = {'data_source_detail', 'table_detail', 'datasource-detail', 'table-detail'}
+
+# Query strings that make a route do its real work (without them it answers 400)
+ROUTE_QUERY_STRINGS = {
+    'datasource-search-metadata': 'path=file_type&value=Synthetic',
+}
+
+# POST-only routes have no GET budget
+SKIPPED_ROUTES = {
+    'datasource-batch', 'schema-batch', 'table-batch', 'column-batch',
+    'datalineage-batch', 'glossary-batch',
+}
+
+_DETAIL_MODELS = {
+    'data_source': DataSource, 'datasource': DataSource, 'schema': Schema, 'table': Table,
+    'column': Column, 'datalineage': DataLineage, 'glossary': Glossary,
+}
+
+
+def iter_named_routes(patterns):
+    """Yields (name, pattern) for every named route, descending into includes."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_named_routes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name, pattern
+
+
+def route_url(name, pattern):
+    """Builds a concrete URL for a route, using the newest object of the right model for pk arguments."""
+    kwargs = {}
+    arguments = pattern.pattern.regex.groupindex
+    if 'format' in arguments:
+        # Format-suffix duplicates of a route share its budget
+        return None
+    for argument in arguments:
+        if argument in ('entity', 'source'):
+            kwargs[argument] = 'tables'
+        elif argument == 'pk':
+            prefix = name.rsplit('-', 1)[0] if '-' in name else name.rsplit('_', 1)[0]
+            model = _DETAIL_MODELS[prefix]
+            kwargs[argument] = model.objects.order_by('-pk').values_list('pk', flat=True)[0]
+        else:
+            return None
+    url = reverse(name, kwargs=kwargs)
+    return f'{url}?{ROUTE_QUERY_STRINGS[name]}' if name in ROUTE_QUERY_STRINGS else url
+
+
+def measure_routes(client, patterns):
+    """
+    GETs every budgeted route once (twice for CACHED_ROUTES) and yields
+    (name, url, queries used, budget, status code, queries of the cached
+    repeat or None). Budget is None for a route with no declared budget.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    seen = set()
+    for name, pattern in iter_named_routes(patterns):
+        if name in seen or name in SKIPPED_ROUTES:
+            continue
+        url = route_url(name, pattern)
+        if url is None:
+            continue
+        seen.add(name)
+        if name not in QUERY_BUDGETS:
+            yield name, url, None, None, None, None
+            continue
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        cached = None
+        if name in CACHED_ROUTES:
+            with CaptureQueriesContext(connection) as repeat:
+                client.get(url)
+            cached = len(repeat)
+        yield name, url, len(queries), QUERY_BUDGETS[name], response.status_code, cached
@@ -0,0 +1,141 @@
+# metadata/bulk.py
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from .caching import invalidate_instances
+
+# Rows per INSERT statement; Django splits further if the backend needs it
+DEFAULT_BATCH_SIZE = 1000
+
+
+class BulkValidationError(Exception):
+    """Raised when one or more items of a batch are invalid. `errors` maps item index to messages."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid item(s) in batch")
+        self.errors = errors
+
+
+def _foreign_keys(model):
+    return {
+        f.name: f for f in model._meta.concrete_fields
+        if f.is_relation and f.many_to_one
+    }
+
+
+def build_instances(model, items, fields):
+    """
+    Turns plain dicts into unsaved model instances without a query per row.
+    Foreign keys are given as primary keys and checked with one query per relation.
+    """
+    foreign_keys = _foreign_keys(model)
+    instances, errors = [], {}
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = ["Expected an object."]
+            continue
+        values = {}
+        for name in fields:
+            if name not in item:
+                continue
+            attname = foreign_keys[name].attname if name in foreign_keys else name
+            values[attname] = item[name]
+        instances.append((index, model(**values)))
+
+    # Validate plain fields in Python; FK existence is checked in bulk below
+    fk_names = list(foreign_keys)
+    for index, obj in instances:
+        try:
+            obj.clean_fields(exclude=fk_names)
+        except ValidationError as e:
+            errors.setdefault(index, []).append(e.message_dict)
+
+    for name, field in foreign_keys.items():
+        ids = {getattr(obj, field.attname) for _, obj in instances} - {None}
+        if not ids:
+            continue
+        target = field.related_model
+        existing = set()
+        id_list = list(ids)
+        for start in range(0, len(id_list), DEFAULT_BATCH_SIZE):
+            existing.update(
+                target._default_manager.filter(pk__in=id_list[start:start + DEFAULT_BATCH_SIZE])
+                .values_list('pk', flat=True)
+            )
+        for index, obj in instances:
+            value = getattr(obj, field.attname)
+            if value is None:
+                if not field.null:
+                    errors.setdefault(index, []).append({name: ["This field is required."]})
+            elif value not in existing:
+                errors.setdefault(index, []).append({name: [f"Invalid pk \"{value}\" - object does not exist."]})
+
+    if errors:
+        raise BulkValidationError(errors)
+    return [obj for _, obj in instances]
+
+
+def _unique_keys(model, instances, unique_fields):
+    """The unique-key tuple of each instance; items repeating an earlier key are invalid."""
+    attnames = [model._meta.get_field(name).attname for name in unique_fields]
+    keys, seen, errors = [], {}, {}
+    for index, obj in enumerate(instances):
+        key = tuple(getattr(obj, attname) for attname in attnames)
+        keys.append(key)
+        # Keys with a null never conflict
+        if None in key:
+            continue
+        if key in seen:
+            errors[index] = [{'non_field_errors': [f"Repeats the {', '.join(unique_fields)} of item {seen[key]}."]}]
+        else:
+            seen[key] = index
+    if errors:
+        raise BulkValidationError(errors)
+    return attnames, keys
+
+
+def _existing_keys(model, attnames, keys):
+    """Which of `keys` are already stored, narrowed by the first key field in batches."""
+    wanted = {key for key in keys if None not in key}
+    first = list({key[0] for key in wanted})
+    existing = set()
+    for start in range(0, len(first), DEFAULT_BATCH_SIZE):
+        rows = model._default_manager.filter(**{f'{attnames[0]}__in': first[start:start + DEFAULT_BATCH_SIZE]})
+        existing.update(key for key in rows.values_list(*attnames) if key in wanted)
+    return existing
+
+
+def bulk_upsert(model, items, unique_fields, update_fields, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Inserts or updates `items` (list of dicts) in a single transaction using
+    bulk_create(update_conflicts=True). Only the fields present in every item
+    are overwritten on conflict, so partial payloads never reset other columns.
+    A batch may not repeat a unique key (BulkValidationError). Returns the
+    number of rows written: all of them when updating, only the new ones when
+    there is nothing to update and existing rows are left alone.
+    """
+    if not items:
+        return 0
+    keys = [set(item) for item in items if isinstance(item, dict)]
+    present = set.intersection(*keys) if keys else set()
+    fields = list(unique_fields) + [f for f in update_fields if f not in unique_fields]
+    instances = build_instances(model, items, fields)
+    attnames, unique_keys = _unique_keys(model, instances, unique_fields)
+
+    to_update = [f for f in update_fields if f in present]
+    if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+        to_update.append('updated_at')
+
+    with transaction.atomic():
+        if to_update:
+            model.objects.bulk_create(
+                instances, batch_size=batch_size, update_conflicts=True,
+                unique_fields=list(unique_fields), update_fields=to_update
+            )
+            written = len(instances)
+        else:
+            written = len(instances) - len(_existing_keys(model, attnames, unique_keys))
+            model.objects.bulk_create(instances, batch_size=batch_size, ignore_conflicts=True)
+        # bulk_create sends no signals, so cached pages are invalidated explicitly
+        invalidate_instances(model, instances)
+    return written
@@ -0,0 +1,113 @@
+# metadata/caching.py
+import time
+import random
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Column, DataLineage, DataQualityRule, DataSource, Schema, Table
+
+STAMP_PREFIX = 'catalog:v'
+FRAGMENT_PREFIX = 'catalog:f'
+
+
+def _cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _stamp_key(kind, pk):
+    return f'{STAMP_PREFIX}:{kind}:{pk}'
+
+
+def _new_stamp():
+    # Unique rather than incremented, so a stamp lost to eviction can never be re-issued
+    return f'{time.time_ns():x}{random.getrandbits(32):08x}'
+
+
+def clear_catalog_cache():
+    """Drops every cached page and stamp (benchmarks and tests that need cold renders)."""
+    _cache().clear()
+
+
+def get_version(kind, pk):
+    """Current version stamp of an object, created on first use."""
+    cache, key = _cache(), _stamp_key(kind, pk)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, _new_stamp(), timeout=None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def bump_versions(kind, pks):
+    """Invalidates everything cached for these objects by giving them fresh stamps."""
+    if pks:
+        _cache().set_many({_stamp_key(kind, pk): _new_stamp() for pk in pks}, timeout=None)
+
+
+def cached_payload(name, kind, pk, build):
+    """
+    Returns build() cached under the object's current version stamp. `build`
+    may return a rendered fragment or a JSON-serializable payload; it runs only
+    on a miss, so a hit costs two cache reads and no queries.
+    """
+    cache = _cache()
+    key = f'{FRAGMENT_PREFIX}:{name}:{pk}:{get_version(kind, pk)}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+    return payload
+
+
+def affected_objects(model, instances):
+    """
+    Maps changed instances to the table and source ids whose cached pages
+    show them. Table pages show neighbour table names through lineage, the
+    owner and the owning schema and source; source pages show table counts.
+    """
+    tables, sources, schemas = set(), set(), set()
+    if model is Table:
+        ids = {obj.pk for obj in instances if obj.pk is not None}
+        schemas = {obj.schema_id for obj in instances}
+        missing = [obj for obj in instances if obj.pk is None]
+        if missing:
+            # Rows updated through bulk_create(update_conflicts=True) come back without a pk
+            ids |= set(Table.objects.filter(
+                schema__in={obj.schema_id for obj in missing}, name__in={obj.name for obj in missing}
+            ).values_list('id', flat=True))
+        edges = DataLineage.objects.filter(Q(source_table__in=ids) | Q(target_table__in=ids))
+        tables = ids.union(*edges.values_list('source_table_id', 'target_table_id'))
+    elif model is Column or model is DataQualityRule:
+        tables = {obj.table_id for obj in instances}
+    elif model is DataLineage:
+        tables = {obj.source_table_id for obj in instances} | {obj.target_table_id for obj in instances}
+    elif model is Schema:
+        sources = {obj.data_source_id for obj in instances}
+        tables = set(Table.objects.filter(schema__in=[obj.pk for obj in instances]).values_list('id', flat=True))
+    elif model is DataSource:
+        # An archive's page lists the sources split out of it
+        sources = {obj.pk for obj in instances} | {obj.parent_id for obj in instances if obj.parent_id}
+        tables = set(Table.objects.filter(schema__data_source__in=sources).values_list('id', flat=True))
+    elif model is get_user_model():
+        tables = set(Table.objects.filter(owner__in=[obj.pk for obj in instances]).values_list('id', flat=True))
+    if schemas:
+        sources |= set(Schema.objects.filter(pk__in=schemas).values_list('data_source_id', flat=True))
+    tables.discard(None)
+    return tables, sources
+
+
+def invalidate_instances(model, instances):
+    """
+    Bumps the stamps of every cached page that displays one of `instances`.
+    Affected ids are resolved now (before a delete cascades) and bumped once
+    the transaction commits, so a concurrent request cannot re-cache old rows.
+    """
+    tables, sources = affected_objects(model, instances)
+
+    def bump():
+        bump_versions('table', tables)
+        bump_versions('source', sources)
+    transaction.on_commit(bump)
@@ -0,0 +1,279 @@
+# metadata/crawler.py
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from django.db import transaction
+from django.utils import timezone
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.engine.reflection import ObjectKind
+from sqlalchemy.exc import DBAPIError
+
+from .caching import invalidate_instances
+from .history import MAX_NAME_LENGTH, ingest_structure
+from .indexing import index_data_source
+from .keys import KeyCandidate, create_foreign_keys
+from .models import Column, DataSource, Table
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 2000
+SYSTEM_SCHEMAS = {'information_schema', 'pg_catalog', 'pg_toast', 'mysql', 'performance_schema', 'sys'}
+_TABLE_TYPES = {'r': 'table', 'p': 'table', 'f': 'table', 'v': 'view', 'm': 'materialized_view'}
+
+# One query per schema listing every relation with its kind, planner statistics,
+# a fingerprint of its catalog entry and, for views, the definition
+_POSTGRES_RELATIONS = """
+SELECT c.relname, c.relkind, c.reltuples::bigint, pg_total_relation_size(c.oid),
+       c.xmin::text || ':' || COALESCE((
+           SELECT md5(string_agg(a.attname || ':' || a.atttypid || ':' || a.atttypmod || ':' || a.attnotnull,
+                                 ',' ORDER BY a.attnum))
+           FROM pg_attribute a WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+       ), ''),
+       CASE WHEN c.relkind IN ('v', 'm') THEN pg_get_viewdef(c.oid) END
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = :schema AND c.relkind IN ('r', 'p', 'f', 'v', 'm') AND NOT c.relispartition
+"""
+_MYSQL_RELATIONS = """
+SELECT t.table_name, t.table_type, t.table_rows, t.data_length + t.index_length,
+       CONCAT(COALESCE(t.create_time, ''), ':', COALESCE(MD5(v.view_definition), '')), v.view_definition
+FROM information_schema.tables t
+LEFT JOIN information_schema.views v ON v.table_schema = t.table_schema AND v.table_name = t.table_name
+WHERE t.table_schema = :schema
+"""
+
+
+def _digest(value):
+    return hashlib.sha1((value or '').encode('utf-8')).hexdigest()
+
+
+def _postgres_relations(connection, schema):
+    return {
+        name: {'table_type': _TABLE_TYPES[kind], 'row_count': rows if rows is not None and rows >= 0 else None,
+               'size_bytes': size, 'fingerprint': _digest(fingerprint), 'view_definition': definition or ''}
+        for name, kind, rows, size, fingerprint, definition in connection.execute(text(_POSTGRES_RELATIONS), {'schema': schema})
+    }
+
+
+def _mysql_relations(connection, schema):
+    return {
+        name: {'table_type': 'view' if kind == 'VIEW' else 'table', 'row_count': rows, 'size_bytes': size,
+               'fingerprint': _digest(fingerprint), 'view_definition': definition or ''}
+        for name, kind, rows, size, fingerprint, definition in connection.execute(text(_MYSQL_RELATIONS), {'schema': schema})
+    }
+
+
+def _sqlite_relations(connection, schema):
+    # SQLite keeps no DDL timestamps; the stored CREATE statement changes with every ALTER
+    quoted = connection.dialect.identifier_preparer.quote_identifier(schema)
+    relations = {
+        name: {'table_type': kind, 'row_count': None, 'size_bytes': None, 'fingerprint': _digest(sql),
+               'view_definition': sql if kind == 'view' else ''}
+        for name, kind, sql in connection.execute(text(
+            f"SELECT name, type, sql FROM {quoted}.sqlite_master "
+            f"WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        ))
+    }
+    # Row estimates exist once ANALYZE has run; page sizes need the dbstat table (most builds)
+    if connection.execute(text(f"SELECT 1 FROM {quoted}.sqlite_master WHERE name = 'sqlite_stat1'")).first():
+        for name, stat in connection.execute(text(f"SELECT tbl, stat FROM {quoted}.sqlite_stat1")):
+            if name in relations and stat:
+                relations[name]['row_count'] = int(stat.split()[0])
+    try:
+        for name, size in connection.execute(text("SELECT name, SUM(pgsize) FROM dbstat(:schema) GROUP BY name"),
+                                             {'schema': schema}):
+            if name in relations:
+                relations[name]['size_bytes'] = size
+    except DBAPIError:
+        pass
+    return relations
+
+
+def _generic_relations(inspector, schema):
+    relations = {
+        name: {'table_type': 'table', 'row_count': None, 'size_bytes': None, 'fingerprint': '', 'view_definition': ''}
+        for name in inspector.get_table_names(schema=schema)
+    }
+    for name in inspector.get_view_names(schema=schema):
+        try:
+            definition = inspector.get_view_definition(name, schema=schema) or ''
+        except NotImplementedError:
+            definition = ''
+        relations[name] = {'table_type': 'view', 'row_count': None, 'size_bytes': None, 'fingerprint': '',
+                           'view_definition': str(definition)}
+    return relations
+
+
+_RELATION_QUERIES = {'postgresql': _postgres_relations, 'mysql': _mysql_relations, 'sqlite': _sqlite_relations}
+
+
+def _type_name(column_type, dialect):
+    try:
+        return column_type.compile(dialect=dialect)
+    except Exception:
+        return type(column_type).__name__.upper()
+
+
+def _number(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def crawl_schema(engine, schema, fingerprints=None):
+    """
+    Reads one schema: every relation with its statistics, and the columns,
+    primary keys and foreign keys of the relations whose fingerprint is not
+    in `fingerprints` ({table: fingerprint} from the previous crawl). Columns
+    and keys come from SQLAlchemy's multi-table reflection, one batch of
+    catalog queries for all changed relations on PostgreSQL and MySQL.
+    """
+    fingerprints = fingerprints or {}
+    with engine.connect() as connection:
+        inspector = inspect(connection)
+        relation_query = _RELATION_QUERIES.get(engine.dialect.name)
+        relations = relation_query(connection, schema) if relation_query else _generic_relations(inspector, schema)
+        relations = {name[:MAX_NAME_LENGTH]: info for name, info in relations.items()}
+        changed = [
+            name for name, info in relations.items()
+            if not info['fingerprint'] or fingerprints.get(name) != info['fingerprint']
+        ]
+        structure, foreign_keys = {}, []
+        if changed:
+            columns = inspector.get_multi_columns(schema=schema, filter_names=changed, kind=ObjectKind.ANY)
+            primary_keys = inspector.get_multi_pk_constraint(schema=schema, filter_names=changed)
+            for (owner, name), definitions in columns.items():
+                key = set((primary_keys.get((owner, name)) or {}).get('constrained_columns') or ())
+                structure[name] = {
+                    column['name'][:MAX_NAME_LENGTH]: {
+                        'data_type': _type_name(column['type'], engine.dialect)[:100],
+                        'is_nullable': bool(column.get('nullable', True)) and column['name'] not in key,
+                        'max_length': _number(getattr(column['type'], 'length', None)),
+                        'precision': _number(getattr(column['type'], 'precision', None)),
+                        'scale': _number(getattr(column['type'], 'scale', None)),
+                        'ordinal_position': position,
+                        'is_primary_key': column['name'] in key,
+                    }
+                    for position, column in enumerate(definitions)
+                }
+            for (_, name), keys in inspector.get_multi_foreign_keys(schema=schema, filter_names=changed).items():
+                for fk in keys:
+                    foreign_keys.append((
+                        name, fk['constrained_columns'], fk.get('referred_schema') or schema,
+                        fk['referred_table'], fk['referred_columns'],
+                    ))
+    return {'relations': relations, 'structure': structure, 'foreign_keys': foreign_keys}
+
+
+def crawl_database(url, source=None, name=None, schemas=None, workers=DEFAULT_WORKERS, full=False,
+                   created_by=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Mirrors a live database into the catalog through SQLAlchemy. Schemas
+    are crawled concurrently on `workers` threads; relations whose catalog
+    fingerprint matches the previous crawl (unless `full`) keep their
+    columns untouched. Row counts and sizes come from catalog statistics,
+    never COUNT(*). Structure changes go through ingest_structure (so they
+    are versioned), statistics and view definitions are bulk-updated and
+    declared foreign keys become 'foreign_key' lineage. Creates the
+    DataSource when `source` is None. Returns (source, stats).
+    """
+    parsed = make_url(url)
+    masked = parsed.render_as_string(hide_password=True)
+    # One pooled connection per worker thread (SQLite pools are per thread already)
+    options = {} if parsed.get_backend_name() == 'sqlite' else {'pool_size': max(workers, 5)}
+    engine = create_engine(url, **options)
+    try:
+        inspector = inspect(engine)
+        names = [
+            schema for schema in (schemas or inspector.get_schema_names())
+            if schema not in SYSTEM_SCHEMAS and not schema.startswith(('pg_temp', 'pg_toast_temp'))
+        ]
+        known = {}
+        if source is not None and not full:
+            for schema, table, fingerprint in Table.objects.filter(schema__data_source=source).exclude(
+                catalog_fingerprint=''
+            ).values_list('schema__name', 'name', 'catalog_fingerprint').iterator(chunk_size=batch_size):
+                known.setdefault(schema, {})[table] = fingerprint
+
+        with ThreadPoolExecutor(max(1, min(workers, len(names) or 1))) as pool:
+            crawled = dict(zip(names, pool.map(lambda schema: crawl_schema(engine, schema, known.get(schema)), names)))
+    finally:
+        engine.dispose()
+    if source is None:
+        source = DataSource.objects.create(
+            name=name or parsed.database or masked, description=f"Crawled from {masked}", status='PENDING',
+        )
+
+    structure, keep = {}, []
+    for schema, result in crawled.items():
+        structure[schema[:MAX_NAME_LENGTH]] = result['structure']
+        keep.extend((schema, table) for table in result['relations'] if table not in result['structure'])
+    if schemas:
+        # A crawl limited to some schemas leaves the others as they are
+        keep.extend(Table.objects.filter(schema__data_source=source).exclude(schema__name__in=names)
+                    .values_list('schema__name', 'name').iterator(chunk_size=batch_size))
+    version = ingest_structure(source, structure, batch_size=batch_size, keep=keep)
+    updated = _update_tables(source, crawled, batch_size)
+    keys = _declare_foreign_keys(source, crawled, created_by, batch_size)
+
+    stats = {
+        'schemas': len(crawled),
+        'tables': sum(len(result['relations']) for result in crawled.values()),
+        'inspected': sum(len(result['structure']) for result in crawled.values()),
+        'updated': updated, 'foreign_keys': keys[0],
+        'version': version.version if version else None,
+    }
+    source.status = 'SUCCESS'
+    source.set_processed_metadata({
+        'file_type': 'Database', 'dialect': parsed.get_backend_name(), 'url': masked,
+        'crawled_at': timezone.now().isoformat(), **{k: v for k, v in stats.items() if k != 'version'},
+    })
+    source.save()
+    index_data_source(source)
+    return source, stats
+
+
+def _update_tables(source, crawled, batch_size):
+    """Bulk-writes statistics, types, view definitions and fingerprints that differ. Returns rows written."""
+    fields = ('table_type', 'row_count', 'size_bytes', 'view_definition', 'catalog_fingerprint')
+    now = timezone.now()
+    changed, described = [], []
+    rows = Table.objects.filter(schema__data_source=source).values_list('id', 'schema__name', 'name', 'schema_id', *fields)
+    for pk, schema, name, schema_id, *current in rows.iterator(chunk_size=batch_size):
+        info = crawled.get(schema, {}).get('relations', {}).get(name)
+        if info is None:
+            continue
+        wanted = [info['table_type'], info['row_count'], info['size_bytes'], info['view_definition'], info['fingerprint']]
+        if wanted != current:
+            table = Table(pk=pk, schema_id=schema_id, updated_at=now, **dict(zip(fields, wanted)))
+            # Statistics alone do not count as an edit (tagging and lineage rescan on updated_at)
+            (described if wanted[0] != current[0] or wanted[3] != current[3] else changed).append(table)
+    with transaction.atomic():
+        Table.objects.bulk_update(changed, fields, batch_size=batch_size)
+        Table.objects.bulk_update(described, [*fields, 'updated_at'], batch_size=batch_size)
+    invalidate_instances(Table, changed + described)
+    return len(changed) + len(described)
+
+
+def _declare_foreign_keys(source, crawled, created_by, batch_size):
+    """Records the declared foreign keys of the re-inspected tables as lineage. Returns (table, column) edges added."""
+    declared = [
+        (schema, *fk) for schema, result in crawled.items() for fk in result['foreign_keys']
+        if len(fk[1]) == len(fk[4])
+    ]
+    if not declared:
+        return 0, 0
+    tables = {(schema, table) for schema, table, *_ in declared} | {(fk[3], fk[4]) for fk in declared}
+    column_ids = {}
+    rows = Column.objects.filter(
+        table__schema__data_source=source, table__name__in={table for _, table in tables}
+    ).values_list('table__schema__name', 'table__name', 'name', 'id')
+    for schema, table, name, pk in rows.iterator(chunk_size=batch_size):
+        if (schema, table) in tables:
+            column_ids[(schema, table, name)] = pk
+    candidates = []
+    for schema, table, columns, referred_schema, referred_table, referred_columns in declared:
+        for column, referred in zip(columns, referred_columns):
+            child = column_ids.get((schema, table, column))
+            parent = column_ids.get((referred_schema, referred_table, referred))
+            if child and parent:
+                candidates.append(KeyCandidate(child, parent, 1.0, 'declared constraint'))
+    if not candidates:
+        return 0, 0
+    return create_foreign_keys(candidates, created_by=created_by, batch_size=batch_size, label="Declared foreign key")
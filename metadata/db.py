@@ -0,0 +1,95 @@
+# metadata/db.py
+import random
+import threading
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Per-thread flags for the request currently being served
+_state = threading.local()
+# Below this many rows an exact COUNT(*) is cheap enough and preferred over an estimate
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+def pin_to_primary():
+    """Sends every later read on this thread to the primary (read-your-writes)."""
+    _state.pinned = True
+    _state.wrote = True
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def wrote_to_primary():
+    return getattr(_state, 'wrote', False)
+
+
+def reset_pinning(pinned=False):
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+class ReplicaRouter:
+    """
+    Sends writes (and migrations) to 'default' and spreads reads over the
+    aliases in DATABASE_REPLICAS. Once a thread writes, or a request arrives
+    pinned by ReplicaPinningMiddleware, reads stay on the primary so users see
+    their own changes despite replication lag. Reads inside a transaction on
+    the primary never leave it.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        # Reads inside a transaction must see its own (and the latest committed) rows
+        if not replicas or is_pinned() or connections['default'].in_atomic_block:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Applies SQLITE_PRAGMAS (synchronous mode, WAL journal when enabled) to every new SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+connection_created.connect(configure_sqlite, dispatch_uid='metadata.db.configure_sqlite')
+
+
+def estimated_count(model, using='default'):
+    """
+    The planner's row estimate for a model's whole table, read from the
+    catalog statistics instead of counting, or None where the backend keeps
+    none (SQLite) or has not gathered them yet.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # reltuples is -1 until the table is first vacuumed or analyzed
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)', [connection.ops.quote_name(table)])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
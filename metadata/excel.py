@@ -0,0 +1,324 @@
+# metadata/excel.py
+import io
+import posixpath
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pandas as pd
+from django.conf import settings
+from lxml import etree
+
+from .inference import DEFAULT_SAMPLE_SIZE, DEFAULT_SEED, infer_column_types
+
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_CELL_REF_RE = re.compile(r'([A-Z]+)(\d+)')
+_ROW_NUMBER_RE = re.compile(rb'<(?:\w+:)?row\b[^>]*?\sr="(\d+)"')
+_DIMENSION_RE = re.compile(r'^\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?$')
+# Built-in number formats that display dates or times (ECMA-376 18.8.30)
+_DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+# A custom format is a date when, outside quotes, escapes and [colours], it uses a date/time code
+_FORMAT_NOISE_RE = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+_EPOCH_1900 = datetime(1899, 12, 30)
+_EPOCH_1904 = datetime(1904, 1, 1)
+
+
+def sheet_workers():
+    return getattr(settings, 'EXCEL_SHEET_WORKERS', 1)
+
+
+def full_load_default():
+    return getattr(settings, 'EXCEL_FULL_LOAD', False)
+
+
+def _local(tag):
+    return etree.QName(tag).localname
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _text(element):
+    """Text of a shared or inline string item: its <t>, or the <t> of every rich-text run (no phonetic runs)."""
+    text = element.find('{*}t')
+    if text is not None:
+        return text.text or ''
+    return ''.join(run.findtext('{*}t') or '' for run in element.iterchildren('{*}r'))
+
+
+def _resolve(base, target):
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), target))
+
+
+def _relationships(package, part):
+    """{id: (relationship type, target part path)} of a package part ('' for the package itself)."""
+    path = posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+    if path not in package.NameToInfo:
+        return {}
+    root = etree.fromstring(package.read(path))
+    return {rel.get('Id'): (rel.get('Type', '').rsplit('/', 1)[-1], _resolve(part, rel.get('Target', '')))
+            for rel in root if _local(rel.tag) == 'Relationship'}
+
+
+def _date_styles(package, path):
+    """Indexes of the cell styles (the s attribute) whose number format shows a date or time."""
+    if not path or path not in package.NameToInfo:
+        return set()
+    root = etree.fromstring(package.read(path))
+    custom = {}
+    for element in root.iter():
+        if _local(element.tag) == 'numFmt':
+            code = _FORMAT_NOISE_RE.sub('', element.get('formatCode', '')).lower()
+            custom[int(element.get('numFmtId', 0))] = any(c in code for c in 'dmyhs') and 'general' not in code
+    styles = set()
+    for element in root.iter():
+        if _local(element.tag) == 'cellXfs':
+            for index, xf in enumerate(x for x in element if _local(x.tag) == 'xf'):
+                format_id = int(xf.get('numFmtId', 0))
+                if format_id in _DATE_FORMAT_IDS or custom.get(format_id):
+                    styles.add(index)
+            break
+    return styles
+
+
+def read_workbook(package):
+    """
+    Reads the workbook part of an open xlsx package: [(sheet name, sheet
+    part path)] for every worksheet in tab order, the shared strings and
+    styles part paths, and whether dates count from 1904.
+    """
+    workbook = 'xl/workbook.xml'
+    for kind, target in _relationships(package, '').values():
+        if kind == 'officeDocument':
+            workbook = target
+    relationships = _relationships(package, workbook)
+    root = etree.fromstring(package.read(workbook))
+    sheets, date1904 = [], False
+    for element in root.iter():
+        name = _local(element.tag)
+        if name == 'workbookPr':
+            date1904 = element.get('date1904') in ('1', 'true')
+        elif name == 'sheet':
+            kind, target = relationships.get(element.get(f'{{{_REL_NS}}}id'), (None, None))
+            # Chart sheets hold no cells
+            if kind == 'worksheet':
+                sheets.append((element.get('name'), target))
+    parts = {kind: target for kind, target in relationships.values()}
+    return {'sheets': sheets, 'shared_strings': parts.get('sharedStrings'), 'styles': parts.get('styles'),
+            'date1904': date1904}
+
+
+def _scan_sheet(file_content, path, sample_size):
+    """
+    Streams one worksheet part: its dimension and the header row plus up to
+    `sample_size` data rows, as {column index: (cell type, style, raw value)},
+    then stops. When the sheet declares no usable dimension the rest of the
+    part is scanned for the last row number without parsing it.
+    """
+    dimension, rows, last_row, complete = None, [], 0, True
+    with zipfile.ZipFile(io.BytesIO(file_content)) as package:
+        with package.open(path) as handle:
+            for _, element in etree.iterparse(handle, events=('end',), tag=('{*}dimension', '{*}row'),
+                                              huge_tree=True):
+                if _local(element.tag) == 'dimension':
+                    dimension = element.get('ref')
+                    continue
+                if len(rows) > sample_size:
+                    complete = False
+                    break
+                last_row = int(element.get('r') or last_row + 1)
+                cells = {}
+                for position, cell in enumerate(element.iterchildren('{*}c')):
+                    match = _CELL_REF_RE.match(cell.get('r') or '')
+                    index = _column_index(match.group(1)) if match else position
+                    kind = cell.get('t', 'n')
+                    if kind == 'inlineStr':
+                        inline = cell.find('{*}is')
+                        value = _text(inline) if inline is not None else None
+                    else:
+                        value = cell.findtext('{*}v')
+                    if value is not None:
+                        cells[index] = (kind, int(cell.get('s', 0)), value)
+                rows.append((last_row, cells))
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        if not complete and dimension_rows(dimension) is None:
+            last_row = _last_row(package, path, last_row)
+    return {'dimension': dimension, 'rows': rows, 'last_row': last_row}
+
+
+def _last_row(package, path, last_row):
+    """Highest row number in a worksheet part, found by a byte scan of the decompressed XML."""
+    tail = b''
+    with package.open(path) as handle:
+        while True:
+            chunk = handle.read(1 << 20)
+            if not chunk:
+                break
+            text = tail + chunk
+            numbers = _ROW_NUMBER_RE.findall(text)
+            if numbers:
+                last_row = max(last_row, int(numbers[-1]))
+            # A row tag split across two chunks is matched in the next pass
+            tail = text[-256:]
+    return last_row
+
+
+def dimension_rows(dimension):
+    """(first row, last row) of a sheet's declared dimension, or None when it is missing or a lone cell."""
+    match = _DIMENSION_RE.match(dimension or '')
+    if not match or not match.group(4):
+        return None
+    return int(match.group(2)), int(match.group(4))
+
+
+def _shared_strings(file_content, path, wanted):
+    """The shared strings at the `wanted` indexes, read in one pass that stops after the highest one."""
+    found = {}
+    if not wanted or not path:
+        return found
+    last, index = max(wanted), 0
+    with zipfile.ZipFile(io.BytesIO(file_content)) as package, package.open(path) as handle:
+        for _, element in etree.iterparse(handle, events=('end',), huge_tree=True):
+            if _local(element.tag) != 'si':
+                continue
+            if index in wanted:
+                found[index] = _text(element)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+            if index >= last:
+                break
+            index += 1
+    return found
+
+
+def _cell_value(cell, strings, date_styles, epoch):
+    """The cell as the string pandas would give it with dtype=str."""
+    kind, style, raw = cell
+    if kind == 's':
+        return strings.get(int(raw))
+    if kind == 'b':
+        return str(raw == '1')
+    if kind in ('str', 'inlineStr', 'e'):
+        return raw
+    try:
+        if style in date_styles:
+            return str(epoch + timedelta(days=float(raw)))
+        # openpyxl's reading: integers unless written with a point or exponent
+        return str(float(raw)) if '.' in raw or 'e' in raw.lower() else str(int(raw))
+    except (ValueError, OverflowError):
+        return raw
+
+
+def _header_names(values, width):
+    """pandas' header handling: 'Unnamed: i' for blanks and '.n' suffixes for repeated names."""
+    names, counts = [], {}
+    for index in range(width):
+        value = values.get(index)
+        name = f'Unnamed: {index}' if value in (None, '') else value
+        if name in counts:
+            counts[name] += 1
+            name = f'{name}.{counts[name]}'
+        counts.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _sheet_metadata(scan, strings, date_styles, epoch, sample_size):
+    def values(cells):
+        return {index: _cell_value(cell, strings, date_styles, epoch) for index, cell in cells.items()}
+
+    if not scan['rows']:
+        return {'column_names': [], 'row_count': 0, 'columns': [],
+                'type_inference': {'mode': 'sampled', 'rows_inspected': 0, 'row_count_source': 'scan'}}
+    # Like pandas, the header is row 1 even when blank, and blank rows and
+    # columns before the data are kept (as rows of nulls and 'Unnamed: i')
+    header_row, rows = 1, scan['rows']
+    header = rows.pop(0)[1] if rows[0][0] == header_row else {}
+    data = rows[:sample_size]
+    width = max([max(header) + 1 if header else 0] + [max(cells) + 1 for _, cells in data if cells])
+    names = _header_names(values(header), width)
+    frame = pd.DataFrame([[row.get(i) for i in range(width)] for row in (values(cells) for _, cells in data)],
+                         columns=names, dtype=object)
+    _, columns, inference = infer_column_types([frame], sample_size=sample_size, seed=DEFAULT_SEED)
+    declared = dimension_rows(scan['dimension'])
+    if declared and declared[1] >= scan['last_row']:
+        row_count, source = declared[1] - header_row, 'dimension'
+    else:
+        row_count, source = scan['last_row'] - header_row, 'scan'
+    inference['row_count_source'] = source
+    return {'column_names': names, 'row_count': row_count, 'columns': columns, 'type_inference': inference}
+
+
+def stream_xlsx_metadata(file_content, sample_size=DEFAULT_SAMPLE_SIZE, workers=None):
+    """
+    Extracts Excel metadata without loading any sheet: the header row and
+    the first `sample_size` rows of each worksheet are streamed from its
+    XML for column names and types, and the row count is taken from the
+    sheet's declared dimension (rows are only counted, never kept, when a
+    writer left it out). Sheets are read on `workers` threads. Memory stays
+    flat whatever the sheet sizes; nullability and lengths reflect the
+    sampled rows only.
+    """
+    workers = sheet_workers() if workers is None else workers
+    with zipfile.ZipFile(io.BytesIO(file_content)) as package:
+        workbook = read_workbook(package)
+        date_styles = _date_styles(package, workbook['styles'])
+    paths = [path for _, path in workbook['sheets']]
+    with ThreadPoolExecutor(max(1, min(workers, len(paths) or 1))) as pool:
+        scans = list(pool.map(lambda path: _scan_sheet(file_content, path, sample_size), paths))
+    wanted = {
+        int(raw) for scan in scans for _, cells in scan['rows'] for kind, _, raw in cells.values() if kind == 's'
+    }
+    strings = _shared_strings(file_content, workbook['shared_strings'], wanted)
+    epoch = _EPOCH_1904 if workbook['date1904'] else _EPOCH_1900
+    return {
+        'file_type': 'Excel',
+        'sheets': {
+            name: _sheet_metadata(scan, strings, date_styles, epoch, sample_size)
+            for (name, _), scan in zip(workbook['sheets'], scans)
+        },
+    }
+
+
+def load_excel_metadata(file_content, exact_types=False, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Loads every sheet into a DataFrame: exact row counts and types over every row, at full memory cost."""
+    xls = pd.ExcelFile(io.BytesIO(file_content))
+    metadata = {"file_type": "Excel", "sheets": {}}
+    for sheet_name in xls.sheet_names:
+        df = pd.read_excel(xls, sheet_name, dtype=str)
+        row_count, columns, inference = infer_column_types(
+            [df], exact=exact_types, sample_size=sample_size, seed=DEFAULT_SEED
+        )
+        metadata['sheets'][sheet_name] = {
+            "column_names": df.columns.tolist(),
+            "row_count": row_count,
+            "columns": columns,
+            "type_inference": inference
+        }
+    return metadata
+
+
+def parse_excel_metadata(file_content, extension, exact_types=False, sample_size=DEFAULT_SAMPLE_SIZE,
+                         full_load=None):
+    """
+    Streams xlsx workbooks (stream_xlsx_metadata) unless `full_load`, the
+    EXCEL_FULL_LOAD setting or exact_types asks for every sheet to be
+    loaded for deep profiling. Legacy .xls files, and xlsx files that are
+    not a readable package, are always loaded.
+    """
+    full_load = full_load_default() if full_load is None else full_load
+    if extension == 'xlsx' and not full_load and not exact_types:
+        try:
+            return stream_xlsx_metadata(file_content, sample_size=sample_size)
+        except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError):
+            pass
+    return load_excel_metadata(file_content, exact_types=exact_types, sample_size=sample_size)
@@ -0,0 +1,277 @@
+# metadata/exporting.py
+import io
+import json
+import os
+from django.core.serializers.json import DjangoJSONEncoder
+from .blobs import load_blob
+from .models import CatalogExport, DataSource, Schema, Table, Column, DataLineage, Glossary
+
+# Rows fetched per cursor round trip and rows per NDJSON block / Parquet row group
+DEFAULT_CHUNK_SIZE = 5000
+EXPORT_FORMATS = ['ndjson', 'parquet']
+
+
+class ExportEntity:
+    """
+    Describes how one catalog entity is flattened for export.
+    `fields` is a list of (output_name, lookup) pairs; lookups may follow
+    foreign keys, which are joined in SQL rather than fetched per row.
+    `extra` lookups are fetched but not exported; `expand(record, *extra)`
+    may use them to complete a record.
+    """
+
+    def __init__(self, model, fields, timestamp_field, extra=(), expand=None):
+        self.model = model
+        self.fields = fields
+        self.timestamp_field = timestamp_field
+        self.extra = list(extra)
+        self.expand = expand
+
+    @property
+    def names(self):
+        return [name for name, _ in self.fields]
+
+    def queryset(self, since=None):
+        """Returns a values_list queryset in `fields` order, followed by `extra`."""
+        queryset = self.model._default_manager.all()
+        if since is not None:
+            queryset = queryset.filter(**{f'{self.timestamp_field}__gt': since})
+        return queryset.order_by('pk').values_list(*[lookup for _, lookup in self.fields], *self.extra)
+
+    def resolve_field(self, lookup):
+        """Returns the model field a lookup path ends on."""
+        model, field = self.model, None
+        for part in lookup.split('__'):
+            field = model._meta.get_field(part)
+            if field.is_relation:
+                model = field.related_model
+        if field.is_relation:
+            field = field.target_field
+        return field
+
+
+def _full_source_metadata(record, digest):
+    # Offloaded parser output is exported in full, not as the in-row summary
+    if digest:
+        record['processed_metadata'] = load_blob(digest)
+    return record
+
+
+EXPORT_ENTITIES = {
+    'sources': ExportEntity(DataSource, [
+        ('uuid', 'uuid'), ('name', 'name'), ('description', 'description'),
+        ('uploaded_file', 'uploaded_file'), ('status', 'status'),
+        ('upload_date', 'upload_date'), ('processed_metadata', 'processed_metadata'),
+        ('updated_at', 'updated_at'),
+    ], timestamp_field='updated_at', extra=['metadata_digest'], expand=_full_source_metadata),
+    'schemas': ExportEntity(Schema, [
+        ('source_uuid', 'data_source__uuid'), ('name', 'name'), ('description', 'description'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ], timestamp_field='updated_at'),
+    'tables': ExportEntity(Table, [
+        ('source_uuid', 'schema__data_source__uuid'), ('schema', 'schema__name'),
+        ('name', 'name'), ('description', 'description'), ('table_type', 'table_type'),
+        ('row_count', 'row_count'), ('size_bytes', 'size_bytes'), ('owner', 'owner__username'),
+        ('tags', 'tags'), ('view_definition', 'view_definition'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ], timestamp_field='updated_at'),
+    'columns': ExportEntity(Column, [
+        ('source_uuid', 'table__schema__data_source__uuid'), ('schema', 'table__schema__name'),
+        ('table', 'table__name'), ('name', 'name'), ('data_type', 'data_type'),
+        ('description', 'description'), ('is_primary_key', 'is_primary_key'),
+        ('is_foreign_key', 'is_foreign_key'), ('is_nullable', 'is_nullable'),
+        ('default_value', 'default_value'), ('max_length', 'max_length'),
+        ('precision', 'precision'), ('scale', 'scale'), ('ordinal_position', 'ordinal_position'),
+        ('tags', 'tags'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ], timestamp_field='updated_at'),
+    'lineage': ExportEntity(DataLineage, [
+        ('source_source_uuid', 'source_table__schema__data_source__uuid'),
+        ('source_schema', 'source_table__schema__name'), ('source_table', 'source_table__name'),
+        ('target_source_uuid', 'target_table__schema__data_source__uuid'),
+        ('target_schema', 'target_table__schema__name'), ('target_table', 'target_table__name'),
+        ('lineage_type', 'lineage_type'), ('description', 'description'),
+        ('transformation_logic', 'transformation_logic'),
+        ('created_by', 'created_by__username'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ], timestamp_field='updated_at'),
+    'glossary': ExportEntity(Glossary, [
+        ('term', 'term'), ('definition', 'definition'), ('category', 'category'),
+        ('owner', 'owner__username'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ], timestamp_field='updated_at'),
+    # Symmetric related_terms pairs; exported with the term they start from
+    'glossary_relations': ExportEntity(Glossary.related_terms.through, [
+        ('term', 'from_glossary__term'), ('related_term', 'to_glossary__term'),
+    ], timestamp_field='from_glossary__updated_at'),
+}
+
+
+def iter_records(entity, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields flat dicts for one entity through a server-side cursor."""
+    spec = EXPORT_ENTITIES[entity]
+    names = spec.names
+    for row in spec.queryset(since).iterator(chunk_size=chunk_size):
+        record = dict(zip(names, row))
+        if spec.expand is not None:
+            record = spec.expand(record, *row[len(names):])
+        yield record
+
+
+def iter_ndjson(entities, since=None, chunk_size=DEFAULT_CHUNK_SIZE, tag_entity=False):
+    """Yields NDJSON text blocks of at most `chunk_size` lines."""
+    for entity in entities:
+        lines = []
+        for record in iter_records(entity, since, chunk_size):
+            if tag_entity:
+                record = {'_entity': entity, **record}
+            lines.append(json.dumps(record, cls=DjangoJSONEncoder))
+            if len(lines) >= chunk_size:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+
+def _arrow_schema(entity):
+    import pyarrow as pa
+
+    types = {
+        'BooleanField': pa.bool_(),
+        'IntegerField': pa.int64(),
+        'BigIntegerField': pa.int64(),
+        'BigAutoField': pa.int64(),
+        'AutoField': pa.int64(),
+        'DateTimeField': pa.timestamp('us', tz='UTC'),
+    }
+    spec = EXPORT_ENTITIES[entity]
+    return pa.schema([
+        (name, types.get(spec.resolve_field(lookup).get_internal_type(), pa.string()))
+        for name, lookup in spec.fields
+    ])
+
+
+def _to_arrow_batch(schema, records):
+    import pyarrow as pa
+
+    columns = {}
+    for field in schema:
+        values = [record[field.name] for record in records]
+        if pa.types.is_string(field.type):
+            values = [
+                v if v is None or isinstance(v, str)
+                else json.dumps(v, cls=DjangoJSONEncoder) if isinstance(v, (dict, list))
+                else str(v)
+                for v in values
+            ]
+        columns[field.name] = pa.array(values, type=field.type)
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def _import_parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow).")
+    return pq
+
+
+def _parquet_batches(entity, schema, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields Arrow tables of at most `chunk_size` rows; each becomes one row group."""
+    batch = []
+    for record in iter_records(entity, since, chunk_size):
+        batch.append(record)
+        if len(batch) >= chunk_size:
+            yield _to_arrow_batch(schema, batch)
+            batch = []
+    if batch:
+        yield _to_arrow_batch(schema, batch)
+
+
+def write_parquet(entity, path, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Writes one entity to a Parquet file with bounded memory. Returns the row count."""
+    pq = _import_parquet()
+    schema = _arrow_schema(entity)
+    count = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for table in _parquet_batches(entity, schema, since, chunk_size):
+            writer.write_table(table)
+            count += table.num_rows
+    return count
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes are drained after each row group."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(entity, since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields a Parquet file for one entity in pieces, one row group at a time."""
+    pq = _import_parquet()
+    schema = _arrow_schema(entity)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        for table in _parquet_batches(entity, schema, since, chunk_size):
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_watermarks(entities):
+    """
+    {entity: timestamp} to export each entity incrementally from: the start
+    of its latest export that, together with the exports before it, covers
+    every change (a full export, or one whose `since` does not leave a gap).
+    None for an entity never exported in full.
+    """
+    watermarks = dict.fromkeys(entities)
+    for started_at, since, counts in CatalogExport.objects.order_by('started_at').values_list(
+        'started_at', 'since', 'row_counts'
+    ):
+        for entity in entities:
+            if entity in (counts or {}):
+                watermark = watermarks[entity]
+                if since is None or (watermark is not None and since <= watermark):
+                    watermarks[entity] = started_at
+    return watermarks
+
+
+def export_catalog(output_dir, entities, export_format='ndjson', since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Writes one file per entity into `output_dir`; `since` is one timestamp
+    or {entity: timestamp}. Returns {entity: row_count}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    for entity in entities:
+        path = os.path.join(output_dir, f'{entity}.{export_format}')
+        entity_since = since.get(entity) if isinstance(since, dict) else since
+        if export_format == 'parquet':
+            counts[entity] = write_parquet(entity, path, entity_since, chunk_size)
+        else:
+            count = 0
+            with open(path, 'w', encoding='utf-8') as handle:
+                for block in iter_ndjson([entity], entity_since, chunk_size):
+                    handle.write(block)
+                    count += block.count('\n')
+            counts[entity] = count
+    return counts
@@ -3,6 +3,7 @@ from django import forms
 from .models import DataSource, Schema, Table, Column, DataLineage, Glossary, DataQualityRule
 from django import forms
 from .models import DataSource
+from .widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 
 class DataSourceUploadForm(forms.ModelForm):
@@ -10,7 +11,11 @@ class DataSourceUploadForm(forms.ModelForm):
     # if you want to allow creating a DataSource without a file (e.g., manual entry)
     uploaded_file = forms.FileField(
         label='Upload Data Source File',
-        help_text='Supported: JSON, CSV, TXT, Excel, XML, RDF, MARC, METS, TEI, etc.'
+        help_text='Supported: JSON, CSV, TXT, Excel, XML, RDF, MARC, METS, TEI, etc., or a ZIP/TAR archive of them.'
+    )
+    split_archive = forms.BooleanField(
+        required=False, label='Create one data source per archive member',
+        help_text='Archives only; otherwise all members are kept in one data source.'
     )
     
     class Meta:
@@ -33,11 +38,15 @@ class DataSourceForm(forms.ModelForm):
         }
 
 
+# Foreign-key pickers render only the selected option and load the rest page by
+# page from the autocomplete view (metadata.widgets), whatever the catalog size
 class TableForm(forms.ModelForm):
     class Meta:
         model = Table
-        fields = ['name', 'schema', 'description', 'table_type', 'tags', 'owner']
+        fields = ['name', 'schema', 'description', 'table_type', 'tags', 'owner', 'view_definition']
         widgets = {
+            'schema': AutocompleteSelect('schemas'),
+            'owner': AutocompleteSelect('users'),
             'description': forms.Textarea(attrs={'rows': 3}),
         }
 
@@ -48,6 +57,7 @@ class ColumnForm(forms.ModelForm):
         fields = ['name', 'table', 'data_type', 'description', 'is_primary_key', 
                   'is_foreign_key', 'is_nullable', 'default_value', 'tags']
         widgets = {
+            'table': AutocompleteSelect('tables'),
             'description': forms.Textarea(attrs={'rows': 2}),
         }
 
@@ -58,6 +68,8 @@ class DataLineageForm(forms.ModelForm):
         fields = ['source_table', 'target_table', 'lineage_type', 'description', 
                   'transformation_logic']
         widgets = {
+            'source_table': AutocompleteSelect('tables'),
+            'target_table': AutocompleteSelect('tables'),
             'description': forms.Textarea(attrs={'rows': 2}),
             'transformation_logic': forms.Textarea(attrs={'rows': 4}),
         }
@@ -68,6 +80,8 @@ class GlossaryForm(forms.ModelForm):
         model = Glossary
         fields = ['term', 'definition', 'category', 'related_terms', 'owner']
         widgets = {
+            'related_terms': AutocompleteSelectMultiple('glossary'),
+            'owner': AutocompleteSelect('users'),
             'definition': forms.Textarea(attrs={'rows': 4}),
         }
 
@@ -77,5 +91,7 @@ class DataQualityRuleForm(forms.ModelForm):
         model = DataQualityRule
         fields = ['name', 'table', 'column', 'rule_type', 'rule_definition', 'is_active']
         widgets = {
+            'table': AutocompleteSelect('tables'),
+            'column': AutocompleteSelect('columns', forward='table'),
             'rule_definition': forms.Textarea(attrs={'rows': 4}),
         }
\ No newline at end of file
@@ -0,0 +1,347 @@
+# metadata/history.py
+import os
+from collections import Counter
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .blobs import encode_metadata, load_blob, store_blob
+from .caching import invalidate_instances
+from .models import Column, DataSource, Schema, SchemaChange, SchemaVersion, Table
+
+# Column attributes compared between versions (besides the name)
+COLUMN_FIELDS = ('data_type', 'is_nullable', 'max_length', 'precision', 'scale', 'ordinal_position', 'is_primary_key')
+_COLUMN_DEFAULTS = {
+    'data_type': 'VARCHAR', 'is_nullable': True, 'max_length': None, 'precision': None, 'scale': None,
+    'ordinal_position': None, 'is_primary_key': False,
+}
+DEFAULT_SCHEMA = 'default'
+# Share of column names a removed and an added table need in common to count as a rename
+RENAME_SIMILARITY = 0.8
+DEFAULT_BATCH_SIZE = 2000
+MAX_NAME_LENGTH = 200
+
+
+def snapshot_interval():
+    return getattr(settings, 'SCHEMA_SNAPSHOT_INTERVAL', 20)
+
+
+def _column(definition, position):
+    column = {field: definition.get(field, _COLUMN_DEFAULTS[field]) for field in COLUMN_FIELDS}
+    if column['ordinal_position'] is None:
+        column['ordinal_position'] = position
+    return column
+
+
+def structure_from_metadata(metadata, table_name, schema_name=DEFAULT_SCHEMA):
+    """
+    Catalog structure {schema: {table: {column: attributes}}} described by
+    parser output: a CSV becomes one table, an Excel workbook one table per
+    sheet and an archive the tables of its members, named after their paths.
+    Formats without tabular structure give {}.
+    """
+    def columns(part):
+        definitions = part.get('columns') or [{'name': name} for name in part.get('column_names', [])]
+        return {str(d['name'])[:MAX_NAME_LENGTH]: _column(d, i) for i, d in enumerate(definitions)}
+
+    file_type = (metadata or {}).get('file_type')
+    if file_type == 'Tabular/CSV':
+        return {schema_name: {table_name[:MAX_NAME_LENGTH]: columns(metadata)}}
+    if file_type == 'Excel':
+        return {schema_name: {str(sheet)[:MAX_NAME_LENGTH]: columns(part)
+                              for sheet, part in metadata.get('sheets', {}).items()}}
+    if file_type == 'Archive':
+        tables = {}
+        for member, part in metadata.get('members', {}).items():
+            stem = os.path.splitext(member)[0]
+            member_tables = structure_from_metadata(part, stem, schema_name).get(schema_name, {})
+            if part.get('file_type') == 'Excel':
+                member_tables = {f'{stem}/{sheet}'[:MAX_NAME_LENGTH]: cols for sheet, cols in member_tables.items()}
+            tables.update(member_tables)
+        return {schema_name: tables} if tables else {}
+    return {}
+
+
+def current_structure(source, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    The source's catalog tree as a structure, plus the ids behind it:
+    {'schemas': {schema: id}, 'tables': {(schema, table): id},
+    'columns': {(schema, table): {column: id}}}. Three queries.
+    """
+    structure, ids = {}, {'schemas': {}, 'tables': {}, 'columns': {}}
+    for pk, name in Schema.objects.filter(data_source=source).values_list('id', 'name'):
+        structure[name] = {}
+        ids['schemas'][name] = pk
+    for pk, name, schema in Table.objects.filter(schema__data_source=source).values_list('id', 'name', 'schema__name'):
+        structure[schema][name] = {}
+        ids['tables'][(schema, name)] = pk
+        ids['columns'][(schema, name)] = {}
+    rows = Column.objects.filter(table__schema__data_source=source).values_list(
+        'id', 'name', 'table__name', 'table__schema__name', *COLUMN_FIELDS
+    )
+    for pk, name, table, schema, *values in rows.iterator(chunk_size=batch_size):
+        structure[schema][table][name] = dict(zip(COLUMN_FIELDS, values))
+        ids['columns'][(schema, table)][name] = pk
+    return structure, ids
+
+
+def _overlap(first, second):
+    return len(first & second) / len(first | second) if first or second else 1.0
+
+
+def diff_structures(old, new):
+    """
+    Changes turning structure `old` into `new`, as dicts with change_type,
+    schema, table, column and details. Tables that lost and gained mostly
+    the same columns are renames, as are columns replaced by one of the same
+    type at the same position. Replaying the list in order with
+    apply_changes() reproduces `new`.
+    """
+    changes = []
+
+    def change(change_type, schema, table='', column='', details=None):
+        changes.append({'change_type': change_type, 'schema': schema, 'table': table,
+                        'column': column, 'details': details or {}})
+
+    for schema in sorted(old.keys() - new.keys()):
+        change('schema_removed', schema)
+    for schema in sorted(new):
+        if schema not in old:
+            change('schema_added', schema)
+        old_tables, new_tables = old.get(schema, {}), new[schema]
+        removed = old_tables.keys() - new_tables.keys()
+        added = new_tables.keys() - old_tables.keys()
+        renames = {}
+        for name in sorted(removed):
+            columns = set(old_tables[name])
+            scored = [(_overlap(columns, set(new_tables[other])), other)
+                      for other in sorted(added - set(renames.values()))]
+            if scored:
+                score, other = max(scored)
+                if score >= RENAME_SIMILARITY:
+                    renames[name] = other
+        for name in sorted(removed - renames.keys()):
+            change('table_removed', schema, name)
+        for old_name, new_name in sorted(renames.items()):
+            change('table_renamed', schema, new_name, details={'from': old_name})
+            _diff_columns(change, schema, new_name, old_tables[old_name], new_tables[new_name])
+        for name in sorted(added - set(renames.values())):
+            change('table_added', schema, name, details={'columns': new_tables[name]})
+        for name in sorted(old_tables.keys() & new_tables.keys()):
+            _diff_columns(change, schema, name, old_tables[name], new_tables[name])
+    return changes
+
+
+def _diff_columns(change, schema, table, old, new):
+    removed, added = old.keys() - new.keys(), new.keys() - old.keys()
+    by_shape = {}
+    for name in sorted(added):
+        by_shape.setdefault((new[name]['data_type'], new[name]['ordinal_position']), []).append(name)
+    renames = {}
+    for name in sorted(removed):
+        candidates = by_shape.get((old[name]['data_type'], old[name]['ordinal_position']))
+        if candidates:
+            renames[name] = candidates.pop(0)
+
+    for name in sorted(removed - renames.keys()):
+        change('column_removed', schema, table, name)
+    for old_name, new_name in sorted(renames.items()):
+        change('column_renamed', schema, table, new_name, {'from': old_name})
+        _diff_attributes(change, schema, table, new_name, old[old_name], new[new_name])
+    for name in sorted(added - set(renames.values())):
+        change('column_added', schema, table, name, new[name])
+    for name in sorted(old.keys() & new.keys()):
+        _diff_attributes(change, schema, table, name, old[name], new[name])
+
+
+def _diff_attributes(change, schema, table, column, old, new):
+    changed = {field: [old.get(field), new.get(field)] for field in COLUMN_FIELDS if old.get(field) != new.get(field)}
+    if changed:
+        change('column_changed', schema, table, column, changed)
+
+
+def apply_changes(structure, changes):
+    """Replays changes onto a structure dict in place and returns it."""
+    for c in changes:
+        schema, table, column, details = c['schema'], c['table'], c['column'], c['details']
+        kind = c['change_type']
+        if kind == 'schema_added':
+            structure.setdefault(schema, {})
+        elif kind == 'schema_removed':
+            structure.pop(schema, None)
+        elif kind == 'table_added':
+            structure[schema][table] = dict(details['columns'])
+        elif kind == 'table_removed':
+            structure[schema].pop(table, None)
+        elif kind == 'table_renamed':
+            structure[schema][table] = structure[schema].pop(details['from'])
+        elif kind == 'column_added':
+            structure[schema][table][column] = dict(details)
+        elif kind == 'column_removed':
+            structure[schema][table].pop(column, None)
+        elif kind == 'column_renamed':
+            structure[schema][table][column] = structure[schema][table].pop(details['from'])
+        elif kind == 'column_changed':
+            for field, (_, value) in details.items():
+                structure[schema][table][column][field] = value
+    return structure
+
+
+def _apply_to_catalog(source, changes, ids, batch_size):
+    """Writes changes to the catalog with bulk operations, setting each change's table_id."""
+    now = timezone.now()
+    by_type = {}
+    for c in changes:
+        by_type.setdefault(c['change_type'], []).append(c)
+
+    def table_instances(keys):
+        return [Table(pk=ids['tables'][key], schema_id=ids['schemas'][key[0]]) for key in keys if key in ids['tables']]
+
+    # Removed objects: invalidate the pages showing them while their ids still resolve
+    removed_schemas = [ids['schemas'][c['schema']] for c in by_type.get('schema_removed', [])]
+    removed_tables = [(c['schema'], c['table']) for c in by_type.get('table_removed', [])]
+    if removed_schemas:
+        invalidate_instances(Schema, [Schema(pk=pk, data_source_id=source.pk) for pk in removed_schemas])
+        Schema.objects.filter(pk__in=removed_schemas).delete()
+    if removed_tables:
+        invalidate_instances(Table, table_instances(removed_tables))
+        Table.objects.filter(pk__in=[ids['tables'].pop(key) for key in removed_tables]).delete()
+
+    new_schemas = [c['schema'] for c in by_type.get('schema_added', [])]
+    if new_schemas:
+        Schema.objects.bulk_create([Schema(data_source=source, name=name) for name in new_schemas])
+        ids['schemas'].update(Schema.objects.filter(data_source=source, name__in=new_schemas).values_list('name', 'id'))
+
+    renamed = []
+    for c in by_type.get('table_renamed', []):
+        old_key, new_key = (c['schema'], c['details']['from']), (c['schema'], c['table'])
+        ids['tables'][new_key] = ids['tables'].pop(old_key)
+        ids['columns'][new_key] = ids['columns'].pop(old_key)
+        renamed.append(Table(pk=ids['tables'][new_key], name=c['table'], updated_at=now))
+    Table.objects.bulk_update(renamed, ['name', 'updated_at'], batch_size=batch_size)
+
+    added_tables = by_type.get('table_added', [])
+    if added_tables:
+        Table.objects.bulk_create(
+            [Table(schema_id=ids['schemas'][c['schema']], name=c['table']) for c in added_tables], batch_size=batch_size
+        )
+        schema_ids = {ids['schemas'][c['schema']] for c in added_tables}
+        names = {schema_id: name for name, schema_id in ids['schemas'].items()}
+        for pk, name, schema_id in Table.objects.filter(
+            schema_id__in=schema_ids, name__in={c['table'] for c in added_tables}
+        ).values_list('id', 'name', 'schema_id'):
+            ids['tables'].setdefault((names[schema_id], name), pk)
+            ids['columns'].setdefault((names[schema_id], name), {})
+
+    new_columns = [
+        Column(table_id=ids['tables'][(c['schema'], c['table'])], name=name, **attributes)
+        for c in added_tables for name, attributes in c['details']['columns'].items()
+    ]
+    new_columns += [
+        Column(table_id=ids['tables'][(c['schema'], c['table'])], name=c['column'], **c['details'])
+        for c in by_type.get('column_added', [])
+    ]
+
+    removed_columns = [ids['columns'][(c['schema'], c['table'])][c['column']] for c in by_type.get('column_removed', [])]
+    for start in range(0, len(removed_columns), batch_size):
+        Column.objects.filter(pk__in=removed_columns[start:start + batch_size]).delete()
+
+    renamed_columns = []
+    for c in by_type.get('column_renamed', []):
+        columns = ids['columns'][(c['schema'], c['table'])]
+        columns[c['column']] = columns.pop(c['details']['from'])
+        renamed_columns.append(Column(pk=columns[c['column']], name=c['column'], updated_at=now))
+    Column.objects.bulk_update(renamed_columns, ['name', 'updated_at'], batch_size=batch_size)
+
+    # bulk_update writes the same fields for every row, so group columns by what changed
+    changed = {}
+    for c in by_type.get('column_changed', []):
+        fields = tuple(sorted(c['details']))
+        values = {field: new for field, (_, new) in c['details'].items()}
+        changed.setdefault(fields, []).append(
+            Column(pk=ids['columns'][(c['schema'], c['table'])][c['column']], updated_at=now, **values)
+        )
+    for fields, columns in changed.items():
+        Column.objects.bulk_update(columns, [*fields, 'updated_at'], batch_size=batch_size)
+
+    Column.objects.bulk_create(new_columns, batch_size=batch_size)
+
+    for c in changes:
+        c['table_id'] = ids['tables'].get((c['schema'], c['table'])) if c['table'] else None
+    touched = {(c['schema'], c['table']) for c in changes if c['table_id']}
+    invalidate_instances(Table, table_instances(touched))
+
+
+def ingest_structure(source, structure, batch_size=DEFAULT_BATCH_SIZE, keep=()):
+    """
+    Makes the source's Schema/Table/Column tree match `structure`, writing
+    only what changed, and records the changes as a new SchemaVersion (with
+    a full snapshot every snapshot_interval() versions). Tables an earlier
+    version added but `structure` does not list are removed; tables that
+    were never ingested (entered by hand, say) and the (schema, table) pairs
+    in `keep` stay as they are. An empty structure, from metadata without
+    tabular parts, changes nothing. Returns the version, or None when
+    nothing changed.
+    """
+    if not any(structure.values()):
+        return None
+    with transaction.atomic():
+        # Serializes concurrent re-ingestion of the same source
+        DataSource.objects.select_for_update().filter(pk=source.pk).values_list('pk').first()
+        old, ids = current_structure(source, batch_size)
+        # Tables some earlier version added; the rest came from the UI, the API or imports
+        ingested = set(SchemaChange.objects.filter(
+            version__data_source=source, change_type='table_added', table__isnull=False
+        ).values_list('table_id', flat=True))
+        keep = set(keep) | {key for key, pk in ids['tables'].items() if pk not in ingested}
+        if keep:
+            structure = {schema: dict(tables) for schema, tables in structure.items()}
+            for schema, table in keep:
+                if table in old.get(schema, {}):
+                    structure.setdefault(schema, {})[table] = old[schema][table]
+        changes = diff_structures(old, structure)
+        if not changes:
+            return None
+        _apply_to_catalog(source, changes, ids, batch_size)
+
+        number = (source.schema_versions.aggregate(Max('version'))['version__max'] or 0) + 1
+        digest = ''
+        if (number - 1) % snapshot_interval() == 0:
+            digest = store_blob(encode_metadata(structure))
+            # Replays start from a snapshot, so added tables need not repeat their columns here
+            for c in changes:
+                if c['change_type'] == 'table_added':
+                    c['details'] = {'column_count': len(c['details']['columns'])}
+        version = SchemaVersion.objects.create(
+            data_source=source, version=number, snapshot_digest=digest,
+            summary=dict(Counter(c['change_type'] for c in changes)),
+        )
+        SchemaChange.objects.bulk_create([
+            SchemaChange(version=version, table_id=c['table_id'], change_type=c['change_type'],
+                         schema_name=c['schema'], table_name=c['table'], column_name=c['column'],
+                         details=c['details'])
+            for c in changes
+        ], batch_size=batch_size)
+        return version
+
+
+def structure_at(source, version):
+    """The source's structure as of a version: the nearest snapshot with later diffs replayed."""
+    snapshot = source.schema_versions.filter(version__lte=version).exclude(snapshot_digest='').first()
+    if snapshot is None:
+        return {}
+    changes = SchemaChange.objects.filter(
+        version__data_source=source, version__version__gt=snapshot.version, version__version__lte=version
+    ).order_by('version__version', 'id').values('change_type', 'schema_name', 'table_name', 'column_name', 'details')
+    return apply_changes(load_blob(snapshot.snapshot_digest), (
+        {'change_type': c['change_type'], 'schema': c['schema_name'], 'table': c['table_name'],
+         'column': c['column_name'], 'details': c['details']}
+        for c in changes.iterator(chunk_size=DEFAULT_BATCH_SIZE)
+    ))
+
+
+def table_history(table, limit=50):
+    """Latest schema changes of a table, newest first, with their versions."""
+    # Version ids grow with version numbers, so this ordering is served by the (table, version) index
+    return SchemaChange.objects.filter(table=table).select_related('version').order_by('-version_id', '-id')[:limit]
@@ -0,0 +1,244 @@
+# metadata/importing.py
+import json
+import os
+from contextlib import contextmanager
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .caching import invalidate_instances
+from .exporting import EXPORT_ENTITIES
+from .indexing import index_metadata
+from .models import DataSource, Schema, Table, Column, DataLineage, Glossary
+
+# Records per transaction; bulk_create splits each chunk further into INSERT batches
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_BATCH_SIZE = 2000
+
+
+def _read_ndjson(path, chunk_size):
+    """Yields (entity, records) runs from an NDJSON file; untagged files take the entity from the file name."""
+    default_entity = os.path.splitext(os.path.basename(path))[0]
+    entity, chunk = None, []
+    with open(path, 'rb') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record_entity = record.pop('_entity', default_entity)
+            if chunk and (record_entity != entity or len(chunk) >= chunk_size):
+                yield entity, chunk
+                chunk = []
+            entity = record_entity
+            chunk.append(record)
+    if chunk:
+        yield entity, chunk
+
+
+def _read_parquet(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import requires pyarrow (pip install pyarrow).")
+    entity = os.path.splitext(os.path.basename(path))[0]
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield entity, batch.to_pylist()
+
+
+def read_dump(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields (entity, records) chunks from a dump written by export_catalog:
+    either a directory of <entity>.ndjson/.parquet files or one tagged NDJSON file.
+    Directories are read in dependency order (sources first, lineage last).
+    """
+    if os.path.isdir(path):
+        for entity in EXPORT_ENTITIES:
+            for extension, reader in (('ndjson', _read_ndjson), ('parquet', _read_parquet)):
+                file_path = os.path.join(path, f'{entity}.{extension}')
+                if os.path.exists(file_path):
+                    yield from reader(file_path, chunk_size)
+    elif path.endswith('.parquet'):
+        yield from _read_parquet(path, chunk_size)
+    else:
+        yield from _read_ndjson(path, chunk_size)
+
+
+@contextmanager
+def relaxed_sqlite_pragmas():
+    """Trades durability for load speed on SQLite; the previous settings are restored afterwards."""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+        cursor.execute('PRAGMA journal_mode = MEMORY')
+        cursor.execute('PRAGMA temp_store = MEMORY')
+        cursor.execute('PRAGMA cache_size = -262144')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+
+
+@contextmanager
+def preserved_timestamps(*models):
+    """Disables auto_now/auto_now_add so restored rows keep their exported timestamps."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class CatalogImporter:
+    """
+    Loads dump records with bulk_create, resolving foreign keys through
+    in-memory natural-key maps that are built once per entity instead of
+    querying per row. Existing rows (same natural key) are left untouched.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.created = {}
+        self.skipped = {}
+        self._maps = {}
+        self._now = timezone.now()
+
+    # Natural-key maps, loaded lazily and dropped when their entity receives new rows
+    def _map(self, name):
+        if name not in self._maps:
+            loaders = {
+                'users': lambda: dict(User.objects.values_list('username', 'id')),
+                'sources': lambda: {str(u): pk for u, pk in DataSource.objects.values_list('uuid', 'id')},
+                'schemas': lambda: {
+                    (str(u), n): pk for u, n, pk in
+                    Schema.objects.values_list('data_source__uuid', 'name', 'id').iterator()
+                },
+                'tables': lambda: {
+                    (str(u), s, n): pk for u, s, n, pk in
+                    Table.objects.values_list('schema__data_source__uuid', 'schema__name', 'name', 'id').iterator()
+                },
+                'glossary': lambda: dict(Glossary.objects.values_list('term', 'id')),
+            }
+            self._maps[name] = loaders[name]()
+        return self._maps[name]
+
+    def _fields(self, record, *names):
+        values = {name: record[name] for name in names if record.get(name) is not None}
+        for stamp in ('created_at', 'updated_at', 'upload_date'):
+            if stamp in names and stamp not in values:
+                values[stamp] = self._now
+        return values
+
+    def _build_sources(self, record):
+        metadata = record.get('processed_metadata') or {}
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        values = self._fields(record, 'uuid', 'name', 'description', 'uploaded_file', 'status', 'upload_date',
+                              'updated_at')
+        source = DataSource(**values)
+        source.set_processed_metadata(metadata)
+        return source
+
+    def _build_schemas(self, record):
+        source_id = self._map('sources').get(str(record['source_uuid']))
+        if source_id is None:
+            return None
+        return Schema(data_source_id=source_id,
+                      **self._fields(record, 'name', 'description', 'created_at', 'updated_at'))
+
+    def _build_tables(self, record):
+        schema_id = self._map('schemas').get((str(record['source_uuid']), record['schema']))
+        if schema_id is None:
+            return None
+        return Table(
+            schema_id=schema_id, owner_id=self._map('users').get(record.get('owner')),
+            **self._fields(record, 'name', 'description', 'table_type', 'row_count', 'size_bytes',
+                           'tags', 'view_definition', 'created_at', 'updated_at')
+        )
+
+    def _build_columns(self, record):
+        table_id = self._map('tables').get((str(record['source_uuid']), record['schema'], record['table']))
+        if table_id is None:
+            return None
+        return Column(
+            table_id=table_id,
+            **self._fields(record, 'name', 'data_type', 'description', 'is_primary_key', 'is_foreign_key',
+                           'is_nullable', 'default_value', 'max_length', 'precision', 'scale',
+                           'ordinal_position', 'tags', 'created_at', 'updated_at')
+        )
+
+    def _build_lineage(self, record):
+        tables = self._map('tables')
+        source_id = tables.get((str(record['source_source_uuid']), record['source_schema'], record['source_table']))
+        target_id = tables.get((str(record['target_source_uuid']), record['target_schema'], record['target_table']))
+        if source_id is None or target_id is None:
+            return None
+        return DataLineage(
+            source_table_id=source_id, target_table_id=target_id,
+            created_by_id=self._map('users').get(record.get('created_by')),
+            **self._fields(record, 'lineage_type', 'description', 'transformation_logic', 'created_at', 'updated_at')
+        )
+
+    def _build_glossary(self, record):
+        return Glossary(
+            owner_id=self._map('users').get(record.get('owner')),
+            **self._fields(record, 'term', 'definition', 'category', 'created_at', 'updated_at')
+        )
+
+    def _build_glossary_relations(self, record):
+        terms = self._map('glossary')
+        from_id, to_id = terms.get(record['term']), terms.get(record['related_term'])
+        if from_id is None or to_id is None:
+            return None
+        return Glossary.related_terms.through(from_glossary_id=from_id, to_glossary_id=to_id)
+
+    def load_chunk(self, entity, records):
+        """Builds and inserts one chunk inside its own transaction. Returns rows submitted."""
+        build = getattr(self, f'_build_{entity}', None)
+        if build is None:
+            raise ValueError(f"Unknown entity in dump: {entity}")
+        objects = []
+        for record in records:
+            obj = build(record)
+            if obj is None:
+                self.skipped[entity] = self.skipped.get(entity, 0) + 1
+            else:
+                objects.append(obj)
+        if objects:
+            model = type(objects[0])
+            with transaction.atomic():
+                model.objects.bulk_create(objects, batch_size=self.batch_size, ignore_conflicts=True)
+                invalidate_instances(model, objects)
+                if model is DataSource:
+                    self._index_sources(objects)
+            self._maps.pop(entity, None)
+        self.created[entity] = self.created.get(entity, 0) + len(objects)
+        return len(objects)
+
+    def _index_sources(self, sources):
+        # ignore_conflicts leaves pks unset, so ids are looked up by uuid; sources
+        # that already existed (and are already indexed) are left alone
+        metadata = {str(source.uuid): source.full_metadata for source in sources}
+        ids = DataSource.objects.filter(uuid__in=list(metadata), metadata_index__isnull=True).values_list('uuid', 'id')
+        index_metadata((pk, metadata[str(uuid)]) for uuid, pk in ids)
+
+    def run(self, chunks, progress=None):
+        # Restored rows keep their updated_at, which incremental exports and rescans use as a watermark
+        with preserved_timestamps(DataSource, Schema, Table, Column, DataLineage, Glossary):
+            for entity, records in chunks:
+                self.load_chunk(entity, records)
+                if progress:
+                    progress(entity, self.created.get(entity, 0))
+        return self.created
@@ -0,0 +1,137 @@
+# metadata/indexing.py
+import re
+from django.conf import settings
+from django.db import transaction
+
+from .models import DataSource, MetadataIndexEntry
+
+# Longest stored path/value; longer values are indexed by their prefix
+MAX_PATH_LENGTH = 500
+MAX_VALUE_LENGTH = 255
+# Deeper structure is indexed as the path where it was cut off
+MAX_DEPTH = 12
+
+# Column names are what sources are most often searched by; they are never capped
+UNCAPPED_PATH_SUFFIXES = ('column_names[]', 'columns[].name')
+# Path of the entries listing the paths whose values were capped for a source
+TRUNCATED_PATH = '_truncated'
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_value(value):
+    """Normalized text form of a scalar: case-folded, whitespace-collapsed, truncated."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = _WHITESPACE_RE.sub(' ', str(value)).strip().casefold()
+    return text[:MAX_VALUE_LENGTH]
+
+
+def flatten_metadata(metadata, max_values_per_path=None):
+    """
+    Returns the set of (path, key, value) entries for a metadata tree. Dict
+    keys are joined with '.', list items add '[]' (so every element of
+    `column_names` shares the path `column_names[]`). Every path gets an
+    existence entry with an empty value; scalars add one entry per distinct
+    normalized value. Column names are always indexed in full; other paths
+    keep their first `max_values_per_path` values in document order, and a
+    path cut off this way is recorded as a TRUNCATED_PATH entry whose value
+    is the path.
+    """
+    if max_values_per_path is None:
+        max_values_per_path = getattr(settings, 'METADATA_INDEX_MAX_VALUES_PER_PATH', 1000)
+    entries, value_counts = set(), {}
+    stack = [('', '', metadata, 0)]
+    while stack:
+        path, key, node, depth = stack.pop()
+        if path:
+            entries.add((path, key, ''))
+        # Children are pushed in reverse so they are visited in document order
+        if isinstance(node, dict) and depth < MAX_DEPTH:
+            for child_key, child in reversed(list(node.items())):
+                child_key = str(child_key)
+                child_path = f'{path}.{child_key}' if path else child_key
+                stack.append((child_path[:MAX_PATH_LENGTH], child_key[:MAX_PATH_LENGTH], child, depth + 1))
+        elif isinstance(node, list) and depth < MAX_DEPTH:
+            child_path = f'{path}[]'[:MAX_PATH_LENGTH]
+            for child in reversed(node):
+                stack.append((child_path, key, child, depth + 1))
+        elif path and not isinstance(node, (dict, list)):
+            value = normalize_value(node)
+            if value and (path, key, value) not in entries:
+                if path.endswith(UNCAPPED_PATH_SUFFIXES) or value_counts.get(path, 0) < max_values_per_path:
+                    value_counts[path] = value_counts.get(path, 0) + 1
+                    entries.add((path, key, value))
+                else:
+                    entries.add((TRUNCATED_PATH, TRUNCATED_PATH, path[:MAX_VALUE_LENGTH]))
+    return entries
+
+
+def index_metadata(sources, batch_size=2000):
+    """
+    (Re)builds index entries for an iterable of (data_source_id, metadata)
+    pairs, replacing whatever was indexed for those sources before.
+    Returns the number of entries written.
+    """
+    written = 0
+    with transaction.atomic():
+        for source_id, metadata in sources:
+            MetadataIndexEntry.objects.filter(data_source_id=source_id).delete()
+            entries = [
+                MetadataIndexEntry(data_source_id=source_id, path=path, key=key, value=value)
+                for path, key, value in flatten_metadata(metadata or {})
+            ]
+            MetadataIndexEntry.objects.bulk_create(entries, batch_size=batch_size)
+            written += len(entries)
+    return written
+
+
+def index_data_source(source):
+    """Indexes one saved source from the metadata it holds (loading an offloaded blob if needed)."""
+    return index_metadata([(source.pk, source.full_metadata)])
+
+
+def _prefix_range(field, prefix):
+    # A range rather than LIKE/startswith, so the B-tree index is used on every backend
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'}
+
+
+def matching_source_ids(path=None, key=None, value=None, path_prefix=None, value_prefix=None):
+    """
+    Data source ids with an index entry matching every given criterion:
+    exact `path` or `key` (last path segment), `path_prefix`, and an exact
+    (normalized) `value` or `value_prefix`. Without a value criterion this is
+    an existence lookup. Returns a values_list queryset usable as a subquery.
+    """
+    filters = {}
+    if path is not None:
+        filters['path'] = path
+    if key is not None:
+        filters['key'] = key
+    if path_prefix is not None:
+        filters.update(_prefix_range('path', path_prefix))
+    if value is not None:
+        filters['value'] = normalize_value(value)
+    elif value_prefix is not None:
+        filters.update(_prefix_range('value', normalize_value(value_prefix)))
+    else:
+        filters['value'] = ''
+    if len(filters) == 1 and 'value' in filters and not filters['value']:
+        raise ValueError("Give at least one of path, key, path_prefix, value or value_prefix")
+    return MetadataIndexEntry.objects.filter(**filters).values_list('data_source_id', flat=True).distinct()
+
+
+def search_sources(*criteria, queryset=None):
+    """
+    Data sources matching all criteria, each a dict of matching_source_ids()
+    keyword arguments, e.g. search_sources({'path': 'file_type', 'value': 'Tabular/CSV'},
+    {'path': 'column_names[]', 'value': 'sample_id'}).
+    """
+    queryset = DataSource.objects.all() if queryset is None else queryset
+    for condition in criteria:
+        queryset = queryset.filter(id__in=matching_source_ids(**condition))
+    return queryset
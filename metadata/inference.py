@@ -0,0 +1,216 @@
+# metadata/inference.py
+import math
+import random
+
+import pandas as pd
+
+# Number of rows kept in the reservoir for sampled type inference
+DEFAULT_SAMPLE_SIZE = 10000
+# Rows per chunk when streaming tabular files
+DEFAULT_CHUNK_SIZE = 50000
+# Fixed sampling seed, so parsing the same file twice infers the same types
+DEFAULT_SEED = 0
+
+# Largest number of integer digits that always fits a 32-bit INTEGER / 64-bit BIGINT
+INTEGER_MAX_DIGITS = 9
+BIGINT_MAX_DIGITS = 18
+# Widest DECIMAL most SQL engines accept
+DECIMAL_MAX_PRECISION = 38
+
+_BOOLEAN_RE = r'(?i)(true|false|yes|no|t|f|y|n)'
+_INTEGER_RE = r'[+-]?\d+'
+_DECIMAL_RE = r'[+-]?(\d+\.\d*|\.\d+)'
+_FLOAT_RE = r'(?i)[+-]?((\d+\.?\d*|\.\d+)e[+-]?\d+|inf|infinity|nan)'
+_DATE_RE = r'\d{4}-\d{2}-\d{2}'
+_TIMESTAMP_RE = r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?'
+
+
+class ReservoirSampler:
+    """
+    Keeps a uniform random sample of rows from a stream of DataFrame chunks.
+    Uses Algorithm L, so the cost per chunk depends on the number of rows
+    actually replaced rather than on the chunk length.
+    """
+
+    def __init__(self, size=DEFAULT_SAMPLE_SIZE, seed=None):
+        self.size = size
+        self.rows = []
+        self.columns = None
+        self.seen = 0
+        self._rng = random.Random(seed)
+        self._weight = 1.0
+        self._next_index = None
+
+    def _uniform(self):
+        # A draw from (0, 1): random() can return 0.0, whose log is undefined
+        value = 0.0
+        while value == 0.0:
+            value = self._rng.random()
+        return value
+
+    def _skip(self):
+        # Distance to the next row that enters the reservoir
+        self._weight *= math.exp(math.log(self._uniform()) / self.size)
+        return int(math.log(self._uniform()) / math.log(1 - self._weight)) + 1
+
+    def add_chunk(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        base, length = self.seen, len(chunk)
+        self.seen += length
+        if self.size <= 0 or length == 0:
+            return
+
+        # Fill the reservoir with the first rows of the stream
+        free = min(self.size - len(self.rows), length)
+        if free > 0:
+            self.rows.extend(chunk.iloc[:free].itertuples(index=False, name=None))
+            if len(self.rows) == self.size:
+                self._next_index = base + free - 1 + self._skip()
+
+        if self._next_index is None:
+            return
+        # Pick every replacement in this chunk first, then materialise those rows in one go
+        positions, slots = [], []
+        while self._next_index < base + length:
+            positions.append(self._next_index - base)
+            slots.append(self._rng.randrange(self.size))
+            self._next_index += self._skip()
+        if positions:
+            picked = chunk.iloc[positions].itertuples(index=False, name=None)
+            for slot, row in zip(slots, picked):
+                self.rows[slot] = row
+
+    def to_frame(self):
+        return pd.DataFrame(self.rows, columns=self.columns, dtype=object)
+
+
+class ColumnProfile:
+    """Accumulates type evidence, nullability and lengths for one column."""
+
+    def __init__(self, name, position):
+        self.name = name
+        self.position = position
+        self.row_count = 0
+        self.null_count = 0
+        self.max_length = None
+        self.observed = 0
+        self.all_boolean = True
+        self.all_integer = True
+        self.all_decimal = True
+        self.all_numeric = True
+        self.all_date = True
+        self.all_timestamp = True
+        self.integer_digits = 0
+        self.scale = 0
+
+    def observe_shape(self, series):
+        """Exact, vectorised counters that are cheap enough for every row."""
+        self.row_count += len(series)
+        self.null_count += int(series.isna().sum())
+        lengths = series.dropna().astype(str).str.len()
+        if len(lengths):
+            longest = int(lengths.max())
+            self.max_length = longest if self.max_length is None else max(self.max_length, longest)
+
+    def observe_types(self, series):
+        """Narrows the candidate SQL types using the given (sampled or full) values."""
+        values = series.dropna().astype(str).str.strip()
+        values = values[values != '']
+        if values.empty:
+            return
+        self.observed += len(values)
+
+        is_integer = values.str.fullmatch(_INTEGER_RE)
+        is_decimal = values.str.fullmatch(_DECIMAL_RE)
+        is_float = values.str.fullmatch(_FLOAT_RE)
+        is_date = values.str.fullmatch(_DATE_RE)
+
+        self.all_boolean &= bool(values.str.fullmatch(_BOOLEAN_RE).all())
+        self.all_integer &= bool(is_integer.all())
+        self.all_decimal &= bool((is_integer | is_decimal).all())
+        self.all_numeric &= bool((is_integer | is_decimal | is_float).all())
+        self.all_date &= bool(is_date.all())
+        self.all_timestamp &= bool((is_date | values.str.fullmatch(_TIMESTAMP_RE)).all())
+
+        if self.all_decimal:
+            parts = values.str.extract(r'^[+-]?(\d*)\.?(\d*)$')
+            self.integer_digits = max(self.integer_digits, int(parts[0].str.lstrip('0').str.len().max()))
+            self.scale = max(self.scale, int(parts[1].str.len().max()))
+
+    def to_column_definition(self):
+        """Returns a dict whose keys mirror the fields of the Column model."""
+        definition = {
+            'name': str(self.name),
+            'ordinal_position': self.position,
+            'data_type': 'VARCHAR',
+            'is_nullable': self.null_count > 0 or self.row_count == 0,
+            'max_length': None,
+            'precision': None,
+            'scale': None,
+        }
+        precision = max(self.integer_digits + self.scale, 1)
+
+        if not self.observed:
+            definition['max_length'] = self.max_length
+        elif self.all_boolean:
+            definition['data_type'] = 'BOOLEAN'
+        elif self.all_integer and self.integer_digits <= INTEGER_MAX_DIGITS:
+            definition['data_type'] = 'INTEGER'
+        elif self.all_integer and self.integer_digits <= BIGINT_MAX_DIGITS:
+            definition['data_type'] = 'BIGINT'
+        elif self.all_decimal and precision <= DECIMAL_MAX_PRECISION:
+            definition['data_type'] = f'DECIMAL({precision},{self.scale})'
+            definition['precision'] = precision
+            definition['scale'] = self.scale
+        elif self.all_numeric:
+            definition['data_type'] = 'DOUBLE'
+        elif self.all_date:
+            definition['data_type'] = 'DATE'
+        elif self.all_timestamp:
+            definition['data_type'] = 'TIMESTAMP'
+        else:
+            definition['max_length'] = self.max_length
+            if self.max_length:
+                definition['data_type'] = f'VARCHAR({self.max_length})'
+        return definition
+
+
+def infer_column_types(chunks, exact=False, sample_size=DEFAULT_SAMPLE_SIZE, seed=DEFAULT_SEED):
+    """
+    Infers SQL-style column definitions from an iterable of DataFrame chunks.
+
+    Nullability and string lengths are always counted over every row. Types,
+    precision and scale are inferred from a reservoir sample of at most
+    `sample_size` rows, or from every row when `exact` is True. The sample
+    is drawn with a fixed `seed`, so the same input always gives the same result.
+    Returns (row_count, column_definitions, inference_summary).
+    """
+    profiles = None
+    sampler = None if exact else ReservoirSampler(sample_size, seed=seed)
+    row_count = 0
+
+    for chunk in chunks:
+        if profiles is None:
+            profiles = [ColumnProfile(name, i) for i, name in enumerate(chunk.columns)]
+        row_count += len(chunk)
+        for profile, (_, series) in zip(profiles, chunk.items()):
+            profile.observe_shape(series)
+            if exact:
+                profile.observe_types(series)
+        if sampler is not None:
+            sampler.add_chunk(chunk)
+
+    if profiles is None:
+        return 0, [], {'mode': 'exact' if exact else 'sampled', 'rows_inspected': 0}
+
+    if sampler is not None and sampler.rows:
+        sample = sampler.to_frame()
+        for profile, (_, series) in zip(profiles, sample.items()):
+            profile.observe_types(series)
+
+    summary = {
+        'mode': 'exact' if exact else 'sampled',
+        'rows_inspected': row_count if exact else len(sampler.rows),
+    }
+    return row_count, [p.to_column_definition() for p in profiles], summary
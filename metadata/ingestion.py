@@ -0,0 +1,48 @@
+# metadata/ingestion.py
+import os
+
+from .archives import split_archive
+from .history import ingest_structure, structure_from_metadata
+from .indexing import index_data_source, index_metadata
+from .utils import parse_file_metadata
+
+
+def _table_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def ingest_upload(data_source, split_members=False):
+    """
+    Processes a saved DataSource's uploaded file, for the upload view and
+    the API alike: parses it, stores the (possibly offloaded) metadata,
+    indexes its key paths and records its tables as a schema version.
+    With `split_members`, an archive becomes one child source per member
+    (metadata.archives). Parser crashes mark the source FAILED.
+    """
+    try:
+        processed_data = parse_file_metadata(data_source.uploaded_file)
+    except Exception as e:
+        data_source.status = 'FAILED'
+        data_source.set_processed_metadata({'system_error': str(e)})
+        data_source.save()
+        index_data_source(data_source)
+        return data_source
+
+    data_source.status = 'FAILED' if 'error' in processed_data else 'SUCCESS'
+    data_source.set_processed_metadata(processed_data)
+    data_source.save()
+    if data_source.status == 'SUCCESS' and split_members and processed_data.get('file_type') == 'Archive':
+        # One source per member; the archive keeps only a manifest
+        members = split_archive(data_source, processed_data)
+        index_metadata([(data_source.pk, data_source.full_metadata)]
+                       + [(member.pk, member.full_metadata) for _, member in members])
+        for name, member in members:
+            if member.status == 'SUCCESS':
+                ingest_structure(member, structure_from_metadata(member.full_metadata, _table_name(name)))
+        return data_source
+
+    index_data_source(data_source)
+    if data_source.status == 'SUCCESS':
+        table_name = _table_name(data_source.uploaded_file.name)
+        ingest_structure(data_source, structure_from_metadata(processed_data, table_name))
+    return data_source
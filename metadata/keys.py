@@ -0,0 +1,303 @@
+# metadata/keys.py
+import re
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from .caching import invalidate_instances
+from .indexing import normalize_value
+from .lineage import column_edge_keys, lineage_edge_ids
+from .models import Column, ColumnLineage, ColumnValueSketch, DataLineage
+from .tagging import normalize_text
+
+# Hashes kept per column sketch; containment estimates come from these
+SKETCH_SIZE = 256
+DEFAULT_MIN_CONTAINMENT = 0.9
+# Smallest hashes per sketch used for blocking, and how many two columns must
+# share before they are compared on values alone
+BLOCKING_HASHES = 32
+MIN_SHARED_HASHES = 2
+# Hashes present in more key columns than this ('1', 'true', ...) are not used for blocking
+MAX_POSTING_SIZE = 50
+DEFAULT_BATCH_SIZE = 2000
+
+_TYPE_RE = re.compile(r'[a-z]+')
+_TYPE_FAMILIES = {
+    'int': 'integer', 'integer': 'integer', 'bigint': 'integer', 'smallint': 'integer', 'tinyint': 'integer',
+    'serial': 'integer', 'bigserial': 'integer', 'number': 'integer', 'numeric': 'integer', 'decimal': 'integer',
+    'char': 'text', 'varchar': 'text', 'nvarchar': 'text', 'text': 'text', 'string': 'text', 'character': 'text',
+    'uuid': 'uuid', 'uniqueidentifier': 'uuid',
+}
+_ID_SUFFIXES = ('id', 'key', 'code', 'no')
+
+KeyCandidate = namedtuple('KeyCandidate', 'column_id referenced_column_id score evidence')
+
+
+def value_sketch(values):
+    """(sorted uint64 bottom-k hashes, non-null values seen, distinct values seen) of a value sample."""
+    texts = [normalize_value(value) for value in values if value is not None and value != '']
+    # pandas' hashing is vectorized and stable across runs (fixed hash key)
+    hashes = np.unique(pd.util.hash_array(np.array(texts, dtype=object))) if texts else np.array([], dtype=np.uint64)
+    return hashes[:SKETCH_SIZE], len(texts), len(hashes)
+
+
+def record_value_samples(samples, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stores value sketches from {column id: iterable of sampled values},
+    replacing earlier ones. Crawlers and importers call this with whatever
+    sample they read; the values themselves are not kept.
+    """
+    sketches = []
+    for column_id, values in samples.items():
+        hashes, sampled, distinct = value_sketch(values)
+        sketches.append(ColumnValueSketch(column_id=column_id, hashes=hashes.tobytes(),
+                                          sampled_values=sampled, distinct_values=distinct))
+    with transaction.atomic():
+        ColumnValueSketch.objects.filter(column_id__in=list(samples)).delete()
+        ColumnValueSketch.objects.bulk_create(sketches, batch_size=batch_size)
+    return len(sketches)
+
+
+def containment(child, parent, parent_distinct):
+    """
+    Estimated fraction of the child's distinct values present in the parent,
+    from bottom-k sketches: only child hashes below the parent's k-th
+    smallest can be checked. None when no child hash falls in that range.
+    """
+    if len(parent) == 0:
+        return None
+    cutoff = parent[-1] if parent_distinct > len(parent) else np.iinfo(np.uint64).max
+    checked = child[child <= cutoff]
+    if len(checked) == 0:
+        return None
+    return float(np.isin(checked, parent, assume_unique=True).mean())
+
+
+def type_family(data_type):
+    match = _TYPE_RE.match((data_type or '').lower())
+    return _TYPE_FAMILIES.get(match.group(), match.group()) if match else ''
+
+
+def _singular(word):
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(('ses', 'xes', 'ches', 'shes')):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss') and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _words(name):
+    words = normalize_text(name).split()
+    if len(words) == 1 and len(words[0]) > 4 and words[0].endswith('id'):
+        # customerid -> customer id
+        words = [words[0][:-2], 'id']
+    return words
+
+
+def referenced_keys(table_name, column_name):
+    """Blocking keys under which a table's key column can be referenced."""
+    table_words = _words(table_name)
+    column_words = _words(column_name)
+    if not table_words or not column_words:
+        return set()
+    forms = {' '.join(table_words), ' '.join(table_words[:-1] + [_singular(table_words[-1])]),
+             _singular(table_words[-1])}
+    if column_words == ['id']:
+        return {f'{form} id' for form in forms}
+    keys = {' '.join(column_words)}
+    if column_words[-1] in _ID_SUFFIXES:
+        keys.update(f'{form} {column_words[-1]}' for form in forms)
+    return keys
+
+
+def referencing_keys(column_name):
+    """Blocking keys of a possible foreign key column: its whole name and its last two words."""
+    words = _words(column_name)
+    if words and words[0] == 'fk':
+        words = words[1:]
+    if len(words) < 2 or words[-1] not in _ID_SUFFIXES:
+        return set()
+    return {' '.join(words), ' '.join(words[-2:])}
+
+
+def _load_columns(batch_size):
+    columns = {}
+    rows = Column.objects.values_list(
+        'id', 'name', 'data_type', 'is_primary_key', 'table_id', 'table__name',
+        'table__schema_id', 'table__schema__data_source_id',
+    )
+    for pk, name, data_type, is_pk, table_id, table, schema_id, source_id in rows.iterator(chunk_size=batch_size):
+        columns[pk] = (name, type_family(data_type), is_pk, table_id, table, schema_id, source_id)
+    sketches = {}
+    for pk, hashes, sampled, distinct in ColumnValueSketch.objects.values_list(
+        'column_id', 'hashes', 'sampled_values', 'distinct_values'
+    ).iterator(chunk_size=batch_size):
+        sketches[pk] = (np.frombuffer(bytes(hashes), dtype=np.uint64), sampled, distinct)
+    return columns, sketches
+
+
+def _is_key(column, sketch):
+    name, _, is_pk, _, table, _, _ = column
+    if is_pk:
+        return True
+    if sketch is not None and sketch[2] >= 10 and sketch[1] == sketch[2]:
+        return True  # every sampled value distinct
+    words = _words(name)
+    return words == ['id'] or words == _words(table)[-1:] + ['id']
+
+
+def _flatten(sketches):
+    ids = np.repeat(np.fromiter(sketches, dtype=np.int64, count=len(sketches)),
+                    [len(hashes) for hashes in sketches.values()])
+    hashes = np.concatenate(list(sketches.values())) if sketches else np.array([], dtype=np.uint64)
+    return hashes, ids
+
+
+def _value_blocking(parents, children):
+    """
+    {child id: {parent ids}} for children sharing at least MIN_SHARED_HASHES
+    blocking hashes with a key column. A sort-merge join over all hashes at once
+    rather than per-column lookups; hashes shared by more than
+    MAX_POSTING_SIZE key columns are dropped as uninformative.
+    """
+    parent_hashes, parent_ids = _flatten(parents)
+    child_hashes, child_ids = _flatten(children)
+    if not len(parent_hashes) or not len(child_hashes):
+        return {}
+    order = np.argsort(parent_hashes, kind='stable')
+    parent_hashes = parent_hashes[order]
+    parent_keys, parent_index = np.unique(parent_ids[order], return_inverse=True)
+    unique, starts, counts = np.unique(parent_hashes, return_index=True, return_counts=True)
+    keep = counts <= MAX_POSTING_SIZE
+    unique, starts, counts = unique[keep], starts[keep], counts[keep]
+
+    # Sorted needles keep the binary searches cache-friendly
+    order = np.argsort(child_hashes)
+    child_hashes, child_ids = child_hashes[order], child_ids[order]
+    positions = np.minimum(np.searchsorted(unique, child_hashes), len(unique) - 1)
+    hit = unique[positions] == child_hashes
+    positions, child_ids = positions[hit], child_ids[hit]
+    # Expand each hit into one (child, parent) row per key column holding that hash
+    repeats = counts[positions]
+    offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    pair_parents = parent_index[np.repeat(starts[positions], repeats) + offsets]
+    # One int64 per (child, parent) pair, so counting shared hashes is a 1-D unique
+    pairs, shared = np.unique(np.repeat(child_ids, repeats) * len(parent_keys) + pair_parents, return_counts=True)
+    pairs = pairs[shared >= MIN_SHARED_HASHES]
+
+    matches = {}
+    for child, parent in zip((pairs // len(parent_keys)).tolist(), parent_keys[pairs % len(parent_keys)].tolist()):
+        if child != parent:
+            matches.setdefault(child, set()).add(parent)
+    return matches
+
+
+def infer_foreign_keys(min_containment=DEFAULT_MIN_CONTAINMENT, require_values=False,
+                       batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Proposes foreign keys as KeyCandidate(column, referenced column, score,
+    evidence). Candidate pairs come from two hash blockings rather than an
+    all-pairs scan: referencing names (`customer_id`, `CustomerID`) looked up
+    under the names of key columns (`customers.id`, `customer.customer_id`),
+    and sampled-value sketches sharing hashes with a key column's sketch.
+    Pairs with sketches on both sides must reach `min_containment`; pairs
+    without are accepted on naming alone unless `require_values`. Each column
+    gets at most one proposal, its best-scoring one.
+    """
+    columns, sketches = _load_columns(batch_size)
+    keys = {pk for pk, column in columns.items() if _is_key(column, sketches.get(pk))}
+
+    by_name = {}
+    for pk in keys:
+        name, _, _, _, table, _, _ = columns[pk]
+        for key in referenced_keys(table, name):
+            by_name.setdefault(key, []).append(pk)
+    value_matches = _value_blocking(
+        {pk: sketches[pk][0][:BLOCKING_HASHES] for pk in keys if pk in sketches},
+        {pk: sketch[0][:BLOCKING_HASHES] for pk, sketch in sketches.items() if not columns[pk][2]},
+    )
+
+    best = {}
+    for pk, column in columns.items():
+        name, family, _, table_id, _, schema_id, source_id = column
+        name_matches = {}
+        whole_name = ' '.join(_words(name))
+        for key in referencing_keys(name):
+            for parent in by_name.get(key, ()):
+                # Whole-name matches beat suffix matches
+                name_matches[parent] = max(name_matches.get(parent, 0.0), 1.0 if key == whole_name else 0.8)
+
+        for parent in set(name_matches) | value_matches.get(pk, set()):
+            parent_column = columns[parent]
+            if parent_column[3] == table_id or (family and parent_column[1] and family != parent_column[1]):
+                continue
+            evidence, score = [], 0.0
+            if parent in name_matches:
+                evidence.append('name')
+                score = name_matches[parent]
+            if pk in sketches and parent in sketches:
+                contained = containment(sketches[pk][0], sketches[parent][0], sketches[parent][2])
+                if contained is None or contained < min_containment:
+                    continue
+                evidence.append('values')
+                score = (score + contained) / 2 if score else contained * 0.9
+            elif require_values:
+                continue
+            # Ties go to the referenced table nearest to the referencing one
+            rank = (score, parent_column[5] == schema_id, parent_column[6] == source_id)
+            if pk not in best or rank > best[pk][0]:
+                best[pk] = (rank, KeyCandidate(pk, parent, round(score, 3), '+'.join(evidence)))
+
+    return [candidate for _, candidate in sorted(best.values(), key=lambda item: item[1].column_id)]
+
+
+def create_foreign_keys(candidates, created_by=None, batch_size=DEFAULT_BATCH_SIZE, label="Inferred foreign key"):
+    """
+    Records candidates as 'foreign_key' lineage from the referenced table to
+    the referencing one, with a column-level edge per key, and flags the
+    referencing columns is_foreign_key. `label` starts each new edge's
+    description. Returns (table edges, column edges) added.
+    """
+    columns = {}
+    ids = list({pk for candidate in candidates for pk in candidate[:2]})
+    for start in range(0, len(ids), batch_size):
+        columns.update((pk, (table_id, name)) for pk, table_id, name in Column.objects.filter(
+            pk__in=ids[start:start + batch_size]).values_list('id', 'table_id', 'name'))
+
+    edges = {}
+    for candidate in candidates:
+        parent_table, parent_name = columns[candidate.referenced_column_id]
+        child_table, child_name = columns[candidate.column_id]
+        edges.setdefault((parent_table, child_table), []).append(
+            f"{child_name} → {parent_name} (score {candidate.score}, {candidate.evidence})"
+        )
+
+    with transaction.atomic():
+        existing = lineage_edge_ids({child for _, child in edges})
+        new_edges = [
+            DataLineage(source_table_id=parent, target_table_id=child, lineage_type='foreign_key',
+                        created_by=created_by, description=f"{label}: " + '; '.join(notes))
+            for (parent, child), notes in edges.items() if (parent, child, 'foreign_key') not in existing
+        ]
+        DataLineage.objects.bulk_create(new_edges, batch_size=batch_size, ignore_conflicts=True)
+        if new_edges:
+            existing = lineage_edge_ids({edge.target_table_id for edge in new_edges}, existing)
+        rows = [
+            ColumnLineage(
+                lineage_id=existing[(columns[c.referenced_column_id][0], columns[c.column_id][0], 'foreign_key')],
+                source_column_id=c.referenced_column_id, target_column_id=c.column_id,
+            )
+            for c in candidates
+        ]
+        before = column_edge_keys({row.lineage_id for row in rows})
+        new_rows = [row for row in rows if (row.lineage_id, row.source_column_id, row.target_column_id) not in before]
+        ColumnLineage.objects.bulk_create(new_rows, batch_size=batch_size, ignore_conflicts=True)
+        child_ids = [c.column_id for c in candidates]
+        for start in range(0, len(child_ids), batch_size):
+            Column.objects.filter(pk__in=child_ids[start:start + batch_size]).update(is_foreign_key=True)
+    invalidate_instances(DataLineage, new_edges)
+    invalidate_instances(Column, [Column(pk=pk, table_id=columns[pk][0]) for pk in child_ids])
+    return len(new_edges), len(new_rows)
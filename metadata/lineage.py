@@ -0,0 +1,552 @@
+# metadata/lineage.py
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from django.db import connections, transaction
+
+import sqlparse
+from sqlparse import lexer, tokens as T
+
+from .caching import invalidate_instances
+from .models import Column, ColumnLineage, DataLineage, ParsedSQL, Table
+
+# Bump when extraction changes, so stored parse results are not reused
+PARSER_VERSION = 2
+DEFAULT_BATCH_SIZE = 2000
+VIEW_TYPES = ('view', 'materialized_view')
+
+# Keywords that structure a statement; any other keyword (status, name, date...) may be an identifier
+_CLAUSE_KEYWORDS = {
+    'all', 'and', 'any', 'as', 'asc', 'between', 'by', 'case', 'cast', 'create', 'cross', 'delete',
+    'desc', 'distinct', 'else', 'end', 'except', 'exists', 'fetch', 'from', 'full', 'group by',
+    'having', 'if', 'in', 'inner', 'insert', 'intersect', 'interval', 'into', 'is', 'join', 'lateral',
+    'left', 'like', 'limit', 'materialized', 'merge', 'natural', 'not', 'null', 'offset', 'on', 'or',
+    'order by', 'outer', 'over', 'overwrite', 'partition by', 'qualify', 'recursive', 'returning',
+    'right', 'select', 'set', 'table', 'temp', 'temporary', 'then', 'union', 'update', 'using',
+    'values', 'view', 'when', 'where', 'window', 'with',
+}
+# Clauses that end a select list
+_SELECT_END = {'from', 'into', 'where', 'group by', 'having', 'order by', 'limit', 'union', 'intersect',
+               'except', 'window', 'qualify', 'offset', 'fetch'}
+_PRODUCING = {'select', 'insert', 'create', 'with', 'merge', 'update', '('}
+# Keyword arguments of function calls, as in EXTRACT(year FROM d) or TRIM(BOTH ' ' FROM s)
+_ARGUMENT_KEYWORDS = {
+    'century', 'day', 'decade', 'dow', 'doy', 'epoch', 'hour', 'isodow', 'isoyear', 'microsecond',
+    'microseconds', 'millennium', 'millisecond', 'milliseconds', 'minute', 'month', 'quarter', 'second',
+    'timezone', 'week', 'year', 'both', 'leading', 'trailing',
+}
+
+
+def _unquote(value):
+    if len(value) > 1 and value[0] in '"`[' and value[-1] in '"`]':
+        value = value[1:-1]
+    return value.lower()
+
+
+def _tokens(statement):
+    """(kind, value) pairs with whitespace and comments dropped: kind is 'kw', 'name', 'op' or 'lit'."""
+    result = []
+    for ttype, value in lexer.tokenize(statement):
+        if ttype in T.Whitespace or ttype in T.Comment or ttype in T.Newline:
+            continue
+        if ttype in T.Name.Builtin:
+            result.append(('lit', value.lower()))
+        elif ttype in T.Name or ttype in T.Literal.String.Symbol:
+            result.append(('name', _unquote(value)))
+        elif ttype in T.Keyword:
+            word = ' '.join(value.lower().split())
+            if word.endswith(' join'):
+                word = 'join'
+            elif word.startswith('create '):
+                word = 'create'
+            elif word.startswith('union ') or word.startswith('insert '):
+                word = word.split()[0]
+            result.append(('kw', word) if word in _CLAUSE_KEYWORDS else ('name', word))
+        elif ttype in T.Punctuation or ttype in T.Operator or ttype in T.Wildcard:
+            result.append(('op', value))
+        else:
+            result.append(('lit', value))
+    return result
+
+
+def _qualified_name(tokens, i):
+    """Reads `a.b.c` starting at i. Returns (name, next index), or (None, i)."""
+    if i >= len(tokens) or tokens[i][0] != 'name':
+        return None, i
+    parts = [tokens[i][1]]
+    i += 1
+    while i + 1 < len(tokens) and tokens[i] == ('op', '.') and tokens[i + 1][0] in ('name', 'kw'):
+        parts.append(tokens[i + 1][1])
+        i += 2
+    return '.'.join(parts), i
+
+
+def _paren_list(tokens, i):
+    """Names in a `(a, b, c)` list starting at i. Returns (names, index after ')')."""
+    names = []
+    if i < len(tokens) and tokens[i] == ('op', '('):
+        i += 1
+        while i < len(tokens) and tokens[i] != ('op', ')'):
+            if tokens[i][0] in ('name', 'kw') and tokens[i - 1] in (('op', '('), ('op', ',')):
+                names.append(tokens[i][1])
+            i += 1
+        i += 1
+    return names, i
+
+
+def _skip_group(tokens, i):
+    """Index just past the parenthesis group opening at i."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j] == ('op', '('):
+            depth += 1
+        elif tokens[j] == ('op', ')'):
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(tokens)
+
+
+def _target(tokens, start=0):
+    """
+    (target table, explicit target columns) of INSERT/CREATE ... AS/MERGE/UPDATE
+    statements, whose keyword is at `start` (past any WITH list).
+    """
+    first = tokens[start][1]
+    i = start + 1
+    if first == 'insert':
+        while i < len(tokens) and tokens[i][1] in ('into', 'overwrite', 'table'):
+            i += 1
+    elif first == 'create':
+        while i < len(tokens) and i < start + 6 and tokens[i][1] not in ('view', 'table'):
+            i += 1
+        i += 1
+        while i < len(tokens) and tokens[i][1] in ('if', 'not', 'exists'):
+            i += 1
+    elif first == 'merge':
+        i += 1 if i < len(tokens) and tokens[i][1] == 'into' else 0
+    elif first != 'update':
+        return None, []
+    name, i = _qualified_name(tokens, i)
+    columns, _ = _paren_list(tokens, i) if first in ('insert', 'create') else ([], i)
+    return name, columns
+
+
+def _cte_list(tokens, i):
+    """Names defined by the WITH list at i, and the index of the statement that follows it."""
+    names = []
+    j = i + 1
+    if j < len(tokens) and tokens[j] == ('kw', 'recursive'):
+        j += 1
+    while j < len(tokens) and tokens[j][0] == 'name':
+        names.append(tokens[j][1])
+        j += 1
+        if j < len(tokens) and tokens[j] == ('op', '('):
+            j = _skip_group(tokens, j)
+        if j < len(tokens) and tokens[j] == ('kw', 'as'):
+            j += 1
+        while j < len(tokens) and tokens[j][0] == 'name':
+            # MATERIALIZED / NOT MATERIALIZED hints
+            j += 1
+        if j < len(tokens) and tokens[j] == ('op', '('):
+            j = _skip_group(tokens, j)
+        if j < len(tokens) and tokens[j] == ('op', ','):
+            j += 1
+        else:
+            break
+    return names, j
+
+
+def _ctes(tokens):
+    names = set()
+    for i, token in enumerate(tokens):
+        if token == ('kw', 'with'):
+            names.update(_cte_list(tokens, i)[0])
+    return names
+
+
+def _main_start(tokens):
+    """Index of the keyword of the statement itself, past a leading WITH list."""
+    if tokens[0] == ('kw', 'with'):
+        _, start = _cte_list(tokens, 0)
+        if start < len(tokens):
+            return start
+    return 0
+
+
+def _table_refs(tokens, ctes, is_merge):
+    """Source table names and {alias: table name or None for derived tables}."""
+    sources, aliases = [], {}
+    # One flag per open parenthesis: whether a query started in it, so EXTRACT(year FROM d) is not a source
+    in_query = [False]
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        if (kind, value) == ('op', '('):
+            in_query.append(False)
+        elif (kind, value) == ('op', ')'):
+            if len(in_query) > 1:
+                in_query.pop()
+        elif kind == 'kw' and value in ('select', 'delete', 'update', 'insert', 'merge'):
+            in_query[-1] = True
+        elif kind == 'kw' and (value == 'join' or (value == 'from' and in_query[-1]) or (value == 'using' and is_merge)):
+            i += 1
+            while i < len(tokens):
+                if tokens[i] == ('kw', 'lateral'):
+                    i += 1
+                if i < len(tokens) and tokens[i] == ('op', '('):
+                    # Derived table: its own FROM clauses are picked up as the scan continues
+                    alias, _ = _alias(tokens, _skip_group(tokens, i))
+                    if alias:
+                        aliases[alias] = None
+                    break
+                name, i = _qualified_name(tokens, i)
+                if name is None or (i < len(tokens) and tokens[i] == ('op', '(')):
+                    break  # table function
+                alias, i = _alias(tokens, i)
+                if name in ctes:
+                    aliases[alias or name] = None
+                else:
+                    sources.append(name)
+                    aliases[alias or name.rsplit('.', 1)[-1]] = name
+                    aliases.setdefault(name, name)
+                if value == 'from' and i < len(tokens) and tokens[i] == ('op', ','):
+                    i += 1
+                    continue
+                break
+            continue
+        i += 1
+    return sources, aliases
+
+
+def _alias(tokens, i):
+    if i < len(tokens) and tokens[i] == ('kw', 'as'):
+        i += 1
+    if i < len(tokens) and tokens[i][0] == 'name':
+        return tokens[i][1], i + 1
+    return None, i
+
+
+def _select_items(tokens):
+    """Top-level select list of the main query as lists of tokens."""
+    depth, best, start = 0, None, None
+    for i, token in enumerate(tokens):
+        if token == ('op', '('):
+            depth += 1
+        elif token == ('op', ')'):
+            depth -= 1
+        elif token == ('kw', 'select') and (best is None or depth < best):
+            best, start = depth, i + 1
+    if start is None:
+        return []
+    items, current, depth = [], [], 0
+    for token in tokens[start:]:
+        if depth == 0 and token[0] == 'kw' and token[1] in _SELECT_END:
+            break
+        if token == ('op', '('):
+            depth += 1
+        elif token == ('op', ')'):
+            depth -= 1
+            if depth < 0:
+                break
+        if depth == 0 and token == ('op', ','):
+            items.append(current)
+            current = []
+        else:
+            current.append(token)
+    items.append(current)
+    if items and items[0] and items[0][0] in (('kw', 'distinct'), ('kw', 'all')):
+        items[0] = items[0][1:]
+    return [item for item in items if item]
+
+
+def _column_refs(item, aliases):
+    """(output name, [(table name or None, column)]) of one select item; column may be '*'."""
+    output = None
+    if len(item) >= 2 and item[-2] == ('kw', 'as') and item[-1][0] == 'name':
+        output, item = item[-1][1], item[:-2]
+    elif len(item) >= 2 and item[-1][0] == 'name' and item[-2] != ('op', '.'):
+        output, item = item[-1][1], item[:-1]
+
+    # One flag per open parenthesis: whether it holds the arguments of a function call
+    refs, i, calls = [], 0, []
+    while i < len(item):
+        if item[i] == ('op', '('):
+            calls.append(i > 0 and item[i - 1][0] == 'name')
+        elif item[i] == ('op', ')') and calls:
+            calls.pop()
+        if item[i][0] == 'name' and (i == 0 or item[i - 1] != ('op', '.')):
+            name, end = _qualified_name(item, i)
+            if end < len(item) and item[end] == ('op', '('):
+                i = end
+                continue  # function call
+            if calls and calls[-1] and name in _ARGUMENT_KEYWORDS:
+                i = end
+                continue
+            star = end + 1 < len(item) and item[end] == ('op', '.') and item[end + 1] == ('op', '*')
+            if star:
+                table, column, end = name, '*', end + 2
+            elif '.' in name:
+                table, column = name.rsplit('.', 1)
+            else:
+                table, column = None, name
+            if table is not None:
+                table = aliases.get(table, table if '.' in table else None)
+            refs.append((table, column))
+            if output is None and len(item) == end - i and column != '*':
+                output = column
+            i = end
+            continue
+        if item == [('op', '*')]:
+            refs.append((None, '*'))
+        i += 1
+    return output, refs
+
+
+def parse_sql(sql):
+    """
+    Extracts lineage from a SQL script. Returns one dict per statement that
+    reads tables: `target` (qualified name or None when the statement is a
+    bare query), `sources` and `columns`, a list of [target column,
+    [[source table or None, source column], ...]]. JSON-serializable, so
+    results can be cached.
+    """
+    statements = []
+    for statement in sqlparse.split(sql):
+        tokens = _tokens(statement)
+        while tokens and tokens[-1] == ('op', ';'):
+            tokens.pop()
+        if not tokens or tokens[0][1] not in _PRODUCING:
+            continue
+        if tokens[0] == ('op', '('):
+            tokens = tokens[1:-1] if tokens[-1] == ('op', ')') else tokens[1:]
+        start = _main_start(tokens)
+        kind = tokens[start][1]
+        target, target_columns = _target(tokens, start)
+        sources, aliases = _table_refs(tokens, _ctes(tokens), kind == 'merge')
+        sources = list(dict.fromkeys(name for name in sources if name != target))
+        if not sources:
+            continue
+        columns = []
+        if kind != 'update':
+            for position, item in enumerate(_select_items(tokens)):
+                output, refs = _column_refs(item, aliases)
+                if position < len(target_columns):
+                    output = target_columns[position]
+                if refs and (output or any(column == '*' for _, column in refs)):
+                    columns.append([output, [list(ref) for ref in refs]])
+        statements.append({'target': target, 'sources': sources, 'columns': columns})
+    return statements
+
+
+def sql_digest(sql):
+    return hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+
+def parse_many(scripts, workers=1):
+    """
+    Parses unique SQL texts, reusing the ParsedSQL rows stored by earlier
+    runs. Returns ({digest: statements}, number of stored results reused).
+    With several workers the misses are parsed in forked processes.
+    """
+    by_digest = {sql_digest(sql): sql for sql in scripts}
+    digests, results = list(by_digest), {}
+    for start in range(0, len(digests), DEFAULT_BATCH_SIZE):
+        results.update(ParsedSQL.objects.filter(
+            digest__in=digests[start:start + DEFAULT_BATCH_SIZE], parser_version=PARSER_VERSION
+        ).values_list('digest', 'statements'))
+    hits = len(results)
+    missing = [digest for digest in by_digest if digest not in results]
+
+    if workers > 1 and len(missing) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        # Children must not inherit (and later close) the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            parsed = pool.map(parse_sql, (by_digest[d] for d in missing), chunksize=max(1, len(missing) // (workers * 4)))
+            results.update(zip(missing, parsed))
+    else:
+        results.update((digest, parse_sql(by_digest[digest])) for digest in missing)
+
+    # Rows left by an older parser version are overwritten
+    ParsedSQL.objects.bulk_create(
+        [ParsedSQL(digest=digest, parser_version=PARSER_VERSION, statements=results[digest]) for digest in missing],
+        batch_size=DEFAULT_BATCH_SIZE, update_conflicts=True, unique_fields=['digest'],
+        update_fields=['parser_version', 'statements'],
+    )
+    return results, hits
+
+
+class QualifiedNameIndex:
+    """
+    In-memory lookup of catalog tables by `table`, `schema.table` or
+    `source.schema.table` (case-insensitive). Ambiguous names resolve to a
+    table in the referencing table's schema, then data source, or not at all.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self._by_name, self._by_schema, self._by_full = {}, {}, {}
+        rows = Table.objects.values_list(
+            'id', 'name', 'schema_id', 'schema__name', 'schema__data_source_id', 'schema__data_source__name'
+        )
+        for pk, name, schema_id, schema, source_id, source in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+            name, schema, source = name.lower(), schema.lower(), source.lower()
+            self.tables[pk] = (schema_id, source_id)
+            self._by_name.setdefault(name, []).append(pk)
+            self._by_schema.setdefault((schema, name), []).append(pk)
+            self._by_full[(source, schema, name)] = pk
+        self._columns = {}
+
+    def resolve(self, qualified, context=None):
+        """Table id for a qualified name, or None; `context` is the id of the referencing table."""
+        parts = qualified.lower().split('.')
+        if len(parts) >= 3 and tuple(parts[-3:]) in self._by_full:
+            return self._by_full[tuple(parts[-3:])]
+        candidates = self._by_schema.get(tuple(parts[-2:]), []) if len(parts) >= 2 else self._by_name.get(parts[0], [])
+        if len(candidates) <= 1 or context not in self.tables:
+            return candidates[0] if len(candidates) == 1 else None
+        scope = self.tables[context]
+        # Same schema first, then same data source
+        for position in (0, 1):
+            scoped = [pk for pk in candidates if self.tables[pk][position] == scope[position]]
+            if len(scoped) == 1:
+                return scoped[0]
+        return None
+
+    def load_columns(self, table_ids):
+        """Loads {column name: id} for tables not loaded yet."""
+        needed = [pk for pk in set(table_ids) if pk not in self._columns]
+        for pk in needed:
+            self._columns[pk] = {}
+        for start in range(0, len(needed), DEFAULT_BATCH_SIZE):
+            rows = Column.objects.filter(table_id__in=needed[start:start + DEFAULT_BATCH_SIZE])
+            for pk, table_id, name in rows.values_list('id', 'table_id', 'name'):
+                self._columns[table_id][name.lower()] = pk
+
+    def columns(self, table_id):
+        return self._columns.get(table_id, {})
+
+
+def _lineage_jobs(include_lineage, include_views):
+    """(sql, default target table id, lineage type, origin) for every stored SQL text."""
+    if include_lineage:
+        rows = DataLineage.objects.exclude(transformation_logic='').values_list(
+            'id', 'transformation_logic', 'target_table_id', 'lineage_type'
+        )
+        for pk, sql, target_id, lineage_type in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+            yield sql, target_id, lineage_type, f'lineage #{pk}'
+    if include_views:
+        rows = Table.objects.filter(table_type__in=VIEW_TYPES).exclude(view_definition='').values_list(
+            'id', 'view_definition'
+        )
+        for pk, sql in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+            yield sql, pk, 'view', f'view definition of table #{pk}'
+
+
+def _column_edges(index, statement, source_ids, target_id):
+    target_columns = index.columns(target_id)
+    edges = set()
+    for output, refs in statement['columns']:
+        for table, column in refs:
+            if table is not None:
+                candidates = [index.resolve(table, target_id)]
+            else:
+                candidates = [pk for pk in source_ids if column == '*' or column in index.columns(pk)]
+                if column != '*' and len(candidates) != 1:
+                    continue  # unknown or ambiguous unqualified column
+            for source_id in candidates:
+                if source_id not in source_ids:
+                    continue
+                source_columns = index.columns(source_id)
+                if column == '*':
+                    edges.update((source_id, source_columns[name], target_columns[name])
+                                 for name in source_columns if name in target_columns)
+                elif column in source_columns and output in target_columns:
+                    edges.add((source_id, source_columns[column], target_columns[output]))
+    return edges
+
+
+def extract_lineage(workers=1, include_lineage=True, include_views=True, created_by=None):
+    """
+    Derives table- and column-level lineage from DataLineage.transformation_logic
+    and view definitions. Each distinct SQL text is parsed once (stored by
+    hash in ParsedSQL across runs); names are resolved through a QualifiedNameIndex and
+    missing edges are bulk-created. Returns a dict of counts.
+    """
+    jobs = list(_lineage_jobs(include_lineage, include_views))
+    parsed, hits = parse_many([sql for sql, _, _, _ in jobs], workers=workers)
+    index = QualifiedNameIndex()
+    stats = {'scripts': len(jobs), 'unique': len(parsed), 'cache_hits': hits, 'unresolved': 0}
+
+    resolved = []
+    for sql, default_target, lineage_type, origin in jobs:
+        for statement in parsed[sql_digest(sql)]:
+            target_id = (index.resolve(statement['target'], default_target) if statement['target'] else None)
+            target_id = target_id or default_target
+            source_ids = []
+            for name in statement['sources']:
+                source_id = index.resolve(name, target_id)
+                if source_id is None:
+                    stats['unresolved'] += 1
+                elif source_id != target_id:
+                    source_ids.append(source_id)
+            if source_ids:
+                resolved.append((statement, source_ids, target_id, lineage_type, origin))
+    index.load_columns(pk for _, sources, target, _, _ in resolved for pk in (*sources, target))
+
+    table_edges, column_edges = {}, set()
+    for statement, source_ids, target_id, lineage_type, origin in resolved:
+        for source_id in source_ids:
+            table_edges.setdefault((source_id, target_id, lineage_type), origin)
+        column_edges.update(
+            (source_id, target_id, lineage_type, source_column, target_column)
+            for source_id, source_column, target_column in _column_edges(index, statement, source_ids, target_id)
+        )
+
+    with transaction.atomic():
+        existing = lineage_edge_ids({target for _, target, _ in table_edges})
+        new_edges = [
+            DataLineage(source_table_id=source_id, target_table_id=target_id, lineage_type=lineage_type,
+                        description=f"Extracted from SQL ({origin})", created_by=created_by)
+            for (source_id, target_id, lineage_type), origin in table_edges.items()
+            if (source_id, target_id, lineage_type) not in existing
+        ]
+        DataLineage.objects.bulk_create(new_edges, batch_size=DEFAULT_BATCH_SIZE, ignore_conflicts=True)
+        if new_edges:
+            existing = lineage_edge_ids({edge.target_table_id for edge in new_edges}, existing)
+        wanted = {
+            (existing[(source_id, target_id, lineage_type)], source_column, target_column)
+            for source_id, target_id, lineage_type, source_column, target_column in column_edges
+            if (source_id, target_id, lineage_type) in existing
+        }
+        wanted -= column_edge_keys({lineage_id for lineage_id, _, _ in wanted})
+        ColumnLineage.objects.bulk_create(
+            [ColumnLineage(lineage_id=lineage_id, source_column_id=source_column, target_column_id=target_column)
+             for lineage_id, source_column, target_column in wanted],
+            batch_size=DEFAULT_BATCH_SIZE, ignore_conflicts=True,
+        )
+        stats['column_edges'] = len(wanted)
+    invalidate_instances(DataLineage, new_edges)
+    stats['table_edges'] = len(new_edges)
+    return stats
+
+
+def lineage_edge_ids(target_ids, edges=None):
+    """{(source, target, type): id} for lineage edges into the given tables."""
+    edges = {} if edges is None else edges
+    target_ids = list(target_ids)
+    for start in range(0, len(target_ids), DEFAULT_BATCH_SIZE):
+        rows = DataLineage.objects.filter(target_table_id__in=target_ids[start:start + DEFAULT_BATCH_SIZE])
+        for pk, source_id, target_id, lineage_type in rows.values_list(
+            'id', 'source_table_id', 'target_table_id', 'lineage_type'
+        ):
+            edges[(source_id, target_id, lineage_type)] = pk
+    return edges
+
+
+def column_edge_keys(lineage_ids):
+    keys, lineage_ids = set(), list(lineage_ids)
+    for start in range(0, len(lineage_ids), DEFAULT_BATCH_SIZE):
+        rows = ColumnLineage.objects.filter(lineage_id__in=lineage_ids[start:start + DEFAULT_BATCH_SIZE])
+        keys.update(rows.values_list('lineage_id', 'source_column_id', 'target_column_id'))
+    return keys
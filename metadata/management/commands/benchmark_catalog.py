@@ -0,0 +1,156 @@
+# metadata/management/commands/benchmark_catalog.py
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from metadata.benchmarks import compare_results, load_results, save_results, summarize
+from metadata.budgets import CACHED_ROUTES
+from metadata.caching import clear_catalog_cache
+from metadata.models import DataLineage, Table
+from metadata.synthetic import LINEAGE_SHAPES, generate_catalog
+
+DEFAULT_SIZES = '1000,10000'
+SCHEMAS_PER_SOURCE = 5
+TABLES_PER_SOURCE = 500
+COMPARED_METRICS = [('p50_ms', False), ('p95_ms', False), ('queries', True), ('peak_memory_kb', False)]
+
+
+def _busiest_table_id():
+    """The table with the most downstream edges, so table_detail renders real lineage."""
+    row = (DataLineage.objects.values('source_table').order_by()
+           .annotate(edges=Count('id')).order_by('-edges').first())
+    return row['source_table'] if row else Table.objects.values_list('id', flat=True).first()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the main catalog views at several synthetic catalog sizes "
+        "(latency percentiles, query counts, peak memory) and saves the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated table counts")
+        parser.add_argument('--columns', type=int, default=15, help="Columns per table")
+        parser.add_argument('--lineage-per-table', type=float, default=2.0)
+        parser.add_argument('--lineage-shape', choices=LINEAGE_SHAPES, default='random')
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per view")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per view")
+        parser.add_argument('--output', help="Write results JSON here")
+        parser.add_argument('--compare', help="Baseline results JSON to compare against")
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help="Latency/memory ratio over baseline that counts as a regression")
+
+    def targets(self):
+        table_id = _busiest_table_id()
+        return [
+            ('dashboard', reverse('dashboard')),
+            ('table_list', reverse('table_list')),
+            ('table_detail', reverse('table_detail', args=[table_id])),
+            ('lineage_view', reverse('lineage_view')),
+            ('glossary_list', reverse('glossary_list')),
+            ('api_search_tables', reverse('api_search_tables') + '?q=customer'),
+        ]
+
+    def measure(self, client, url, repeat, warmup, cold=True):
+        """
+        Latency percentiles, queries and peak memory of GETs of `url`. With
+        `cold` the catalog cache is cleared before every measured request, so
+        cached views are timed rendering rather than answering from the cache.
+        """
+        def get():
+            if cold:
+                clear_catalog_cache()
+            return client.get(url)
+
+        for _ in range(warmup):
+            get()
+        samples = []
+        for _ in range(repeat):
+            if cold:
+                clear_catalog_cache()
+            started = time.perf_counter()
+            client.get(url)
+            samples.append((time.perf_counter() - started) * 1000)
+        # Memory and query count are measured on a separate request so tracing does not skew latency
+        if cold:
+            clear_catalog_cache()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result = summarize(samples)
+        result.update({
+            'queries': len(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+            'status': response.status_code,
+            'response_kb': round(len(response.content) / 1024, 1),
+        })
+        return result
+
+    def run_size(self, tables, options):
+        sources = max(1, tables // TABLES_PER_SOURCE)
+        tables_per_schema = max(1, tables // (sources * SCHEMAS_PER_SOURCE))
+        counts = generate_catalog(
+            sources=sources, schemas_per_source=SCHEMAS_PER_SOURCE, tables_per_schema=tables_per_schema,
+            columns_per_table=options['columns'],
+            lineage_edges_count=int(tables * options['lineage_per_table']),
+            lineage_shape=options['lineage_shape'], glossary_terms=max(50, tables // 10),
+        )
+        self.stdout.write(f"Catalog size {tables}: " + ', '.join(f"{k}={v}" for k, v in counts.items()))
+
+        client = Client()
+        results = []
+        for view, url in self.targets():
+            # Cached views are reported twice: rendered (cold) and served from the cache (warm)
+            runs = [(view, True)] + ([(f'{view}_cached', False)] if view in CACHED_ROUTES else [])
+            for label, cold in runs:
+                result = self.measure(client, url, options['repeat'], options['warmup'], cold=cold)
+                result.update({'key': f"{label}@{tables}", 'view': label, 'size': tables, 'catalog': counts})
+                results.append(result)
+                self.stdout.write(
+                    f"  {label:<20} p50 {result['p50_ms']:>9.1f} ms  p95 {result['p95_ms']:>9.1f} ms  "
+                    f"queries {result['queries']:>4}  peak {result['peak_memory_kb']:>9.1f} KB"
+                )
+        return results
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        results = []
+        try:
+            for tables in sizes:
+                # A fresh database per size keeps sizes independent of each other
+                connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                # Cached pages are keyed on primary keys, which the fresh database reuses
+                cache.clear()
+                try:
+                    results.extend(self.run_size(tables, options))
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            teardown_test_environment()
+
+        if options['output']:
+            save_results(options['output'], 'catalog_views', results)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            baseline = load_results(options['compare'])['results']
+            regressions = compare_results(results, baseline, COMPARED_METRICS, options['threshold'])
+            for key, metric, old, new in regressions:
+                self.stdout.write(self.style.ERROR(f"  REGRESSION {key} {metric}: {old} -> {new}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
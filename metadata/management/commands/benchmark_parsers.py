@@ -0,0 +1,159 @@
+# metadata/management/commands/benchmark_parsers.py
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata.benchmarks import compare_results, load_results, save_results, summarize
+from metadata.synthetic import FILE_FORMATS, synthetic_file
+from metadata.utils import parse_file_metadata
+
+DEFAULT_SIZES = '0.1,1,10'
+COMPARED_METRICS = [('p50_ms', False), ('peak_rss_growth_mb', False), ('traced_peak_mb', False)]
+
+
+def _max_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+def _measure(file_format, content, repeat, warmup, exact_types):
+    """Times `repeat` parses, then traces allocations on one more. Runs inside a child process."""
+    name = f'benchmark.{file_format}'
+    rss_before = _max_rss_mb()
+    result = {}
+    for _ in range(warmup):
+        result = parse_file_metadata(SimpleUploadedFile(name, content), exact_types=exact_types)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parse_file_metadata(SimpleUploadedFile(name, content), exact_types=exact_types)
+        samples.append((time.perf_counter() - started) * 1000)
+    peak_rss = _max_rss_mb()
+
+    # Tracing slows parsing down several times, so it gets its own untimed run
+    tracemalloc.start()
+    parse_file_metadata(SimpleUploadedFile(name, content), exact_types=exact_types)
+    snapshot = tracemalloc.take_snapshot()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = snapshot.statistics('filename')
+
+    summary = summarize(samples)
+    summary.update({
+        'error': result.get('error') if isinstance(result, dict) else None,
+        'peak_rss_mb': round(peak_rss, 1),
+        'peak_rss_growth_mb': round(max(peak_rss - rss_before, 0.0), 1),
+        'traced_peak_mb': round(traced_peak / (1024 * 1024), 2),
+        'retained_blocks': sum(stat.count for stat in retained),
+        'retained_kb': round(sum(stat.size for stat in retained) / 1024, 1),
+    })
+    return summary
+
+
+def _child(connection, *args):
+    try:
+        connection.send(_measure(*args))
+    except Exception as e:
+        connection.send({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        connection.close()
+
+
+def _run_isolated(*args):
+    """
+    Measures in a forked child so each (format, size) gets its own peak RSS
+    high-water mark instead of inheriting the largest earlier run's.
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return _measure(*args)
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, *args))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        return {'error': f'benchmark process exited with code {process.exitcode}'}
+    finally:
+        process.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks parse_file_metadata on synthetic files of each supported format at "
+        "several sizes (wall time, MB/s, peak RSS, traced allocations) and saves the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formats', default=','.join(FILE_FORMATS),
+                            help=f"Comma-separated formats from: {', '.join(FILE_FORMATS)}")
+        parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated target file sizes in MB")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed parses per file")
+        parser.add_argument('--warmup', type=int, default=1, help="Untimed parses per file")
+        parser.add_argument('--exact-types', action='store_true', help="Profile every row for tabular files")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write results JSON here")
+        parser.add_argument('--compare', help="Baseline results JSON to compare against")
+        parser.add_argument('--threshold', type=float, default=1.2,
+                            help="Time/memory ratio over baseline that counts as a regression")
+
+    def handle(self, *args, **options):
+        formats = [f.strip().lower() for f in options['formats'].split(',') if f.strip()]
+        unknown = set(formats) - set(FILE_FORMATS)
+        if unknown:
+            raise CommandError(f"Unknown format(s): {', '.join(sorted(unknown))}")
+        try:
+            sizes = [float(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of numbers")
+
+        results = []
+        for file_format in formats:
+            for size_mb in sizes:
+                content = synthetic_file(file_format, int(size_mb * 1024 * 1024), seed=options['seed'])
+                file_mb = len(content) / (1024 * 1024)
+                result = _run_isolated(file_format, content, options['repeat'], options['warmup'],
+                                       options['exact_types'])
+                result.update({
+                    'key': f'{file_format}@{size_mb:g}MB',
+                    'format': file_format,
+                    'target_mb': size_mb,
+                    'file_mb': round(file_mb, 3),
+                })
+                if 'p50_ms' in result:
+                    result['mb_per_s'] = round(file_mb / (result['p50_ms'] / 1000), 2) if result['p50_ms'] else None
+                results.append(result)
+                self.report(result)
+
+        if options['output']:
+            save_results(options['output'], 'parsers', results)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            baseline = load_results(options['compare'])['results']
+            regressions = compare_results(results, baseline, COMPARED_METRICS, options['threshold'])
+            for key, metric, old, new in regressions:
+                self.stdout.write(self.style.ERROR(f"  REGRESSION {key} {metric}: {old} -> {new}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def report(self, result):
+        if 'p50_ms' not in result:
+            self.stdout.write(self.style.ERROR(f"  {result['key']:<14} failed: {result['error']}"))
+            return
+        line = (
+            f"  {result['key']:<14} {result['file_mb']:>8.2f} MB  p50 {result['p50_ms']:>9.1f} ms  "
+            f"{result['mb_per_s'] or 0:>7.2f} MB/s  RSS +{result['peak_rss_growth_mb']:>7.1f} MB  "
+            f"traced {result['traced_peak_mb']:>7.2f} MB  blocks {result['retained_blocks']:>7}"
+        )
+        if result['error']:
+            self.stdout.write(self.style.WARNING(line + f"  ({result['error']})"))
+        else:
+            self.stdout.write(line)
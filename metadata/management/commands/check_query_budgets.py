@@ -0,0 +1,72 @@
+# metadata/management/commands/check_query_budgets.py
+from django.core.management.base import BaseCommand, CommandError
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import get_resolver
+
+from metadata.budgets import measure_routes
+from metadata.synthetic import generate_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds a synthetic catalog in a throwaway test database and checks every "
+        "named route against its declared SQL query budget. Exits non-zero on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sources', type=int, default=5)
+        parser.add_argument('--schemas', type=int, default=4, help="Schemas per source")
+        parser.add_argument('--tables', type=int, default=50, help="Tables per schema")
+        parser.add_argument('--columns', type=int, default=20, help="Columns per table")
+        parser.add_argument('--lineage', type=int, default=2000, help="Lineage edges")
+        parser.add_argument('--glossary', type=int, default=500, help="Glossary terms")
+        parser.add_argument('--keepdb', action='store_true', help="Reuse the test database if it exists")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        # Cached pages are keyed on primary keys, which the fresh database reuses
+        cache.clear()
+        try:
+            counts = generate_catalog(
+                sources=options['sources'], schemas_per_source=options['schemas'],
+                tables_per_schema=options['tables'], columns_per_table=options['columns'],
+                lineage_edges_count=options['lineage'], glossary_terms=options['glossary'],
+            )
+            self.stdout.write("Synthetic catalog: " + ', '.join(f"{k}={v}" for k, v in counts.items()))
+            failures = self.check_routes()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"{len(failures)} route(s) over budget or unbudgeted: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All routes within their query budgets."))
+
+    def check_routes(self):
+        failures = []
+        for name, url, used, budget, status_code, cached in measure_routes(
+            Client(), get_resolver('metadata.urls').url_patterns
+        ):
+            if budget is None:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"  {name}: no budget declared"))
+                continue
+            line = f"  {name:<22} {url:<40} {used:>4} / {budget:<4} HTTP {status_code}"
+            if used > budget or status_code >= 400:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+            if cached is not None:
+                line = f"  {name + ' (cached)':<22} {url:<40} {cached:>4} / 0"
+                if cached:
+                    failures.append(f'{name} (cached)')
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+        return failures
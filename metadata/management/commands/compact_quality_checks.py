@@ -0,0 +1,35 @@
+# metadata/management/commands/compact_quality_checks.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from metadata.models import DataQualityCheck, DataQualityRollup
+from metadata.quality import DEFAULT_BATCH_SIZE, prune_checks, rebuild_aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        "Prunes raw data quality check results older than the retention period and hourly "
+        "rollups older than theirs. Daily rollups and the latest status per rule are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.QUALITY_CHECK_RETENTION_DAYS,
+                            help="Keep raw checks from the last N days")
+        parser.add_argument('--hourly-days', type=int, default=settings.QUALITY_HOURLY_ROLLUP_RETENTION_DAYS,
+                            help="Keep hourly rollups from the last N days")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Recompute statuses and rollups from the stored checks first")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        # Checks recorded before rollups existed would otherwise be pruned without a trace
+        if options['rebuild'] or (not DataQualityRollup.objects.exists() and DataQualityCheck.objects.exists()):
+            statuses, rollups = rebuild_aggregates(batch_size=options['batch_size'])
+            self.stdout.write(f"Rebuilt {statuses} status(es) and {rollups} rollup(s)")
+        checks, hourly = prune_checks(options['days'], options['hourly_days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {checks} check(s) older than {options['days']} days and {hourly} hourly rollup(s) "
+            f"older than {options['hourly_days']} days in {time.monotonic() - started:.1f}s"
+        ))
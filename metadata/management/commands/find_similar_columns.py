@@ -0,0 +1,60 @@
+# metadata/management/commands/find_similar_columns.py
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata.models import Table
+from metadata.similarity import (
+    DEFAULT_THRESHOLD, MAX_BUCKET_SIZE, build_index, candidate_pairs, propose_lineage, similar_tables,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the MinHash LSH column index, then reports tables with several similar "
+        "columns (likely duplicates or copies). --propose-lineage records them as lineage suggestions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Rebuild every column signature")
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help="Minimum estimated similarity of a column pair")
+        parser.add_argument('--same-source', action='store_true',
+                            help="Also compare tables within the same data source")
+        parser.add_argument('--min-shared', type=int, default=2, help="Similar columns needed to report a table pair")
+        parser.add_argument('--max-bucket-size', type=int, default=MAX_BUCKET_SIZE)
+        parser.add_argument('--limit', type=int, default=50, help="Table pairs to print")
+        parser.add_argument('--propose-lineage', action='store_true')
+        parser.add_argument('--user', help="Username recorded as created_by on proposed lineage")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}")
+
+        started = time.monotonic()
+        indexed = build_index(full=options['full'])
+        self.stdout.write(f"Indexed {indexed} column(s) in {time.monotonic() - started:.1f}s")
+
+        started = time.monotonic()
+        pairs = list(candidate_pairs(options['threshold'], cross_source=not options['same_source'],
+                                     max_bucket_size=options['max_bucket_size']))
+        tables = similar_tables(pairs, min_shared=options['min_shared'])
+        self.stdout.write(
+            f"{len(pairs)} similar column pair(s), {len(tables)} table pair(s) in {time.monotonic() - started:.1f}s"
+        )
+
+        shown = tables[:options['limit']]
+        names = {
+            t.pk: f'{t.schema.data_source.name}.{t.schema.name}.{t.name}'
+            for t in Table.objects.filter(pk__in={pk for a, b, _, _ in shown for pk in (a, b)})
+            .select_related('schema__data_source')
+        }
+        for a, b, shared, score in shown:
+            self.stdout.write(f"  {names[a]} ~ {names[b]}: {shared} column(s), mean similarity {score}")
+
+        if options['propose_lineage'] and tables:
+            proposed = propose_lineage(tables, created_by=user)
+            self.stdout.write(self.style.SUCCESS(f"Proposed {proposed} lineage edge(s)"))
@@ -0,0 +1,50 @@
+# metadata/management/commands/import_catalog.py
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata.importing import (
+    CatalogImporter, read_dump, relaxed_sqlite_pragmas,
+    DEFAULT_CHUNK_SIZE, DEFAULT_BATCH_SIZE
+)
+
+
+class Command(BaseCommand):
+    help = "Loads a catalog dump written by export_catalog (NDJSON or Parquet)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Dump directory, or a single .ndjson/.parquet file")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Records per transaction")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Rows per INSERT statement")
+        parser.add_argument('--fast-sqlite', action='store_true',
+                            help="Relax SQLite durability pragmas (synchronous, journal) during the load")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"No such file or directory: {path}")
+
+        importer = CatalogImporter(batch_size=options['batch_size'])
+        verbosity = options['verbosity']
+
+        def progress(entity, count):
+            if verbosity > 1:
+                self.stdout.write(f"  {entity}: {count} rows")
+
+        started = time.monotonic()
+        try:
+            if options['fast_sqlite']:
+                with relaxed_sqlite_pragmas():
+                    importer.run(read_dump(path, options['chunk_size']), progress)
+            else:
+                importer.run(read_dump(path, options['chunk_size']), progress)
+        except (ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for entity, count in importer.created.items():
+            skipped = importer.skipped.get(entity, 0)
+            note = f" ({skipped} skipped: unresolved references)" if skipped else ""
+            self.stdout.write(f"{entity}: {count} rows{note}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {path} in {time.monotonic() - started:.1f}s"))
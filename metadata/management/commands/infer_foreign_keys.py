@@ -0,0 +1,59 @@
+# metadata/management/commands/infer_foreign_keys.py
+import json
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata.keys import DEFAULT_MIN_CONTAINMENT, create_foreign_keys, infer_foreign_keys, record_value_samples
+from metadata.models import Column
+
+
+class Command(BaseCommand):
+    help = (
+        "Infers foreign keys from column naming and sampled-value containment, and records them "
+        "as 'foreign_key' lineage. --samples loads value samples (NDJSON lines of "
+        '{"column": <id>, "values": [...]}) before inferring.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', help="NDJSON file of sampled column values")
+        parser.add_argument('--min-containment', type=float, default=DEFAULT_MIN_CONTAINMENT)
+        parser.add_argument('--require-values', action='store_true',
+                            help="Only accept keys confirmed by sampled values")
+        parser.add_argument('--dry-run', action='store_true', help="Report candidates without recording them")
+        parser.add_argument('--limit', type=int, default=20, help="Candidates to print")
+        parser.add_argument('--user', help="Username recorded as created_by on new lineage")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}")
+
+        if options['samples']:
+            with open(options['samples'], encoding='utf-8') as handle:
+                samples = {}
+                for line in handle:
+                    if line.strip():
+                        record = json.loads(line)
+                        samples[int(record['column'])] = record['values']
+            self.stdout.write(f"Recorded {record_value_samples(samples)} value sketch(es)")
+
+        started = time.monotonic()
+        candidates = infer_foreign_keys(min_containment=options['min_containment'],
+                                        require_values=options['require_values'])
+        self.stdout.write(f"{len(candidates)} foreign key candidate(s) in {time.monotonic() - started:.1f}s")
+
+        shown = candidates[:options['limit']]
+        names = {
+            c.pk: f'{c.table.schema.name}.{c.table.name}.{c.name}'
+            for c in Column.objects.filter(pk__in={pk for c in shown for pk in c[:2]}).select_related('table__schema')
+        }
+        for candidate in shown:
+            self.stdout.write(f"  {names[candidate.column_id]} → {names[candidate.referenced_column_id]}: "
+                              f"{candidate.score} ({candidate.evidence})")
+
+        if candidates and not options['dry_run']:
+            tables, columns = create_foreign_keys(candidates, created_by=user)
+            self.stdout.write(self.style.SUCCESS(f"Added {tables} foreign key lineage edge(s), {columns} column edge(s)"))
@@ -0,0 +1,43 @@
+# metadata/management/commands/offload_metadata.py
+import os
+from django.core.management.base import BaseCommand
+
+from metadata.blobs import iter_blobs
+from metadata.models import DataSource, SchemaVersion
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves large processed_metadata stored inline into compressed blobs, "
+        "leaving a summary in the row. --prune deletes blobs that neither a source nor a "
+        "schema version snapshot references."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prune', action='store_true', help="Delete unreferenced blobs")
+
+    def handle(self, *args, **options):
+        offloaded = saved_bytes = 0
+        sources = DataSource.objects.with_metadata().filter(metadata_digest='').order_by('pk')
+        for source in sources.iterator(chunk_size=100):
+            inline_size = source.metadata_size
+            source.set_processed_metadata(source.processed_metadata)
+            if source.metadata_digest:
+                source.save(update_fields=['processed_metadata', 'metadata_digest', 'metadata_size'])
+                offloaded += 1
+                saved_bytes += source.metadata_size
+            elif source.metadata_size != inline_size:
+                # Rows written before sizes were recorded
+                source.save(update_fields=['metadata_size'])
+        self.stdout.write(f"Offloaded {offloaded} source(s), {saved_bytes / 1024:.1f} KB of JSON moved out of rows")
+
+        if options['prune']:
+            referenced = set(DataSource.objects.exclude(metadata_digest='').values_list('metadata_digest', flat=True))
+            # Schema history snapshots share the blob store (metadata.history)
+            referenced.update(SchemaVersion.objects.exclude(snapshot_digest='').values_list('snapshot_digest', flat=True))
+            removed = 0
+            for digest, path in iter_blobs():
+                if digest not in referenced:
+                    removed += 1
+                    os.remove(path)
+            self.stdout.write(f"Pruned {removed} unreferenced blob(s)")
@@ -0,0 +1,30 @@
+# metadata/management/commands/reindex_metadata.py
+import time
+from django.core.management.base import BaseCommand
+
+from metadata.indexing import index_metadata
+from metadata.models import DataSource
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the metadata key/value index for all (or the given) data sources."
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Data source ids (default: all)")
+        parser.add_argument('--missing', action='store_true', help="Only sources that have no index entries yet")
+
+    def handle(self, *args, **options):
+        sources = DataSource.objects.with_metadata().order_by('pk')
+        if options['ids']:
+            sources = sources.filter(pk__in=options['ids'])
+        if options['missing']:
+            sources = sources.filter(metadata_index__isnull=True)
+
+        started = time.monotonic()
+        count = entries = 0
+        for source in sources.iterator(chunk_size=100):
+            entries += index_metadata([(source.pk, source.full_metadata)])
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} source(s), {entries} entries in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,54 @@
+# metadata/management/commands/reingest_source.py
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from metadata.history import DEFAULT_SCHEMA, ingest_structure, structure_from_metadata
+from metadata.indexing import index_data_source
+from metadata.models import DataSource
+from metadata.utils import parse_file_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-ingests a data source: parses a new version of its file (or reuses the stored "
+        "metadata) and applies only the schema changes to its tables and columns, recording "
+        "them as a new schema version."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', type=int, help="Data source id")
+        parser.add_argument('--file', help="New version of the source file")
+        parser.add_argument('--table', help="Table name for single-table files (default: file name)")
+        parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+
+    def handle(self, *args, **options):
+        source = DataSource.objects.with_metadata().filter(pk=options['source']).first()
+        if source is None:
+            raise CommandError(f"No data source with id {options['source']}")
+
+        started = time.monotonic()
+        path = options['file'] or source.uploaded_file.name
+        if options['file']:
+            with open(options['file'], 'rb') as handle:
+                metadata = parse_file_metadata(handle)
+            if 'error' in metadata:
+                raise CommandError(metadata['error'])
+            source.set_processed_metadata(metadata)
+            source.status = 'SUCCESS'
+            source.save()
+            index_data_source(source)
+        else:
+            metadata = source.full_metadata
+
+        table = options['table'] or os.path.splitext(os.path.basename(path or source.name))[0]
+        structure = structure_from_metadata(metadata, table, options['schema'])
+        if not any(structure.values()):
+            raise CommandError(f"{metadata.get('file_type') or 'The metadata'} has no tables to ingest")
+        version = ingest_structure(source, structure)
+        elapsed = time.monotonic() - started
+        if version is None:
+            self.stdout.write(f"No schema changes ({elapsed:.1f}s)")
+            return
+        changes = ', '.join(f"{count} {kind.replace('_', ' ')}" for kind, count in sorted(version.summary.items()))
+        self.stdout.write(self.style.SUCCESS(f"Version {version.version}: {changes} in {elapsed:.1f}s"))
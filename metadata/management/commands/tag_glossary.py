@@ -0,0 +1,27 @@
+# metadata/management/commands/tag_glossary.py
+import time
+from django.core.management.base import BaseCommand
+
+from metadata.tagging import DEFAULT_BATCH_SIZE, tag_glossary
+
+
+class Command(BaseCommand):
+    help = (
+        "Suggests glossary mappings for tables and columns whose names or descriptions "
+        "mention a glossary term. Incremental after the first run unless --full is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Rescan everything and replace all suggestions")
+        parser.add_argument('--related', action='store_true', help="Also suggest the related terms of each match")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        run = tag_glossary(full=options['full'], expand_related=options['related'],
+                           batch_size=options['batch_size'])
+        scanned = ', '.join(f"{k}={v}" for k, v in run.scanned.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if run.full else 'Incremental'} run: scanned {scanned}; "
+            f"{run.created} suggestion(s) added, {run.removed} replaced in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,122 @@
+# metadata/metrics.py
+# Prometheus metrics for ingestion, parsing and request handling.
+# For multi-worker deployments set PROMETHEUS_MULTIPROC_DIR to a shared, writable
+# directory (emptied on startup); workers write samples there and /metrics
+# aggregates them. With gunicorn, also call
+# prometheus_client.multiprocess.mark_process_dead(worker.pid) from child_exit.
+import os
+import time
+from django.db.models import Count, Min
+from django.utils import timezone
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+PARSE_SECONDS = Histogram(
+    'metadata_parse_seconds', 'Time spent in parse_file_metadata per file',
+    ['format', 'outcome'],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+INGESTED_BYTES = Counter(
+    'metadata_ingested_bytes', 'Bytes read by the metadata parsers (archive members, not archives)', ['format'],
+)
+INGESTED_ROWS = Counter(
+    'metadata_ingested_rows', 'Tabular rows (or RDF triples) seen by the metadata parsers', ['format'],
+)
+REQUEST_SECONDS = Histogram(
+    'metadata_request_seconds', 'Request latency per view', ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'metadata_request_queries', 'SQL queries issued per request', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250, 1000),
+)
+DB_QUERIES = Counter(
+    'metadata_db_queries', 'SQL queries issued while serving requests', ['view'],
+)
+
+
+def _multiprocess_enabled():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def row_count(result):
+    """Rows reported by a parser result: CSV rows, summed Excel sheet rows, or RDF triples."""
+    if 'row_count' in result:
+        return result['row_count'] or 0
+    if 'sheets' in result:
+        return sum(sheet.get('row_count') or 0 for sheet in result['sheets'].values())
+    return result.get('triples_count') or 0
+
+
+def record_parse(extension, size, result, seconds, failed=False):
+    """
+    Records one parsed file. Parsers running in worker processes return
+    their timing so the parent records it (see metadata.archives). Archives
+    pass no size: their bytes are counted once, per member.
+    """
+    extension = extension or 'none'
+    if failed:
+        outcome = 'exception'
+    elif not isinstance(result, dict) or 'error' in result:
+        outcome = 'error'
+    else:
+        outcome = 'success'
+    PARSE_SECONDS.labels(extension, outcome).observe(seconds)
+    if size is not None:
+        INGESTED_BYTES.labels(extension).inc(size)
+    if outcome == 'success':
+        INGESTED_ROWS.labels(extension).inc(row_count(result))
+
+
+class ParseTimer:
+    """Context manager that records one parse_file_metadata call."""
+
+    def __init__(self, extension, size):
+        self.extension = extension
+        self.size = size
+        self.result = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_parse(self.extension, self.size, self.result, time.perf_counter() - self.started,
+                     failed=exc_type is not None)
+        return False
+
+
+class IngestionQueueCollector:
+    """Reads the PENDING backlog from the database at scrape time (one aggregate query)."""
+
+    def collect(self):
+        from .models import DataSource
+
+        pending = DataSource.objects.filter(status='PENDING').aggregate(
+            depth=Count('id'), oldest=Min('upload_date')
+        )
+        age = (timezone.now() - pending['oldest']).total_seconds() if pending['oldest'] else 0.0
+        depth_metric = GaugeMetricFamily(
+            'metadata_ingestion_queue_depth', 'Data sources waiting in PENDING status'
+        )
+        depth_metric.add_metric([], pending['depth'])
+        yield depth_metric
+        age_metric = GaugeMetricFamily(
+            'metadata_ingestion_oldest_pending_seconds', 'Age of the oldest PENDING data source'
+        )
+        age_metric.add_metric([], age)
+        yield age_metric
+
+
+def render_metrics():
+    """Returns the exposition text for this process (or all workers in multiprocess mode)."""
+    if _multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    scrape_registry = CollectorRegistry(auto_describe=False)
+    scrape_registry.register(IngestionQueueCollector())
+    return generate_latest(registry) + generate_latest(scrape_registry)
+
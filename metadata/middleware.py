@@ -0,0 +1,206 @@
+# metadata/middleware.py
+import re
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoBackendTemplate
+from django.utils.html import escape
+from .db import reset_pinning, wrote_to_primary
+from .metrics import REQUEST_SECONDS, REQUEST_QUERIES, DB_QUERIES
+
+# Per-thread accumulator for the request currently being served
+_state = threading.local()
+
+_NUMBERS_RE = re.compile(r'\b\d+\b')
+_STRINGS_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def _normalize_sql(sql):
+    """Collapses literals so repeated queries that differ only by parameters group together."""
+    return _NUMBERS_RE.sub('?', _STRINGS_RE.sub('?', sql))
+
+
+class RequestStats:
+    """SQL, template and total timings collected for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_sql_time = 0.0
+        self.in_template = False
+        self.statements = Counter()
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def python_time(self, total):
+        # SQL issued lazily while rendering is counted as SQL, not as template time
+        return max(total - self.sql_time - (self.template_time - self.template_sql_time), 0.0)
+
+    def duplicates(self, minimum=2):
+        """Normalised statements executed at least `minimum` times (likely N+1 patterns)."""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= minimum]
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = getattr(_state, 'stats', None)
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.query_count += 1
+        stats.sql_time += elapsed
+        if stats.in_template:
+            stats.template_sql_time += elapsed
+        stats.statements[_normalize_sql(sql)] += 1
+
+
+_original_render = DjangoBackendTemplate.render
+
+
+def _timed_render(self, context=None, request=None):
+    stats = getattr(_state, 'stats', None)
+    if stats is None or stats.in_template:
+        return _original_render(self, context, request)
+    stats.in_template = True
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        stats.template_time += time.perf_counter() - start
+        stats.in_template = False
+
+
+class PerformanceMiddleware:
+    """
+    Records per-request SQL query count, SQL time, template render time and
+    remaining Python time. Results are sent as X-* and Server-Timing headers;
+    with PERF_DEBUG_PANEL enabled, HTML pages also get a small overlay listing
+    repeated queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERF_INSTRUMENTATION', True)
+        self.show_panel = getattr(settings, 'PERF_DEBUG_PANEL', settings.DEBUG)
+        if self.enabled and DjangoBackendTemplate.render is not _timed_render:
+            DjangoBackendTemplate.render = _timed_render
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = _state.stats = RequestStats()
+        wrappers = [connections[alias].execute_wrapper(_record_query) for alias in connections]
+        try:
+            for wrapper in wrappers:
+                wrapper.__enter__()
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+            _state.stats = None
+
+        request.perf_stats = stats
+        total = stats.total_time
+        duplicates = stats.duplicates()
+        response['X-Query-Count'] = str(stats.query_count)
+        response['X-Duplicate-Queries'] = str(sum(count - 1 for _, count in duplicates))
+        response['X-SQL-Time-ms'] = f'{stats.sql_time * 1000:.1f}'
+        response['X-Template-Time-ms'] = f'{stats.template_time * 1000:.1f}'
+        response['X-Python-Time-ms'] = f'{stats.python_time(total) * 1000:.1f}'
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={stats.sql_time * 1000:.1f};desc="{stats.query_count} queries"',
+            f'template;dur={stats.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+        if self.show_panel and self._is_html(response):
+            self._inject_panel(response, stats, total, duplicates)
+        return response
+
+    @staticmethod
+    def _is_html(response):
+        return (
+            not getattr(response, 'streaming', False)
+            and response.get('Content-Type', '').startswith('text/html')
+            and b'</body>' in response.content
+        )
+
+    def _inject_panel(self, response, stats, total, duplicates):
+        rows = ''.join(
+            f'<li><strong>{count}&times;</strong> <code>{escape(sql[:300])}</code></li>'
+            for sql, count in duplicates[:10]
+        )
+        panel = (
+            '<div id="perf-panel" style="position:fixed;bottom:0;right:0;z-index:9999;max-width:50%;'
+            'max-height:40%;overflow:auto;background:#212529;color:#f8f9fa;font-size:12px;padding:6px 10px;">'
+            f'<strong>{stats.query_count} queries</strong> &middot; '
+            f'SQL {stats.sql_time * 1000:.1f} ms &middot; '
+            f'template {stats.template_time * 1000:.1f} ms &middot; '
+            f'python {stats.python_time(total) * 1000:.1f} ms &middot; '
+            f'total {total * 1000:.1f} ms'
+            + (f'<details><summary>Repeated queries</summary><ul>{rows}</ul></details>' if rows else '')
+            + '</div>'
+        )
+        response.content = response.content.replace(b'</body>', panel.encode() + b'</body>', 1)
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = str(len(response.content))
+
+
+class MetricsMiddleware:
+    """
+    Observes request latency per resolved view. Place it before
+    PerformanceMiddleware so the query count that middleware collects is available.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        REQUEST_SECONDS.labels(view, request.method, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        stats = getattr(request, 'perf_stats', None)
+        if stats is not None:
+            REQUEST_QUERIES.labels(view).observe(stats.query_count)
+            DB_QUERIES.labels(view).inc(stats.query_count)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes for the replica router: unsafe requests, and any request
+    that writes, read from the primary, and a short-lived cookie keeps the
+    user's next requests there until replicas have caught up.
+    """
+    cookie_name = 'db_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+        self.enabled = bool(getattr(settings, 'DATABASE_REPLICAS', []))
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        reset_pinning(request.method not in ('GET', 'HEAD', 'OPTIONS') or self.cookie_name in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            if wrote_to_primary():
+                response.set_cookie(self.cookie_name, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        finally:
+            reset_pinning()
+        return response
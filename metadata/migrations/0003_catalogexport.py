@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0002_alter_datasource_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+                ('export_format', models.CharField(max_length=20)),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('output', models.CharField(blank=True, max_length=500)),
+                ('row_counts', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
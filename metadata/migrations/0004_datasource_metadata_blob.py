@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0003_catalogexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasource',
+            name='metadata_digest',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='datasource',
+            name='metadata_size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
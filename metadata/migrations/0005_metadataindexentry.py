@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0004_datasource_metadata_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetadataIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500)),
+                ('key', models.CharField(max_length=500)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('data_source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metadata_index', to='metadata.datasource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['path', 'value'], name='metadata_idx_path_value'), models.Index(fields=['key', 'value'], name='metadata_idx_key_value'), models.Index(fields=['value'], name='metadata_idx_value')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0005_metadataindexentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossaryTaggingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+                ('full', models.BooleanField(default=False)),
+                ('scanned', models.JSONField(default=dict)),
+                ('created', models.IntegerField(default=0)),
+                ('removed', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='tableglossarymapping',
+            name='auto_tagged',
+            field=models.BooleanField(default=False),
+        ),
+    ]
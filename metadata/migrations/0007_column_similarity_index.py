@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0006_glossary_tagging'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColumnSignature',
+            fields=[
+                ('column', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='metadata.column')),
+                ('minhash', models.BinaryField()),
+                ('token_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ColumnLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('column', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='metadata.column')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='metadata_lsh_band_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0007_column_similarity_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='view_definition',
+            field=models.TextField(blank=True, help_text='SQL defining a view or materialized view'),
+        ),
+        migrations.CreateModel(
+            name='ColumnLineage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lineage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='column_lineage', to='metadata.datalineage')),
+                ('source_column', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='downstream_lineage', to='metadata.column')),
+                ('target_column', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upstream_lineage', to='metadata.column')),
+            ],
+            options={
+                'unique_together': {('lineage', 'source_column', 'target_column')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0008_sql_lineage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColumnValueSketch',
+            fields=[
+                ('column', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='value_sketch', serialize=False, to='metadata.column')),
+                ('hashes', models.BinaryField(help_text='Sorted uint64 hashes of the smallest distinct values')),
+                ('sampled_values', models.PositiveIntegerField(default=0)),
+                ('distinct_values', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
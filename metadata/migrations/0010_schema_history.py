@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0009_column_value_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchemaVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('snapshot_digest', models.CharField(blank=True, help_text='Blob holding the full structure at this version', max_length=64)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('data_source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schema_versions', to='metadata.datasource')),
+            ],
+            options={
+                'ordering': ['-version'],
+                'unique_together': {('data_source', 'version')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SchemaChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change_type', models.CharField(choices=[('schema_added', 'Schema Added'), ('schema_removed', 'Schema Removed'), ('table_added', 'Table Added'), ('table_removed', 'Table Removed'), ('table_renamed', 'Table Renamed'), ('column_added', 'Column Added'), ('column_removed', 'Column Removed'), ('column_renamed', 'Column Renamed'), ('column_changed', 'Column Changed')], max_length=50)),
+                ('schema_name', models.CharField(max_length=200)),
+                ('table_name', models.CharField(blank=True, max_length=200)),
+                ('column_name', models.CharField(blank=True, max_length=200)),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('table', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='schema_changes', to='metadata.table')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='metadata.schemaversion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['table', 'version'], name='metadata_change_table_version')],
+            },
+        ),
+    ]
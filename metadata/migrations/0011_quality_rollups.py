@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0010_schema_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataQualityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('checks', models.IntegerField(default=0)),
+                ('passed', models.IntegerField(default=0)),
+                ('failed_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['rule', 'granularity', 'bucket_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DataQualityStatus',
+            fields=[
+                ('rule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_status', serialize=False, to='metadata.dataqualityrule')),
+                ('executed_at', models.DateTimeField()),
+                ('passed', models.BooleanField()),
+                ('failed_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Data quality statuses',
+            },
+        ),
+        migrations.AlterField(
+            model_name='dataqualitycheck',
+            name='executed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='dataqualitycheck',
+            name='rule',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='checks', to='metadata.dataqualityrule'),
+        ),
+        migrations.AddIndex(
+            model_name='dataqualitycheck',
+            index=models.Index(fields=['rule', 'executed_at'], name='metadata_check_rule_time'),
+        ),
+        migrations.AddIndex(
+            model_name='dataqualitycheck',
+            index=models.Index(fields=['executed_at'], name='metadata_check_time'),
+        ),
+        migrations.AddField(
+            model_name='dataqualityrollup',
+            name='rule',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='metadata.dataqualityrule'),
+        ),
+        migrations.AddIndex(
+            model_name='dataqualityrollup',
+            index=models.Index(fields=['granularity', 'bucket_start'], name='metadata_rollup_bucket'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dataqualityrollup',
+            unique_together={('rule', 'granularity', 'bucket_start')},
+        ),
+    ]
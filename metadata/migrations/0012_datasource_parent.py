@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0011_quality_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasource',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='members', to='metadata.datasource'),
+        ),
+    ]
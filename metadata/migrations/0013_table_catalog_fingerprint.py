@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0012_datasource_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='catalog_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
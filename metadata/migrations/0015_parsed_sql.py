@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0014_export_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedSQL',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('parser_version', models.PositiveIntegerField()),
+                ('statements', models.JSONField(default=list)),
+            ],
+        ),
+    ]
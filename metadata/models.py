@@ -1,8 +1,23 @@
 # metadata/models.py
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
+from .blobs import encode_metadata, load_blob, store_blob, summarize_metadata
+
+class DataSourceQuerySet(models.QuerySet):
+    def with_metadata(self):
+        """Loads processed_metadata, which the default manager defers."""
+        return self.defer(None)
+
+
+class DataSourceManager(models.Manager.from_queryset(DataSourceQuerySet)):
+    """Defers processed_metadata so list pages never pull parser output they do not show."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('processed_metadata')
+
 
 class DataSource(models.Model):
     # Unique ID for easy lookup
@@ -14,8 +29,12 @@ class DataSource(models.Model):
     uploaded_file = models.FileField(upload_to='data_source_files/%Y/%m/%d/')
     
     # 2. Field to store the raw, processed metadata from the file
-    # JSONField maps nicely to SQLite's JSON capabilities (since Django 3.1)
+    # JSONField maps nicely to SQLite's JSON capabilities (since Django 3.1).
+    # Large parser output is offloaded to a compressed blob (metadata.blobs) and
+    # this field then only holds a summary; use full_metadata to read everything.
     processed_metadata = models.JSONField(default=dict)
+    metadata_digest = models.CharField(max_length=64, blank=True, default='', editable=False)
+    metadata_size = models.PositiveBigIntegerField(default=0, editable=False)
     
     # Status to track if processing succeeded or failed
     status = models.CharField(
@@ -25,10 +44,66 @@ class DataSource(models.Model):
     )
     
     upload_date = models.DateTimeField(default=timezone.now)
+    # Watermark for incremental catalog exports (metadata.exporting)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set on the per-member sources split out of an uploaded archive (metadata.archives)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='members')
+
+    objects = DataSourceManager()
 
     def __str__(self):
         return self.name
 
+    @property
+    def is_offloaded(self):
+        return bool(self.metadata_digest)
+
+    def set_processed_metadata(self, metadata):
+        """
+        Stores parser output inline when it is small, otherwise writes it to a
+        content-addressed blob and keeps only a summary in the row.
+        """
+        data = encode_metadata(metadata)
+        self.metadata_size = len(data)
+        if len(data) > getattr(settings, 'METADATA_INLINE_MAX_BYTES', 16384):
+            self.metadata_digest = store_blob(data)
+            self.processed_metadata = summarize_metadata(metadata)
+        else:
+            self.metadata_digest = ''
+            self.processed_metadata = metadata
+        self._full_metadata = metadata
+
+    @property
+    def full_metadata(self):
+        """The complete parser output, read from the blob store on first access."""
+        if not hasattr(self, '_full_metadata'):
+            self._full_metadata = (
+                load_blob(self.metadata_digest) if self.metadata_digest else self.processed_metadata
+            )
+        return self._full_metadata
+
+
+class MetadataIndexEntry(models.Model):
+    """
+    One flattened key path (and normalized scalar value) of a source's
+    processed metadata, so sources can be found by tag, column name or value
+    without deserializing JSON. Rows with an empty value record that the path exists.
+    """
+    data_source = models.ForeignKey(DataSource, on_delete=models.CASCADE, related_name='metadata_index')
+    path = models.CharField(max_length=500)
+    key = models.CharField(max_length=500)
+    value = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['path', 'value'], name='metadata_idx_path_value'),
+            models.Index(fields=['key', 'value'], name='metadata_idx_key_value'),
+            models.Index(fields=['value'], name='metadata_idx_value'),
+        ]
+
+    def __str__(self):
+        return f"{self.path}={self.value}" if self.value else self.path
+
 
 class Schema(models.Model):
     """Represents a schema/database within a data source"""
@@ -60,6 +135,9 @@ class Table(models.Model):
     size_bytes = models.BigIntegerField(null=True, blank=True)
     owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='owned_tables')
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    view_definition = models.TextField(blank=True, help_text="SQL defining a view or materialized view")
+    # Digest of the table's catalog entry at the last database crawl; unchanged tables are not re-inspected
+    catalog_fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -100,6 +178,42 @@ class Column(models.Model):
         return f"{self.table.name}.{self.name}"
 
 
+class ColumnSignature(models.Model):
+    """MinHash signature of a column's name, type, description and sampled values (metadata.similarity)"""
+    column = models.OneToOneField(Column, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.BinaryField()
+    token_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"signature of {self.column_id}"
+
+
+class ColumnLSHBucket(models.Model):
+    """One LSH band of a column signature; columns sharing a (band, bucket) are similarity candidates"""
+    column = models.ForeignKey(Column, on_delete=models.CASCADE, related_name='lsh_buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['band', 'bucket'], name='metadata_lsh_band_bucket')]
+
+    def __str__(self):
+        return f"{self.column_id} band {self.band}"
+
+
+class ColumnValueSketch(models.Model):
+    """Bottom-k hashes of a column's sampled distinct values, for join-key inference"""
+    column = models.OneToOneField(Column, on_delete=models.CASCADE, primary_key=True, related_name='value_sketch')
+    hashes = models.BinaryField(help_text="Sorted uint64 hashes of the smallest distinct values")
+    sampled_values = models.PositiveIntegerField(default=0)
+    distinct_values = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"value sketch of {self.column_id}"
+
+
 class DataLineage(models.Model):
     """Represents data lineage between tables"""
     LINEAGE_TYPES = [
@@ -116,6 +230,7 @@ class DataLineage(models.Model):
     transformation_logic = models.TextField(blank=True, help_text="SQL or transformation logic")
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['source_table', 'target_table', 'lineage_type']
@@ -124,6 +239,30 @@ class DataLineage(models.Model):
         return f"{self.source_table} → {self.target_table}"
 
 
+class ColumnLineage(models.Model):
+    """Column-level lineage within a table-level lineage edge"""
+    lineage = models.ForeignKey(DataLineage, on_delete=models.CASCADE, related_name='column_lineage')
+    source_column = models.ForeignKey(Column, on_delete=models.CASCADE, related_name='downstream_lineage')
+    target_column = models.ForeignKey(Column, on_delete=models.CASCADE, related_name='upstream_lineage')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['lineage', 'source_column', 'target_column']
+
+    def __str__(self):
+        return f"{self.source_column_id} → {self.target_column_id}"
+
+
+class ParsedSQL(models.Model):
+    """parse_sql output per distinct SQL text (metadata.lineage), kept so repeat extract_lineage runs skip parsing"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    parser_version = models.PositiveIntegerField()
+    statements = models.JSONField(default=list)
+
+    def __str__(self):
+        return self.digest
+
+
 class DataQualityRule(models.Model):
     """Data quality rules for tables/columns"""
     RULE_TYPES = [
@@ -148,20 +287,67 @@ class DataQualityRule(models.Model):
 
 class DataQualityCheck(models.Model):
     """Results of data quality checks"""
-    rule = models.ForeignKey(DataQualityRule, on_delete=models.CASCADE, related_name='checks')
-    executed_at = models.DateTimeField(auto_now_add=True)
+    # The (rule, executed_at) index below serves rule lookups, so the FK needs no index of its own
+    rule = models.ForeignKey(DataQualityRule, on_delete=models.CASCADE, related_name='checks', db_index=False)
+    executed_at = models.DateTimeField(default=timezone.now)
     passed = models.BooleanField()
     failed_count = models.IntegerField(default=0)
     details = models.TextField(blank=True)
     
     class Meta:
         ordering = ['-executed_at']
+        indexes = [
+            models.Index(fields=['rule', 'executed_at'], name='metadata_check_rule_time'),
+            # Retention deletes by age across all rules
+            models.Index(fields=['executed_at'], name='metadata_check_time'),
+        ]
     
     def __str__(self):
         status = "PASS" if self.passed else "FAIL"
         return f"{self.rule.name} - {status} - {self.executed_at}"
 
 
+class DataQualityStatus(models.Model):
+    """Latest check result per rule, kept current as checks are recorded (metadata.quality)"""
+    rule = models.OneToOneField(DataQualityRule, on_delete=models.CASCADE, primary_key=True, related_name='latest_status')
+    executed_at = models.DateTimeField()
+    passed = models.BooleanField()
+    failed_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Data quality statuses'
+
+    def __str__(self):
+        return f"{self.rule_id} - {'PASS' if self.passed else 'FAIL'} - {self.executed_at}"
+
+
+class DataQualityRollup(models.Model):
+    """Check counts per rule and hour or day (UTC), maintained incrementally and kept after raw checks are pruned"""
+    GRANULARITIES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    rule = models.ForeignKey(DataQualityRule, on_delete=models.CASCADE, related_name='rollups', db_index=False)
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket_start = models.DateTimeField()
+    checks = models.IntegerField(default=0)
+    passed = models.IntegerField(default=0)
+    failed_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['rule', 'granularity', 'bucket_start']
+        unique_together = ['rule', 'granularity', 'bucket_start']
+        indexes = [models.Index(fields=['granularity', 'bucket_start'], name='metadata_rollup_bucket')]
+
+    @property
+    def pass_rate(self):
+        return self.passed / self.checks if self.checks else None
+
+    def __str__(self):
+        return f"{self.rule_id} - {self.granularity} {self.bucket_start:%Y-%m-%d %H:%M}"
+
+
 class Glossary(models.Model):
     """Business glossary terms"""
     term = models.CharField(max_length=200, unique=True)
@@ -185,9 +371,88 @@ class TableGlossaryMapping(models.Model):
     glossary_term = models.ForeignKey(Glossary, on_delete=models.CASCADE)
     table = models.ForeignKey(Table, on_delete=models.CASCADE, null=True, blank=True)
     column = models.ForeignKey(Column, on_delete=models.CASCADE, null=True, blank=True)
+    # Set for mappings suggested by the tag_glossary matcher; re-runs replace only these
+    auto_tagged = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         if self.column:
             return f"{self.glossary_term.term} → {self.column}"
-        return f"{self.glossary_term.term} → {self.table}"
\ No newline at end of file
+        return f"{self.glossary_term.term} → {self.table}"
+
+
+class GlossaryTaggingRun(models.Model):
+    """Completed tag_glossary runs; the latest one is the watermark for incremental runs"""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+    full = models.BooleanField(default=False)
+    scanned = models.JSONField(default=dict)
+    created = models.IntegerField(default=0)
+    removed = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"glossary tagging @ {self.started_at}"
+
+class CatalogExport(models.Model):
+    """Completed catalog exports; each entity's latest gap-free export is its incremental watermark"""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+    export_format = models.CharField(max_length=20)
+    since = models.DateTimeField(null=True, blank=True)
+    output = models.CharField(max_length=500, blank=True)
+    row_counts = models.JSONField(default=dict)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"{self.export_format} export @ {self.started_at}"
+
+
+class SchemaVersion(models.Model):
+    """One change to a data source's structure; every few versions also keep a full snapshot"""
+    data_source = models.ForeignKey(DataSource, on_delete=models.CASCADE, related_name='schema_versions')
+    version = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    snapshot_digest = models.CharField(max_length=64, blank=True,
+                                       help_text="Blob holding the full structure at this version")
+    summary = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-version']
+        unique_together = ['data_source', 'version']
+
+    def __str__(self):
+        return f"{self.data_source.name} v{self.version}"
+
+
+class SchemaChange(models.Model):
+    """A table or column change recorded in a schema version"""
+    CHANGE_TYPES = [
+        ('schema_added', 'Schema Added'),
+        ('schema_removed', 'Schema Removed'),
+        ('table_added', 'Table Added'),
+        ('table_removed', 'Table Removed'),
+        ('table_renamed', 'Table Renamed'),
+        ('column_added', 'Column Added'),
+        ('column_removed', 'Column Removed'),
+        ('column_renamed', 'Column Renamed'),
+        ('column_changed', 'Column Changed'),
+    ]
+
+    version = models.ForeignKey(SchemaVersion, on_delete=models.CASCADE, related_name='changes')
+    table = models.ForeignKey(Table, on_delete=models.SET_NULL, null=True, blank=True, related_name='schema_changes')
+    change_type = models.CharField(max_length=50, choices=CHANGE_TYPES)
+    schema_name = models.CharField(max_length=200)
+    table_name = models.CharField(max_length=200, blank=True)
+    column_name = models.CharField(max_length=200, blank=True)
+    details = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['table', 'version'], name='metadata_change_table_version')]
+
+    def __str__(self):
+        return f"{self.get_change_type_display()}: {self.table_name}.{self.column_name}".rstrip('.')
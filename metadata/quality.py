@@ -0,0 +1,199 @@
+# metadata/quality.py
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .caching import invalidate_instances
+from .models import DataQualityCheck, DataQualityRollup, DataQualityRule, DataQualityStatus
+
+GRANULARITIES = ('hour', 'day')
+DEFAULT_BATCH_SIZE = 5000
+_TRUNCATE = {'hour': TruncHour, 'day': TruncDay}
+
+
+def bucket_start(moment, granularity):
+    """Start of the UTC hour or day containing `moment`."""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == 'day' else moment
+
+
+def record_checks(checks, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bulk-inserts unsaved DataQualityCheck instances and folds them into the
+    latest statuses and rollups in the same transaction. Returns the checks.
+    """
+    checks = list(checks)
+    with transaction.atomic():
+        DataQualityCheck.objects.bulk_create(checks, batch_size=batch_size)
+        update_aggregates(checks, batch_size=batch_size)
+    return checks
+
+
+def update_aggregates(checks, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Adds newly inserted checks to DataQualityStatus and DataQualityRollup.
+    Every check must be counted exactly once: record_checks() and the
+    post_save signal call this for new rows only.
+    """
+    latest, totals = {}, defaultdict(lambda: [0, 0, 0])
+    for check in checks:
+        current = latest.get(check.rule_id)
+        if current is None or check.executed_at >= current.executed_at:
+            latest[check.rule_id] = check
+        for granularity in GRANULARITIES:
+            total = totals[check.rule_id, granularity, bucket_start(check.executed_at, granularity)]
+            total[0] += 1
+            total[1] += check.passed
+            total[2] += check.failed_count
+    if not latest:
+        return
+
+    with transaction.atomic():
+        changed = _update_statuses(latest, batch_size)
+        _update_rollups(totals, batch_size)
+    if changed:
+        rules = DataQualityRule.objects.filter(pk__in=changed).only('id', 'table_id')
+        invalidate_instances(DataQualityRule, list(rules))
+
+
+def _update_statuses(latest, batch_size):
+    # Insert-or-ignore first so every row exists and can be locked, even under concurrent writers
+    DataQualityStatus.objects.bulk_create([
+        DataQualityStatus(rule_id=rule_id, executed_at=check.executed_at, passed=check.passed,
+                          failed_count=check.failed_count)
+        for rule_id, check in latest.items()
+    ], batch_size=batch_size, ignore_conflicts=True)
+    rule_ids, stale, changed = list(latest), [], []
+    for start in range(0, len(rule_ids), batch_size):
+        for status in DataQualityStatus.objects.select_for_update().filter(rule__in=rule_ids[start:start + batch_size]):
+            check = latest[status.rule_id]
+            if (status.executed_at, status.passed, status.failed_count) == (check.executed_at, check.passed, check.failed_count):
+                # Just inserted above, or a repeat of the stored result
+                changed.append(status.rule_id)
+            elif check.executed_at >= status.executed_at:
+                if (status.passed, status.failed_count) != (check.passed, check.failed_count):
+                    changed.append(status.rule_id)
+                status.executed_at, status.passed, status.failed_count = check.executed_at, check.passed, check.failed_count
+                stale.append(status)
+    DataQualityStatus.objects.bulk_update(stale, ['executed_at', 'passed', 'failed_count'], batch_size=batch_size)
+    return changed
+
+
+def _update_rollups(totals, batch_size):
+    DataQualityRollup.objects.bulk_create([
+        DataQualityRollup(rule_id=rule_id, granularity=granularity, bucket_start=start)
+        for rule_id, granularity, start in totals
+    ], batch_size=batch_size, ignore_conflicts=True)
+    rule_ids = list({key[0] for key in totals})
+    starts = {key[2] for key in totals}
+    rows = []
+    for start in range(0, len(rule_ids), batch_size):
+        candidates = DataQualityRollup.objects.select_for_update().filter(
+            rule__in=rule_ids[start:start + batch_size], bucket_start__in=starts
+        )
+        for rollup in candidates:
+            total = totals.get((rollup.rule_id, rollup.granularity, rollup.bucket_start))
+            if total:
+                rollup.checks += total[0]
+                rollup.passed += total[1]
+                rollup.failed_count += total[2]
+                rows.append(rollup)
+    DataQualityRollup.objects.bulk_update(rows, ['checks', 'passed', 'failed_count'], batch_size=batch_size)
+
+
+def rebuild_aggregates(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recomputes every status and rollup from the raw checks still stored.
+    Statuses and rollups with no checks left (pruned) are kept. Returns
+    (statuses, rollups) written.
+    """
+    newest = DataQualityCheck.objects.filter(rule=OuterRef('pk')).order_by('-executed_at', '-pk')
+    with transaction.atomic():
+        latest_ids = list(
+            DataQualityRule.objects.annotate(check_id=Subquery(newest.values('pk')[:1]))
+            .filter(check_id__isnull=False).values_list('check_id', flat=True)
+        )
+        statuses = []
+        for start in range(0, len(latest_ids), batch_size):
+            statuses.extend(
+                DataQualityStatus(rule_id=rule_id, executed_at=executed_at, passed=passed, failed_count=failed_count)
+                for rule_id, executed_at, passed, failed_count in DataQualityCheck.objects
+                .filter(pk__in=latest_ids[start:start + batch_size])
+                .values_list('rule_id', 'executed_at', 'passed', 'failed_count')
+            )
+        DataQualityStatus.objects.bulk_create(
+            statuses, batch_size=batch_size, update_conflicts=True,
+            unique_fields=['rule'], update_fields=['executed_at', 'passed', 'failed_count'],
+        )
+
+        rollups = []
+        for granularity in GRANULARITIES:
+            buckets = (
+                DataQualityCheck.objects.order_by()
+                .annotate(bucket=_TRUNCATE[granularity]('executed_at', tzinfo=dt_timezone.utc))
+                .values('rule_id', 'bucket')
+                .annotate(checks=Count('pk'), passed_checks=Count('pk', filter=Q(passed=True)), failed=Sum('failed_count'))
+            )
+            rollups.extend(
+                DataQualityRollup(rule_id=row['rule_id'], granularity=granularity, bucket_start=row['bucket'],
+                                  checks=row['checks'], passed=row['passed_checks'], failed_count=row['failed'] or 0)
+                for row in buckets.iterator(chunk_size=batch_size)
+            )
+        DataQualityRollup.objects.bulk_create(
+            rollups, batch_size=batch_size, update_conflicts=True,
+            unique_fields=['rule', 'granularity', 'bucket_start'], update_fields=['checks', 'passed', 'failed_count'],
+        )
+    invalidate_instances(DataQualityRule, list(DataQualityRule.objects.only('id', 'table_id')))
+    return len(statuses), len(rollups)
+
+
+def prune_checks(days, hourly_days=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Deletes raw checks older than `days` days, in batches, and with
+    `hourly_days` also hourly rollups older than that. Daily rollups and the
+    latest statuses are never pruned. Returns (checks, hourly rollups) deleted.
+    """
+    now = timezone.now()
+    # Whole days only, so rebuild_aggregates() never sees a partially pruned bucket
+    cutoff = bucket_start(now - timedelta(days=days), 'day')
+    deleted = 0
+    while True:
+        ids = list(DataQualityCheck.objects.filter(executed_at__lt=cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += DataQualityCheck.objects.filter(pk__in=ids).delete()[0]
+    compacted = 0
+    if hourly_days is not None:
+        compacted = DataQualityRollup.objects.filter(
+            granularity='hour', bucket_start__lt=bucket_start(now - timedelta(days=hourly_days), 'hour')
+        ).delete()[0]
+    return deleted, compacted
+
+
+def quality_summary(rules, granularity='day', days=30):
+    """
+    {rule_id: {'status': ..., 'pass_rate': ..., 'buckets': [...]}} for the
+    given rule ids over the last `days` days, read from statuses and rollups
+    only, so its cost does not depend on how many raw checks are stored.
+    """
+    since = bucket_start(timezone.now() - timedelta(days=days), granularity)
+    summary = {rule_id: {'status': None, 'pass_rate': None, 'buckets': []} for rule_id in rules}
+    for status in DataQualityStatus.objects.filter(rule__in=rules):
+        summary[status.rule_id]['status'] = {
+            'executed_at': status.executed_at, 'passed': status.passed, 'failed_count': status.failed_count,
+        }
+    totals = defaultdict(lambda: [0, 0])
+    rollups = DataQualityRollup.objects.filter(rule__in=rules, granularity=granularity, bucket_start__gte=since)
+    for rollup in rollups.order_by('rule', 'bucket_start'):
+        summary[rollup.rule_id]['buckets'].append({
+            'start': rollup.bucket_start, 'checks': rollup.checks, 'pass_rate': rollup.pass_rate,
+            'failed_count': rollup.failed_count,
+        })
+        totals[rollup.rule_id][0] += rollup.checks
+        totals[rollup.rule_id][1] += rollup.passed
+    for rule_id, (checks, passed) in totals.items():
+        summary[rule_id]['pass_rate'] = passed / checks if checks else None
+    return summary
@@ -0,0 +1,50 @@
+# metadata/serializers.py
+from rest_framework import serializers
+from .models import DataSource, Schema, Table, Column, DataLineage, Glossary
+
+
+class DataSourceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataSource
+        # processed_metadata is a summary when metadata_digest is set; the full
+        # parser output is served by the source's metadata/ endpoint
+        fields = ['id', 'uuid', 'name', 'description', 'uploaded_file',
+                  'processed_metadata', 'metadata_digest', 'metadata_size', 'status', 'upload_date']
+        read_only_fields = ['uuid', 'processed_metadata', 'metadata_digest', 'metadata_size',
+                            'status', 'upload_date']
+
+
+class SchemaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Schema
+        fields = ['id', 'name', 'data_source', 'description', 'created_at', 'updated_at']
+
+
+class TableSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Table
+        fields = ['id', 'name', 'schema', 'description', 'table_type', 'row_count',
+                  'size_bytes', 'owner', 'tags', 'view_definition', 'created_at', 'updated_at']
+
+
+class ColumnSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Column
+        fields = ['id', 'name', 'table', 'data_type', 'description', 'is_primary_key',
+                  'is_foreign_key', 'is_nullable', 'default_value', 'max_length',
+                  'precision', 'scale', 'ordinal_position', 'tags', 'created_at', 'updated_at']
+
+
+class DataLineageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DataLineage
+        fields = ['id', 'source_table', 'target_table', 'lineage_type', 'description',
+                  'transformation_logic', 'created_by', 'created_at']
+
+
+class GlossarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Glossary
+        fields = ['id', 'term', 'definition', 'category', 'related_terms', 'owner',
+                  'created_at', 'updated_at']
+
@@ -0,0 +1,29 @@
+# metadata/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, pre_delete
+
+from .caching import invalidate_instances
+from .models import Column, DataLineage, DataQualityCheck, DataQualityRule, DataSource, Schema, Table
+from .quality import update_aggregates
+
+# Models whose changes show up on cached detail pages (see metadata.caching)
+CACHED_MODELS = [Table, Column, DataLineage, DataQualityRule, DataSource, Schema]
+
+
+def invalidate_cached_pages(sender, instance, **kwargs):
+    invalidate_instances(sender, [instance])
+
+
+def aggregate_quality_check(sender, instance, created, **kwargs):
+    # Bulk inserts go through metadata.quality.record_checks instead
+    if created:
+        update_aggregates([instance])
+
+
+def connect():
+    for model in CACHED_MODELS + [get_user_model()]:
+        uid = f'metadata.invalidate.{model._meta.label_lower}'
+        post_save.connect(invalidate_cached_pages, sender=model, dispatch_uid=uid)
+        # pre_delete: lineage and tables still exist to resolve what the page showed
+        pre_delete.connect(invalidate_cached_pages, sender=model, dispatch_uid=uid)
+    post_save.connect(aggregate_quality_check, sender=DataQualityCheck, dispatch_uid='metadata.quality.aggregate')
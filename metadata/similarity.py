@@ -0,0 +1,242 @@
+# metadata/similarity.py
+import hashlib
+import re
+from collections import defaultdict
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+
+from .caching import invalidate_instances
+from .models import Column, ColumnLSHBucket, ColumnSignature, DataLineage
+from .tagging import normalize_text
+
+# 16 bands of 4 rows: pairs above ~0.5 Jaccard similarity share a bucket with high probability.
+# Changing these (or the seed) invalidates stored signatures; rebuild with full=True.
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SEED = 1
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_BATCH_SIZE = 2000
+# Buckets shared by more columns than this (every `id` column, say) carry no signal
+MAX_BUCKET_SIZE = 50
+# Candidates scored per similar_columns() lookup
+MAX_CANDIDATES = 5000
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(SEED)
+_A = _rng.randint(1, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, int(_MERSENNE_PRIME), size=NUM_PERM, dtype=np.uint64)
+_TYPE_RE = re.compile(r'[a-z]+')
+
+
+def column_tokens(name, data_type='', description='', sample_values=()):
+    """
+    Token set for one column: name words and character trigrams (so
+    `cust_id` and `customer_id` overlap), the type family, description
+    words and normalized sample values.
+    """
+    words = normalize_text(name).split()
+    compact = ''.join(words)
+    tokens = {f'w:{word}' for word in words}
+    tokens.update(f'g:{compact[i:i + 3]}' for i in range(max(len(compact) - 2, 1)))
+    family = _TYPE_RE.match((data_type or '').lower())
+    if family:
+        tokens.add(f't:{family.group()}')
+    tokens.update(f'd:{word}' for word in normalize_text(description).split())
+    tokens.update(f'v:{str(value).strip().casefold()}' for value in sample_values if value not in (None, ''))
+    return tokens
+
+
+def minhash(tokens):
+    """NUM_PERM-value MinHash signature (uint64 array) of a token set."""
+    if not tokens:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=4).digest(), 'little') for t in tokens],
+        dtype=np.uint64,
+    )
+    # Universal hashing (a*x + b) mod p; the uint64 overflow is deliberate and harmless here
+    with np.errstate(over='ignore'):
+        permuted = np.bitwise_and((np.outer(hashes, _A) + _B) % _MERSENNE_PRIME, _MAX_HASH)
+    return permuted.min(axis=0)
+
+
+def band_buckets(signature):
+    """Signed 64-bit bucket id per band, suitable for a BigIntegerField."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes(), digest_size=8).digest(),
+            'little', signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def estimate_similarity(first, second):
+    """Estimated Jaccard similarity of the token sets behind two signatures."""
+    return float(np.count_nonzero(first == second)) / NUM_PERM
+
+
+def _signature(value):
+    return np.frombuffer(bytes(value), dtype=np.uint64)
+
+
+def build_index(full=False, sample_values=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Computes signatures and LSH buckets for columns without a signature or
+    changed since theirs was built (all columns with `full`). `sample_values`
+    optionally maps column id to an iterable of sampled values. Returns the
+    number of columns indexed.
+    """
+    sample_values = sample_values or {}
+    columns = Column.objects.order_by('pk')
+    if full:
+        ColumnLSHBucket.objects.all().delete()
+        ColumnSignature.objects.all().delete()
+    else:
+        columns = columns.filter(
+            Q(signature__isnull=True) | Q(updated_at__gt=F('signature__updated_at')) | Q(pk__in=list(sample_values))
+        )
+
+    indexed = 0
+    batch = []
+    for row in columns.values_list('id', 'name', 'data_type', 'description').iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            indexed += _index_batch(batch, sample_values)
+            batch = []
+    if batch:
+        indexed += _index_batch(batch, sample_values)
+    return indexed
+
+
+def _index_batch(rows, sample_values):
+    signatures, buckets = [], []
+    for column_id, name, data_type, description in rows:
+        tokens = column_tokens(name, data_type, description, sample_values.get(column_id, ()))
+        signature = minhash(tokens)
+        signatures.append(ColumnSignature(column_id=column_id, minhash=signature.tobytes(), token_count=len(tokens)))
+        buckets.extend(
+            ColumnLSHBucket(column_id=column_id, band=band, bucket=bucket)
+            for band, bucket in enumerate(band_buckets(signature))
+        )
+    ids = [row[0] for row in rows]
+    with transaction.atomic():
+        ColumnLSHBucket.objects.filter(column_id__in=ids).delete()
+        ColumnSignature.objects.filter(column_id__in=ids).delete()
+        ColumnSignature.objects.bulk_create(signatures)
+        ColumnLSHBucket.objects.bulk_create(buckets, batch_size=len(buckets))
+    return len(rows)
+
+
+def similar_columns(column, threshold=DEFAULT_THRESHOLD, limit=20):
+    """
+    [(column_id, similarity)] for columns sharing at least one LSH bucket with
+    `column` and estimated at or above `threshold`, best first. Answered from
+    the persisted index; a column that is not indexed yet is hashed on the fly.
+    """
+    stored = ColumnSignature.objects.filter(column=column).values_list('minhash', flat=True).first()
+    if stored is not None:
+        signature = _signature(stored)
+    else:
+        signature = minhash(column_tokens(column.name, column.data_type, column.description))
+    bands = Q()
+    for band, bucket in enumerate(band_buckets(signature)):
+        bands |= Q(band=band, bucket=bucket)
+    candidates = list(
+        ColumnLSHBucket.objects.filter(bands).exclude(column=column)
+        .values_list('column_id', flat=True).distinct()[:MAX_CANDIDATES]
+    )
+
+    scored = [
+        (column_id, estimate_similarity(signature, _signature(value)))
+        for column_id, value in ColumnSignature.objects.filter(column__in=candidates).values_list('column_id', 'minhash')
+    ]
+    scored = [pair for pair in scored if pair[1] >= threshold]
+    scored.sort(key=lambda pair: (-pair[1], pair[0]))
+    return scored[:limit]
+
+
+def candidate_pairs(threshold=DEFAULT_THRESHOLD, cross_source=True, max_bucket_size=MAX_BUCKET_SIZE):
+    """
+    Yields (column_a, column_b, similarity) for similar columns in different
+    tables (and, with `cross_source`, different data sources). Only columns
+    sharing a bucket are compared, so the cost grows with the number of
+    columns rather than its square.
+    """
+    columns = {
+        pk: (table_id, source_id)
+        for pk, table_id, source_id in Column.objects.values_list('id', 'table_id', 'table__schema__data_source_id').iterator()
+    }
+    rows = ColumnLSHBucket.objects.order_by('band', 'bucket').values_list('band', 'bucket', 'column_id')
+    pairs = set()
+    current, members = None, []
+    for band, bucket, column_id in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+        if (band, bucket) != current:
+            _collect_pairs(members, max_bucket_size, pairs)
+            current, members = (band, bucket), []
+        members.append(column_id)
+    _collect_pairs(members, max_bucket_size, pairs)
+
+    signatures = {}
+    needed = list({pk for pair in pairs for pk in pair})
+    for start in range(0, len(needed), DEFAULT_BATCH_SIZE):
+        chunk = needed[start:start + DEFAULT_BATCH_SIZE]
+        for column_id, value in ColumnSignature.objects.filter(column__in=chunk).values_list('column_id', 'minhash'):
+            signatures[column_id] = _signature(value)
+
+    for first, second in sorted(pairs):
+        if columns[first][0] == columns[second][0]:
+            continue
+        if cross_source and columns[first][1] == columns[second][1]:
+            continue
+        similarity = estimate_similarity(signatures[first], signatures[second])
+        if similarity >= threshold:
+            yield first, second, similarity
+
+
+def _collect_pairs(members, max_bucket_size, pairs):
+    if 1 < len(members) <= max_bucket_size:
+        members = sorted(members)
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                pairs.add((first, second))
+
+
+def similar_tables(column_pairs, min_shared=2):
+    """
+    Aggregates similar column pairs into table pairs. Returns
+    [(table_a, table_b, shared_columns, mean_similarity)], most shared first.
+    """
+    column_ids = list({pk for first, second, _ in column_pairs for pk in (first, second)})
+    table_of = {}
+    for start in range(0, len(column_ids), DEFAULT_BATCH_SIZE):
+        chunk = column_ids[start:start + DEFAULT_BATCH_SIZE]
+        table_of.update(Column.objects.filter(pk__in=chunk).values_list('id', 'table_id'))
+    totals = defaultdict(lambda: [0, 0.0])
+    for first, second, similarity in column_pairs:
+        key = tuple(sorted((table_of[first], table_of[second])))
+        totals[key][0] += 1
+        totals[key][1] += similarity
+    tables = [
+        (a, b, shared, round(total / shared, 3))
+        for (a, b), (shared, total) in totals.items() if shared >= min_shared
+    ]
+    tables.sort(key=lambda item: (-item[2], -item[3]))
+    return tables
+
+
+def propose_lineage(table_pairs, created_by=None):
+    """Records similar table pairs as 'manual' lineage suggestions. Returns rows submitted."""
+    edges = [
+        DataLineage(
+            source_table_id=a, target_table_id=b, lineage_type='manual', created_by=created_by,
+            description=f"Suggested duplicate: {shared} similar columns (mean similarity {score})",
+        )
+        for a, b, shared, score in table_pairs
+    ]
+    DataLineage.objects.bulk_create(edges, ignore_conflicts=True)
+    invalidate_instances(DataLineage, edges)
+    return len(edges)
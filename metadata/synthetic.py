@@ -0,0 +1,294 @@
+# metadata/synthetic.py
+import random
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from .models import (
+    DataSource, Schema, Table, Column, DataLineage,
+    Glossary, DataQualityRule, DataQualityCheck
+)
+from .indexing import index_metadata
+from .quality import record_checks
+
+BATCH_SIZE = 2000
+DATA_TYPES = ['INTEGER', 'BIGINT', 'VARCHAR(255)', 'TEXT', 'BOOLEAN', 'DATE', 'TIMESTAMP', 'DECIMAL(12,2)', 'DOUBLE']
+WORDS = [
+    'customer', 'order', 'invoice', 'sample', 'experiment', 'measurement', 'cell', 'image',
+    'protein', 'gene', 'patient', 'session', 'event', 'device', 'run', 'batch', 'result',
+    'plate', 'well', 'channel', 'stage', 'marker', 'region', 'signal', 'label',
+]
+
+
+def _name(rng, index, parts=2):
+    return '_'.join(rng.choice(WORDS) for _ in range(parts)) + f'_{index}'
+
+
+LINEAGE_SHAPES = ['random', 'chain', 'tree', 'layered', 'hub']
+
+
+def lineage_edges(table_ids, count, shape='random', fanout=3, layers=5, rng=None):
+    """
+    Returns up to `count` distinct (source_id, target_id) pairs shaped like:
+      random  - uniformly random pairs
+      chain   - long pipelines t0 -> t1 -> t2 ...
+      tree    - each table feeds `fanout` children (deep fan-out)
+      layered - a DAG of `layers` stages, edges only go to the next stage
+      hub     - preferential attachment: a few tables feed most others
+    """
+    rng = rng or random.Random(0)
+    n = len(table_ids)
+    edges = set()
+    if n < 2 or count <= 0:
+        return edges
+
+    if shape == 'chain':
+        for i in range(min(count, n - 1)):
+            edges.add((table_ids[i], table_ids[i + 1]))
+    elif shape == 'tree':
+        for child in range(1, n):
+            if len(edges) >= count:
+                break
+            edges.add((table_ids[(child - 1) // max(fanout, 1)], table_ids[child]))
+    elif shape == 'layered':
+        size = max(n // max(layers, 2), 1)
+        stages = [table_ids[i:i + size] for i in range(0, n, size)]
+        attempts = 0
+        while len(edges) < count and attempts < count * 5 and len(stages) > 1:
+            attempts += 1
+            stage = rng.randrange(len(stages) - 1)
+            edges.add((rng.choice(stages[stage]), rng.choice(stages[stage + 1])))
+    elif shape == 'hub':
+        # Sources are drawn from the endpoints of existing edges, so popular tables get more popular
+        endpoints = [table_ids[0]]
+        attempts = 0
+        while len(edges) < count and attempts < count * 5:
+            attempts += 1
+            source = rng.choice(endpoints)
+            target = rng.choice(table_ids)
+            if source != target and (source, target) not in edges:
+                edges.add((source, target))
+                endpoints.extend((source, target))
+    else:
+        attempts = 0
+        while len(edges) < count and attempts < count * 5:
+            attempts += 1
+            edges.add(tuple(rng.sample(table_ids, 2)))
+    return edges
+
+
+def generate_catalog(sources=2, schemas_per_source=2, tables_per_schema=25, columns_per_table=12,
+                     lineage_edges_count=100, lineage_shape='random', glossary_terms=50,
+                     rules_per_table=1, checks_per_rule=2, owners=5, seed=0):
+    """
+    Bulk-creates a synthetic catalog and returns a dict of row counts.
+    Objects are inserted with bulk_create, so generation cost grows with the
+    number of INSERT batches rather than the number of rows.
+    """
+    rng = random.Random(seed)
+    with transaction.atomic():
+        owner_ids = [
+            User.objects.get_or_create(username=f'synthetic_owner_{i}')[0].pk
+            for i in range(owners)
+        ]
+        data_sources = DataSource.objects.bulk_create([
+            DataSource(name=f'source_{i}', description=f'Synthetic source {i}',
+                       uploaded_file=f'synthetic/source_{i}.csv', status='SUCCESS',
+                       processed_metadata={'file_type': 'Synthetic'})
+            for i in range(sources)
+        ], batch_size=BATCH_SIZE)
+        index_metadata((ds.pk, ds.processed_metadata) for ds in data_sources)
+
+        Schema.objects.bulk_create([
+            Schema(name=f'schema_{j}', data_source=ds)
+            for ds in data_sources for j in range(schemas_per_source)
+        ], batch_size=BATCH_SIZE)
+        schema_ids = list(Schema.objects.filter(data_source__in=data_sources).values_list('id', flat=True))
+
+        Table.objects.bulk_create([
+            Table(name=_name(rng, k), schema_id=schema_id, description=f'Synthetic table {k}',
+                  row_count=rng.randint(0, 10 ** 7), size_bytes=rng.randint(0, 10 ** 10),
+                  tags=','.join(rng.sample(WORDS, 2)),
+                  owner_id=rng.choice(owner_ids) if owner_ids else None)
+            for schema_id in schema_ids for k in range(tables_per_schema)
+        ], batch_size=BATCH_SIZE)
+        table_ids = list(Table.objects.filter(schema_id__in=schema_ids).values_list('id', flat=True))
+
+        columns = []
+        for table_id in table_ids:
+            for position in range(columns_per_table):
+                columns.append(Column(
+                    name='id' if position == 0 else _name(rng, position, parts=1),
+                    table_id=table_id, data_type=rng.choice(DATA_TYPES),
+                    is_primary_key=position == 0, is_nullable=position != 0,
+                    ordinal_position=position,
+                ))
+            if len(columns) >= BATCH_SIZE * 10:
+                Column.objects.bulk_create(columns, batch_size=BATCH_SIZE)
+                columns = []
+        Column.objects.bulk_create(columns, batch_size=BATCH_SIZE)
+
+        edges = lineage_edges(table_ids, lineage_edges_count, lineage_shape, rng=rng)
+        DataLineage.objects.bulk_create([
+            DataLineage(source_table_id=s, target_table_id=t, lineage_type='etl')
+            for s, t in edges
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        Glossary.objects.bulk_create([
+            Glossary(term=f'{rng.choice(WORDS)} term {i}', definition=f'Synthetic definition {i}',
+                     category=rng.choice(WORDS), owner_id=rng.choice(owner_ids) if owner_ids else None)
+            for i in range(glossary_terms)
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+        term_ids = list(Glossary.objects.values_list('id', flat=True))
+        if len(term_ids) > 1:
+            # One symmetric related-term pair per generated term
+            Relation = Glossary.related_terms.through
+            pairs = {tuple(rng.sample(term_ids, 2)) for _ in range(glossary_terms)}
+            Relation.objects.bulk_create([
+                Relation(from_glossary_id=a, to_glossary_id=b)
+                for x, y in pairs for a, b in ((x, y), (y, x))
+            ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        DataQualityRule.objects.bulk_create([
+            DataQualityRule(name=f'rule_{r}', table_id=table_id, rule_type='not_null',
+                            rule_definition='id IS NOT NULL')
+            for table_id in table_ids for r in range(rules_per_table)
+        ], batch_size=BATCH_SIZE)
+        rule_ids = list(DataQualityRule.objects.filter(table_id__in=table_ids).values_list('id', flat=True))
+        # One check per rule per hour, newest now
+        now = timezone.now()
+        record_checks([
+            DataQualityCheck(rule_id=rule_id, executed_at=now - timedelta(hours=hour),
+                             passed=rng.random() > 0.1, failed_count=rng.randint(0, 5))
+            for rule_id in rule_ids for hour in range(checks_per_rule)
+        ], batch_size=BATCH_SIZE)
+
+    return {
+        'sources': len(data_sources),
+        'schemas': len(schema_ids),
+        'tables': len(table_ids),
+        'columns': len(table_ids) * columns_per_table,
+        'lineage': len(edges),
+        'glossary': glossary_terms,
+        'quality_rules': len(rule_ids),
+        'quality_checks': len(rule_ids) * checks_per_rule,
+    }
+
+
+# --- Synthetic metadata files for parser benchmarks ---
+
+FILE_FORMATS = ['json', 'csv', 'txt', 'xlsx', 'xml', 'mets', 'tei', 'marc', 'rdf', 'ttl', 'nt']
+
+
+def _records(rng):
+    """Endless stream of flat, realistic-looking metadata records."""
+    index = 0
+    while True:
+        yield {
+            'id': index,
+            'sample_id': f'S{index:08d}',
+            'title': f'{rng.choice(WORDS)} {rng.choice(WORDS)} {index}',
+            'creator': rng.choice(WORDS).title(),
+            'value': round(rng.uniform(-1000, 1000), 4),
+            'count': rng.randint(0, 10 ** 6),
+            'flag': rng.random() > 0.5,
+            'date': f'20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+        }
+        index += 1
+
+
+def _fill(target_bytes, header, render, footer, rng):
+    parts, size = [header], len(header)
+    for record in _records(rng):
+        if size >= target_bytes:
+            break
+        chunk = render(record)
+        parts.append(chunk)
+        size += len(chunk)
+    parts.append(footer)
+    return ''.join(parts).encode('utf-8')
+
+
+def _xlsx(target_bytes, rng):
+    import io
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet_index in range(3):
+        sheet = workbook.create_sheet(f'sheet_{sheet_index}')
+        records = _records(rng)
+        first = next(records)
+        sheet.append(list(first))
+        # Roughly 7 compressed bytes per cell; split the budget over three sheets
+        for _ in range(max(1, target_bytes // (3 * 7 * len(first)))):
+            sheet.append(list(next(records).values()))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_file(file_format, target_bytes, seed=0):
+    """Returns roughly `target_bytes` of synthetic content in the given format."""
+    rng = random.Random(seed)
+    fields = ['id', 'sample_id', 'title', 'creator', 'value', 'count', 'flag', 'date']
+    if file_format in ('csv', 'txt'):
+        return _fill(target_bytes, ','.join(fields) + '\n',
+                     lambda r: ','.join(str(r[f]) for f in fields) + '\n', '', rng)
+    if file_format == 'json':
+        import json
+        return _fill(target_bytes, '{"records": [',
+                     lambda r: json.dumps(r) + ',', '{}]}', rng)
+    if file_format == 'xml':
+        return _fill(target_bytes, '<?xml version="1.0"?>\n<dataset>\n',
+                     lambda r: '<record>' + ''.join(f'<{f}>{r[f]}</{f}>' for f in fields) + '</record>\n',
+                     '</dataset>\n', rng)
+    if file_format == 'mets':
+        return _fill(
+            target_bytes,
+            '<?xml version="1.0"?>\n<mets:mets xmlns:mets="http://www.loc.gov/METS/" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/">\n',
+            lambda r: (f'<mets:dmdSec ID="dmd{r["id"]}"><mets:mdWrap MDTYPE="DC"><mets:xmlData>'
+                       f'<dc:title>{r["title"]}</dc:title><dc:creator>{r["creator"]}</dc:creator>'
+                       f'<dc:date>{r["date"]}</dc:date></mets:xmlData></mets:mdWrap></mets:dmdSec>\n'),
+            '</mets:mets>\n', rng)
+    if file_format == 'tei':
+        return _fill(
+            target_bytes,
+            '<?xml version="1.0"?>\n<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc>'
+            '<titleStmt><title>Synthetic corpus</title></titleStmt></fileDesc></teiHeader><text><body>\n',
+            lambda r: f'<p n="{r["id"]}"><persName>{r["creator"]}</persName> {r["title"]} <date>{r["date"]}</date></p>\n',
+            '</body></text></TEI>\n', rng)
+    if file_format == 'marc':
+        return _fill(
+            target_bytes,
+            '<?xml version="1.0"?>\n<collection xmlns="http://www.loc.gov/MARC21/slim">\n',
+            lambda r: (f'<record><leader>00000nam a2200000 a 4500</leader>'
+                       f'<controlfield tag="001">{r["sample_id"]}</controlfield>'
+                       f'<datafield tag="100" ind1="1" ind2=" "><subfield code="a">{r["creator"]}</subfield></datafield>'
+                       f'<datafield tag="245" ind1="0" ind2="0"><subfield code="a">{r["title"]}</subfield></datafield>'
+                       f'</record>\n'),
+            '</collection>\n', rng)
+    if file_format == 'rdf':
+        return _fill(
+            target_bytes,
+            '<?xml version="1.0"?>\n<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/">\n',
+            lambda r: (f'<rdf:Description rdf:about="http://example.org/sample/{r["id"]}">'
+                       f'<dc:title>{r["title"]}</dc:title><dc:creator>{r["creator"]}</dc:creator>'
+                       f'<dc:date>{r["date"]}</dc:date></rdf:Description>\n'),
+            '</rdf:RDF>\n', rng)
+    if file_format == 'ttl':
+        return _fill(
+            target_bytes, '@prefix dc: <http://purl.org/dc/elements/1.1/> .\n@prefix ex: <http://example.org/sample/> .\n',
+            lambda r: f'ex:{r["id"]} dc:title "{r["title"]}" ; dc:creator "{r["creator"]}" ; dc:date "{r["date"]}" .\n',
+            '', rng)
+    if file_format == 'nt':
+        return _fill(
+            target_bytes, '',
+            lambda r: ''.join(
+                f'<http://example.org/sample/{r["id"]}> <http://purl.org/dc/elements/1.1/{f}> "{r[f]}" .\n'
+                for f in ('title', 'creator', 'date')
+            ), '', rng)
+    if file_format == 'xlsx':
+        return _xlsx(target_bytes, rng)
+    raise ValueError(f"Unknown synthetic file format: {file_format}")
@@ -0,0 +1,169 @@
+# metadata/tagging.py
+import re
+from collections import deque
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Column, Glossary, GlossaryTaggingRun, Table, TableGlossaryMapping
+
+DEFAULT_BATCH_SIZE = 5000
+
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_text(text):
+    """
+    Case-folded words separated and padded by single spaces, so 'CustomerID',
+    'customer_id' and 'Customer-ID' all become ' customer id '. The padding
+    makes every pattern match on word boundaries only.
+    """
+    words = _NON_WORD_RE.sub(' ', _CAMEL_RE.sub(' ', text or '')).casefold().split()
+    return f" {' '.join(words)} " if words else ''
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over normalized glossary terms. match() finds
+    every term occurring in a text in one pass over its characters, however
+    many terms there are.
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for term_id, term in terms:
+            pattern = normalize_text(term)
+            if pattern:
+                self._add(pattern, term_id)
+        self._build()
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def _add(self, pattern, term_id):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] += (term_id,)
+
+    def _build(self):
+        # Breadth-first, so each node's failure link points at an already-finished node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def match(self, text):
+        """Ids of all terms found in an already-normalized text."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found, node = set(), 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+def _related_terms():
+    related = {}
+    for from_id, to_id in Glossary.related_terms.through.objects.values_list('from_glossary_id', 'to_glossary_id'):
+        related.setdefault(from_id, set()).add(to_id)
+    return related
+
+
+def tag_glossary(full=False, expand_related=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Suggests TableGlossaryMapping rows by matching glossary terms against
+    table and column names and descriptions.
+
+    Incremental runs (the default once a run exists) rescan tables and
+    columns changed since the last run against every term, and everything
+    else against only the terms added or edited since then. Earlier
+    suggestions for those objects and terms are replaced; manual mappings
+    are never touched or duplicated. With `expand_related`, a match also
+    suggests the term's related_terms; suggestions that survive from earlier
+    runs are not duplicated. Returns the GlossaryTaggingRun.
+    """
+    started = timezone.now()
+    last_run = None if full else GlossaryTaggingRun.objects.first()
+    since = last_run.started_at if last_run else None
+
+    terms = list(Glossary.objects.values_list('id', 'term', 'updated_at'))
+    changed_terms = {pk for pk, _, updated in terms if since is None or updated > since}
+    all_terms = TermMatcher((pk, term) for pk, term, _ in terms)
+    new_terms = TermMatcher((pk, term) for pk, term, _ in terms if pk in changed_terms)
+    related = _related_terms() if expand_related else {}
+
+    stats = {'tables': 0, 'columns': 0, 'terms': len(changed_terms)}
+    pending, created = [], 0
+
+    def suggest(term_ids, table_id, column_id=None):
+        nonlocal created, pending
+        for term_id in list(term_ids):
+            term_ids |= related.get(term_id, set())
+        for term_id in term_ids:
+            key = (term_id, table_id, column_id)
+            if key not in existing:
+                existing.add(key)
+                pending.append(TableGlossaryMapping(
+                    glossary_term_id=term_id, table_id=table_id, column_id=column_id, auto_tagged=True
+                ))
+        if len(pending) >= batch_size:
+            TableGlossaryMapping.objects.bulk_create(pending, batch_size=batch_size)
+            created += len(pending)
+            pending = []
+
+    def scan(queryset, fields, key):
+        # Unchanged objects only need the new terms; without any, only changed objects are read
+        if since is not None and not new_terms:
+            queryset = queryset.filter(updated_at__gt=since)
+        for row in queryset.values_list(*fields, 'updated_at').iterator(chunk_size=batch_size):
+            *ids, name, description, updated = row
+            matcher = all_terms if since is None or updated > since else new_terms
+            matches = matcher.match(normalize_text(name) + '\n' + normalize_text(description))
+            stats[key] += 1
+            if matches:
+                suggest(matches, *ids)
+
+    with transaction.atomic():
+        stale = TableGlossaryMapping.objects.filter(auto_tagged=True)
+        if since is not None:
+            stale = stale.filter(
+                Q(glossary_term__in=changed_terms)
+                | Q(column__isnull=True, table__updated_at__gt=since)
+                | Q(column__updated_at__gt=since)
+            )
+        removed = stale.delete()[0]
+        # Manual mappings, and suggestions kept from earlier runs (such as related
+        # terms matched through an unchanged term), are skipped rather than re-created
+        existing = set(TableGlossaryMapping.objects.values_list('glossary_term_id', 'table_id', 'column_id'))
+
+        if all_terms:
+            scan(Table.objects.order_by('pk'), ['id', 'name', 'description'], 'tables')
+            scan(Column.objects.order_by('pk'), ['table_id', 'id', 'name', 'description'], 'columns')
+        if pending:
+            TableGlossaryMapping.objects.bulk_create(pending, batch_size=batch_size)
+            created += len(pending)
+
+        return GlossaryTaggingRun.objects.create(
+            started_at=started, full=since is None, scanned=stats, created=created, removed=removed
+        )
@@ -0,0 +1,333 @@
+# metadata/tests.py
+import io
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+import openpyxl
+from prometheus_client import REGISTRY
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import get_resolver, reverse
+
+from .budgets import measure_routes
+from .db import ReplicaRouter, reset_pinning
+from .excel import load_excel_metadata, stream_xlsx_metadata
+from .history import ingest_structure, structure_at, structure_from_metadata
+from .indexing import TRUNCATED_PATH, flatten_metadata
+from .lineage import extract_lineage, parse_sql
+from .models import (
+    Column, DataLineage, DataSource, Glossary, MetadataIndexEntry, Schema, SchemaVersion, Table,
+    TableGlossaryMapping,
+)
+from .synthetic import generate_catalog
+from .tagging import tag_glossary
+from .utils import parse_file_metadata, parse_tabular_metadata
+
+
+class QueryBudgetTests(TestCase):
+    """Every named route stays within its QUERY_BUDGETS entry on a synthetic catalog."""
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_catalog(sources=3, schemas_per_source=2, tables_per_schema=5, columns_per_table=8,
+                         lineage_edges_count=50, glossary_terms=20)
+
+    def setUp(self):
+        # Cached pages are keyed on primary keys, which each test database reuses
+        cache.clear()
+
+    def test_routes_within_budget(self):
+        for name, url, used, budget, status_code, cached in measure_routes(
+            self.client, get_resolver('metadata.urls').url_patterns
+        ):
+            with self.subTest(route=name, url=url):
+                self.assertIsNotNone(budget, "no budget declared")
+                self.assertLess(status_code, 400)
+                self.assertLessEqual(used, budget)
+                if cached is not None:
+                    self.assertEqual(cached, 0, "cached repeat issued queries")
+
+
+class BlobPruneTests(TestCase):
+    def test_prune_keeps_schema_snapshots(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(METADATA_BLOB_ROOT=root):
+            source = DataSource.objects.create(name='orders', uploaded_file='orders.csv')
+            for names in (['id'], ['id', 'total']):
+                metadata = {'file_type': 'Tabular/CSV', 'columns': [{'name': n, 'data_type': 'INTEGER'} for n in names]}
+                ingest_structure(source, structure_from_metadata(metadata, 'orders', 'public'))
+
+            call_command('offload_metadata', prune=True, stdout=io.StringIO())
+
+            self.assertEqual(set(structure_at(source, 2)['public']['orders']), {'id', 'total'})
+
+
+class MetadataIndexTests(TestCase):
+    def test_wide_files_index_every_column_name(self):
+        names = [f'col{i}' for i in range(151)]
+        entries = flatten_metadata({'column_names': names, 'columns': [{'name': n} for n in names]},
+                                   max_values_per_path=100)
+        for path in ('column_names[]', 'columns[].name'):
+            self.assertEqual({v for p, _, v in entries if p == path and v}, set(names))
+        self.assertFalse([e for e in entries if e[0] == TRUNCATED_PATH])
+
+    def test_capped_paths_keep_first_values_and_record_truncation(self):
+        entries = flatten_metadata({'tags': [f'tag{i}' for i in range(150)]}, max_values_per_path=100)
+        values = {v for p, _, v in entries if p == 'tags[]' and v}
+        self.assertEqual(values, {f'tag{i}' for i in range(100)})
+        self.assertIn((TRUNCATED_PATH, TRUNCATED_PATH, 'tags[]'), entries)
+
+
+class IncrementalExportTests(TestCase):
+    def export(self, root, *args):
+        call_command('export_catalog', root, *args, stdout=io.StringIO())
+        with open(f'{root}/columns.ndjson') as columns, open(f'{root}/sources.ndjson') as sources, \
+                open(f'{root}/lineage.ndjson') as lineage:
+            return len(columns.readlines()), len(sources.readlines()), len(lineage.readlines())
+
+    def test_watermarks_are_per_entity(self):
+        generate_catalog(sources=2, schemas_per_source=1, tables_per_schema=3, columns_per_table=4,
+                         lineage_edges_count=4, glossary_terms=2)
+        with tempfile.TemporaryDirectory() as root:
+            call_command('export_catalog', root, '--entities', 'tables', stdout=io.StringIO())
+            # Columns, sources and lineage were never exported, so they go out in full
+            self.assertEqual(self.export(root, '--incremental'),
+                             (Column.objects.count(), DataSource.objects.count(), DataLineage.objects.count()))
+            self.assertEqual(self.export(root, '--incremental'), (0, 0, 0))
+
+            source, edge = DataSource.objects.first(), DataLineage.objects.first()
+            source.description = 'edited'
+            source.save()
+            edge.description = 'edited'
+            edge.save()
+            self.assertEqual(self.export(root, '--incremental'), (0, 1, 1))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        reset_pinning()
+
+    def test_reads_use_replicas_outside_transactions(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Table), 'replica_1')
+
+    def test_reads_stay_on_primary_inside_transactions(self):
+        with transaction.atomic():
+            self.assertEqual(ReplicaRouter().db_for_read(Table), 'default')
+
+
+class AutocompleteTests(TestCase):
+    def test_user_choices_require_authentication(self):
+        user = User.objects.create_user('curator', password='secret')
+        url = reverse('autocomplete', args=['users'])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(user)
+        response = self.client.get(url, {'q': 'cur'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([o['text'] for o in response.json()['results']], ['curator'])
+
+
+class GlossaryTaggingTests(TestCase):
+    def test_incremental_related_run_does_not_duplicate_suggestions(self):
+        source = DataSource.objects.create(name='shop', uploaded_file='shop.csv')
+        table = Table.objects.create(name='customer_orders', schema=Schema.objects.create(name='public', data_source=source))
+        customer = Glossary.objects.create(term='customer', definition='A buyer')
+        client = Glossary.objects.create(term='client', definition='See customer')
+        customer.related_terms.add(client)
+
+        tag_glossary(expand_related=True)
+        customer.definition = 'Someone who buys'
+        customer.save()
+        tag_glossary(expand_related=True)
+
+        mappings = TableGlossaryMapping.objects.filter(table=table, column__isnull=True)
+        self.assertCountEqual(mappings.values_list('glossary_term__term', flat=True), ['customer', 'client'])
+
+
+class ExcelStreamingTests(SimpleTestCase):
+    def test_streaming_matches_full_load_when_data_starts_below_row_one(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append([])
+        sheet.append([])
+        sheet.append([None, 'a', 'b'])
+        for number in range(57):
+            sheet.append([None, number, number * 2])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        streamed = stream_xlsx_metadata(content.getvalue())['sheets']['Sheet']
+        loaded = load_excel_metadata(content.getvalue())['sheets']['Sheet']
+        for key in ('column_names', 'row_count'):
+            self.assertEqual(streamed[key], loaded[key])
+        self.assertEqual([c['data_type'] for c in streamed['columns']], [c['data_type'] for c in loaded['columns']])
+
+
+class IngestionMetricsTests(SimpleTestCase):
+    def test_archive_bytes_are_counted_once(self):
+        member = b'id,name\n1,a\n2,b\n'
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('people.csv', member)
+
+        def counted(label):
+            return REGISTRY.get_sample_value('metadata_ingested_bytes_total', {'format': label}) or 0
+
+        before = counted('zip'), counted('csv')
+        parse_file_metadata(SimpleUploadedFile('people.zip', content.getvalue()))
+        self.assertEqual((counted('zip'), counted('csv')), (before[0], before[1] + len(member)))
+
+
+class BulkUpsertTests(TestCase):
+    def setUp(self):
+        source = DataSource.objects.create(name='shop', uploaded_file='shop.csv')
+        self.schema = Schema.objects.create(name='public', data_source=source)
+        Table.objects.create(name='orders', schema=self.schema)
+        self.client.force_login(User.objects.create_user('loader'))
+
+    def batch(self, items):
+        return self.client.post(reverse('table-batch'), items, content_type='application/json')
+
+    def test_repeated_unique_key_is_rejected(self):
+        items = [{'name': 'customers', 'schema': self.schema.pk}, {'name': 'customers', 'schema': self.schema.pk}]
+        response = self.batch(items)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+        self.assertFalse(Table.objects.filter(name='customers').exists())
+
+    def test_anonymous_batch_is_refused(self):
+        self.client.logout()
+        response = self.batch([{'name': 'customers', 'schema': self.schema.pk}])
+        self.assertIn(response.status_code, (401, 403))
+        self.assertFalse(Table.objects.filter(name='customers').exists())
+
+    def test_reports_rows_written(self):
+        items = [{'name': name, 'schema': self.schema.pk, 'description': 'x'} for name in ('orders', 'customers')]
+        self.assertEqual(self.batch(items).json(), {'received': 2, 'upserted': 2})
+        self.assertEqual(Table.objects.filter(schema=self.schema, description='x').count(), 2)
+
+
+class TypeInferenceTests(SimpleTestCase):
+    def test_sampled_types_are_reproducible(self):
+        rows = [f'{n}.5' if n % 200 == 199 else str(n) for n in range(5000)]
+        content = ('amount\n' + '\n'.join(rows) + '\n').encode()
+        parses = [parse_tabular_metadata(content, 'csv', sample_size=100, chunk_size=500)['columns'] for _ in range(8)]
+        self.assertTrue(all(columns == parses[0] for columns in parses))
+
+
+class TemporaryStorageMixin:
+    """Points uploads and the blob store at a directory removed after each test."""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media.name, METADATA_BLOB_ROOT=self.media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class UploadTests(TemporaryStorageMixin, TestCase):
+
+    def archive(self):
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, 'w') as archive:
+            archive.writestr('people.csv', 'id,name\n1,a\n')
+            archive.writestr('orders.csv', 'id,total\n1,2.5\n')
+        return SimpleUploadedFile('shop.zip', content.getvalue())
+
+    def assert_ingested(self, source):
+        self.assertEqual(source.members.count(), 2)
+        for member in source.members.all():
+            self.assertEqual(member.status, 'SUCCESS')
+            self.assertTrue(MetadataIndexEntry.objects.filter(data_source=member).exists())
+            self.assertTrue(SchemaVersion.objects.filter(data_source=member).exists())
+        self.assertEqual(set(Table.objects.filter(schema__data_source__parent=source).values_list('name', flat=True)),
+                         {'people', 'orders'})
+
+    def test_upload_page_splits_indexes_and_versions_archives(self):
+        response = self.client.post(reverse('data_source_upload'),
+                                    {'name': 'shop', 'uploaded_file': self.archive(), 'split_archive': 'on'})
+        source = DataSource.objects.get(name='shop')
+        self.assertRedirects(response, reverse('data_source_detail', args=[source.pk]))
+        self.assert_ingested(source)
+
+    def test_api_upload_is_processed(self):
+        self.client.force_login(User.objects.create_user('loader'))
+        response = self.client.post(reverse('datasource-list') + '?split_archive=1',
+                                    {'name': 'shop', 'uploaded_file': self.archive()})
+        self.assertEqual(response.status_code, 201)
+        self.assert_ingested(DataSource.objects.get(name='shop'))
+
+
+class SqlLineageParserTests(SimpleTestCase):
+    def test_target_follows_the_with_list(self):
+        [statement] = parse_sql(
+            "WITH x AS (SELECT id FROM raw.events WHERE id > 0) INSERT INTO clean.events SELECT id FROM x"
+        )
+        self.assertEqual(statement['target'], 'clean.events')
+        self.assertEqual(statement['sources'], ['raw.events'])
+
+    def test_function_keyword_arguments_are_not_columns(self):
+        [statement] = parse_sql("INSERT INTO stats (y) SELECT EXTRACT(year FROM e.created) FROM raw.events e")
+        self.assertEqual(statement['columns'], [['y', [['raw.events', 'created']]]])
+
+
+class LineageExtractionTests(TestCase):
+    def test_repeat_runs_reuse_stored_parses(self):
+        generate_catalog(sources=1, schemas_per_source=1, tables_per_schema=3, columns_per_table=3,
+                         lineage_edges_count=0, glossary_terms=0)
+        source, target = Table.objects.order_by('pk')[:2]
+        DataLineage.objects.create(source_table=source, target_table=target,
+                                   transformation_logic=f"INSERT INTO {target.name} SELECT * FROM {source.name}")
+        first = extract_lineage()
+        cache.clear()
+        second = extract_lineage()
+        self.assertEqual((first['cache_hits'], second['cache_hits']), (0, first['unique']))
+
+
+class IngestStructureTests(TemporaryStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = DataSource.objects.create(name='orders', uploaded_file='orders.csv')
+        self.manual = Table.objects.create(name='notes', schema=Schema.objects.create(name='default', data_source=self.source))
+        metadata = {'file_type': 'Tabular/CSV', 'columns': [{'name': 'id', 'data_type': 'INTEGER'}]}
+        self.source.set_processed_metadata(metadata)
+        self.source.save()
+        ingest_structure(self.source, structure_from_metadata(metadata, 'orders'))
+
+    def test_structureless_metadata_removes_nothing(self):
+        self.assertIsNone(ingest_structure(self.source, structure_from_metadata({'file_type': 'JSON'}, 'orders')))
+        self.source.set_processed_metadata({'file_type': 'JSON', 'extracted_data': {}})
+        self.source.save()
+        with self.assertRaises(CommandError):
+            call_command('reingest_source', self.source.pk, stdout=io.StringIO())
+        self.assertEqual(set(Table.objects.values_list('name', flat=True)), {'notes', 'orders'})
+
+    def test_only_ingested_tables_are_removed(self):
+        metadata = {'file_type': 'Tabular/CSV', 'columns': [{'name': 'sku'}]}
+        ingest_structure(self.source, structure_from_metadata(metadata, 'items'))
+        self.assertEqual(set(Table.objects.values_list('name', flat=True)), {'notes', 'items'})
+
+
+class CatalogImportTests(TemporaryStorageMixin, TestCase):
+    def test_restore_keeps_updated_at(self):
+        generate_catalog(sources=1, schemas_per_source=1, tables_per_schema=3, columns_per_table=2,
+                         lineage_edges_count=2, glossary_terms=0)
+        stamp = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        DataSource.objects.update(updated_at=stamp)
+        DataLineage.objects.update(updated_at=stamp)
+        with tempfile.TemporaryDirectory() as root:
+            call_command('export_catalog', root, stdout=io.StringIO())
+            DataSource.objects.all().delete()
+            call_command('import_catalog', root, stdout=io.StringIO())
+
+        self.assertEqual(set(DataSource.objects.values_list('updated_at', flat=True)), {stamp})
+        self.assertTrue(DataLineage.objects.exists())
+        self.assertEqual(set(DataLineage.objects.values_list('updated_at', flat=True)), {stamp})
@@ -1,6 +1,15 @@
 # metadata/urls.py
-from django.urls import path
-from . import views
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views, api
+
+router = DefaultRouter()
+router.register('sources', api.DataSourceViewSet)
+router.register('schemas', api.SchemaViewSet)
+router.register('tables', api.TableViewSet)
+router.register('columns', api.ColumnViewSet)
+router.register('lineage', api.DataLineageViewSet)
+router.register('glossary', api.GlossaryViewSet)
 
 urlpatterns = [
     # Dashboard
@@ -10,6 +19,7 @@ urlpatterns = [
     path('sources/', views.data_source_list, name='data_source_list'),
     path('sources/<int:pk>/', views.data_source_detail, name='data_source_detail'),
     path('sources/create/', views.data_source_create, name='data_source_create'),
+    path('sources/upload/', views.data_source_upload_view, name='data_source_upload'),
     path('sources/<int:pk>/update/', views.data_source_update, name='data_source_update'),
     
     # Tables
@@ -26,4 +36,10 @@ urlpatterns = [
     
     # API
     path('api/search/tables/', views.api_search_tables, name='api_search_tables'),
+    path('api/autocomplete/<str:source>/', views.autocomplete, name='autocomplete'),
+    path('api/v1/', include(router.urls)),
+    path('api/export/<str:entity>/', views.catalog_export, name='catalog_export'),
+    
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -5,6 +5,18 @@ import rdflib
 from lxml import etree
 import os
 import io
+from .excel import parse_excel_metadata
+from .inference import infer_column_types, DEFAULT_CHUNK_SIZE, DEFAULT_SAMPLE_SIZE, DEFAULT_SEED
+from .metrics import ParseTimer
+
+# Every extension routed by parse_file_metadata; anything else is reported as 'other' in metrics
+SUPPORTED_EXTENSIONS = {
+    'json', 'csv', 'txt', 'xlsx', 'xls', 'rdf', 'ttl', 'nt',
+    'xml', 'marc', 'mets', 'tei', 'mxf', 'pbcore',
+}
+
+# rdflib parser name for each RDF extension
+RDF_FORMATS = {'rdf': 'xml', 'ttl': 'turtle', 'nt': 'nt'}
 
 def parse_xml_metadata(file_content, schema_type="Generic"):
     """
@@ -30,39 +42,73 @@ def parse_xml_metadata(file_content, schema_type="Generic"):
         metadata["error"] = f"XML Parsing Error: {e}"
     return metadata
 
-def parse_tabular_metadata(file_content, extension):
-    """Parses CSV, TXT (as CSV), and Excel formats using pandas."""
+def _read_csv_chunks(file_content, chunk_size):
+    """Yields the CSV as string-typed DataFrame chunks so values keep their raw form."""
+    reader = pd.read_csv(io.BytesIO(file_content), encoding='utf-8', dtype=str, chunksize=chunk_size)
+    empty = True
+    for chunk in reader:
+        empty = False
+        yield chunk
+    if empty:
+        # Header-only file: still report the column names
+        yield pd.read_csv(io.BytesIO(file_content), encoding='utf-8', dtype=str, nrows=0)
+
+def parse_tabular_metadata(file_content, extension, exact_types=False,
+                           sample_size=DEFAULT_SAMPLE_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parses CSV, TXT (as CSV), and Excel formats using pandas (xlsx is streamed, see metadata.excel).
+    Column definitions (type, nullability, lengths, precision/scale) are inferred
+    from a reservoir sample of rows, or from every row when exact_types is set.
+    """
     try:
         if extension in ['csv', 'txt']:
-            df = pd.read_csv(io.StringIO(file_content.decode('utf-8')))
+            row_count, columns, inference = infer_column_types(
+                _read_csv_chunks(file_content, chunk_size),
+                exact=exact_types, sample_size=sample_size, seed=DEFAULT_SEED
+            )
             return {
                 "file_type": "Tabular/CSV",
-                "column_names": df.columns.tolist(),
-                "row_count": len(df)
+                "column_names": [c['name'] for c in columns],
+                "row_count": row_count,
+                "columns": columns,
+                "type_inference": inference
             }
         elif extension in ['xlsx', 'xls']:
-            # Read all sheets from Excel
-            xls = pd.ExcelFile(io.BytesIO(file_content))
-            metadata = {"file_type": "Excel", "sheets": {}}
-            for sheet_name in xls.sheet_names:
-                df = pd.read_excel(xls, sheet_name)
-                metadata['sheets'][sheet_name] = {
-                    "column_names": df.columns.tolist(),
-                    "row_count": len(df)
-                }
-            return metadata
+            # Streams headers and sheet dimensions; loads whole sheets only for exact types
+            return parse_excel_metadata(file_content, extension, exact_types=exact_types, sample_size=sample_size)
             
     except Exception as e:
         return {"error": f"Tabular Parsing Error: {e}"}
 
-def parse_file_metadata(uploaded_file):
-    """The main routing function to process the file based on extension."""
+def parse_file_metadata(uploaded_file, exact_types=False):
+    """
+    The main routing function to process the file based on extension.
+    Set exact_types to infer tabular column types from every row instead of a sample.
+    Zip and tar archives are parsed member by member (metadata.archives).
+    """
     file_name = uploaded_file.name
     extension = os.path.splitext(file_name)[-1].lower().strip('.')
+
+    # Archives are streamed member by member instead of being read whole
+    from .archives import archive_format, parse_archive
+    kind = archive_format(file_name)
+    if kind:
+        # Members record their own bytes; the archive only its latency and outcome
+        with ParseTimer(kind, None) as timer:
+            timer.result = parse_archive(uploaded_file, file_name, exact_types=exact_types)
+        return timer.result
     
     # Read file content into memory (safe for temporary processing)
     file_content = uploaded_file.read() 
     
+    # Latency, bytes and rows are recorded per format and outcome
+    metric_format = extension if extension in SUPPORTED_EXTENSIONS else 'other'
+    with ParseTimer(metric_format, len(file_content)) as timer:
+        timer.result = _route_file_metadata(file_content, extension, exact_types)
+    return timer.result
+
+def _route_file_metadata(file_content, extension, exact_types=False):
+    """Dispatches already-read file content to the parser for its extension."""
     # --- JSON / Text ---
     if extension == 'json':
         try:
@@ -72,14 +118,14 @@ def parse_file_metadata(uploaded_file):
             
     # --- Tabular (CSV, TXT, Excel) ---
     elif extension in ['csv', 'txt', 'xlsx', 'xls']:
-        return parse_tabular_metadata(file_content, extension)
+        return parse_tabular_metadata(file_content, extension, exact_types=exact_types)
 
     # --- RDF (Resource Description Framework) ---
     elif extension in ['rdf', 'ttl', 'nt']:
         try:
             g = rdflib.Graph()
-            # Try to guess the format (xml, turtle, ntriples)
-            g.parse(data=file_content.decode('utf-8'), format='guess')
+            # rdflib has no 'guess' parser plugin; pick the serialization from the extension
+            g.parse(data=file_content.decode('utf-8'), format=RDF_FORMATS[extension])
             return {
                 "file_type": "RDF",
                 "triples_count": len(g),
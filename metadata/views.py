@@ -3,11 +3,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
+from .caching import cached_payload
 from .forms import DataSourceUploadForm
 from .models import DataSource
-from .utils import parse_file_metadata
+from .ingestion import ingest_upload
+from .history import table_history
+from .exporting import EXPORT_ENTITIES, iter_ndjson, iter_parquet
+from .metrics import render_metrics
+from .widgets import AUTOCOMPLETE_SOURCES, autocomplete_page
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from .models import (
     DataSource, Schema, Table, Column, DataLineage, 
@@ -18,6 +25,9 @@ from .forms import (
     GlossaryForm, DataQualityRuleForm
 )
 import json
+from datetime import timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 def dashboard(request):
     """Main dashboard view"""
@@ -27,49 +37,25 @@ def dashboard(request):
         'total_columns': Column.objects.count(),
         'total_lineages': DataLineage.objects.count(),
         'recent_sources': DataSource.objects.all()[:5],
-        'recent_tables': Table.objects.select_related('schema__data_source')[:10],
+        'recent_tables': Table.objects.select_related('schema__data_source')
+                         .defer('schema__data_source__processed_metadata')[:10],
     }
     return render(request, 'dashboard.html', context)
 
 def data_source_upload_view(request):
+    """Upload a file as a new data source and process it (metadata.ingestion)"""
     if request.method == 'POST':
         form = DataSourceUploadForm(request.POST, request.FILES)
         if form.is_valid():
-            # 1. Save the new DataSource instance (which saves the file to the media path)
+            # Saving the instance stores the file in the media path
             data_source = form.save(commit=False)
             data_source.status = 'PENDING'
             data_source.save()
-
-            try:
-                # 2. Process the metadata using the helper function
-                processed_data = parse_file_metadata(data_source.uploaded_file)
-                
-                # 3. Check for errors during processing
-                if 'error' in processed_data:
-                    data_source.status = 'FAILED'
-                else:
-                    data_source.status = 'SUCCESS'
-                
-                # 4. Store the processed metadata and update status
-                data_source.processed_metadata = processed_data
-                data_source.save()
-
-                # Redirect to the detail page on success
-                return redirect(reverse('data_source_detail', args=[data_source.uuid])) 
-                
-            except Exception as e:
-                # Handle any unexpected server errors during processing
-                data_source.status = 'FAILED'
-                data_source.processed_metadata = {'system_error': str(e)}
-                data_source.save()
-                # Consider adding a message/logging here
-
+            ingest_upload(data_source, split_members=form.cleaned_data['split_archive'])
+            return redirect(reverse('data_source_detail', args=[data_source.pk]))
     else:
         form = DataSourceUploadForm()
-        
-    context = {'form': form}
-    # Assumes the URL is mapped to the 'data_sources/form.html' template
-    return render(request, 'data_sources/form.html', context)
+    return render(request, 'data_sources/form.html', {'form': form})
 
 # Data Source Views
 def data_source_list(request):
@@ -82,13 +68,22 @@ def data_source_list(request):
 
 
 def data_source_detail(request, pk):
-    """Detail view for a data source"""
-    source = get_object_or_404(DataSource, pk=pk)
-    schemas = source.schemas.annotate(table_count=Count('tables'))
-    return render(request, 'data_sources/detail.html', {
-        'source': source,
-        'schemas': schemas
-    })
+    """Detail view for a data source, served from cache until the source changes"""
+    def build():
+        source = get_object_or_404(
+            DataSource.objects.with_metadata().select_related('parent').defer('parent__processed_metadata'), pk=pk
+        )
+        schemas = source.schemas.annotate(table_count=Count('tables'))
+        content = render_to_string('data_sources/detail_content.html', {
+            'source': source,
+            'data_source': source,
+            'extracted_metadata': source.full_metadata,
+            'schemas': schemas,
+            'members': source.members.only('id', 'name', 'status'),
+        })
+        return {'title': source.name, 'content': content}
+
+    return render(request, 'data_sources/detail.html', cached_payload('data_source_detail', 'source', pk, build))
 
 
 def data_source_create(request):
@@ -128,7 +123,9 @@ def data_source_update(request, pk):
 # Table Views
 def table_list(request):
     """List all tables"""
-    tables = Table.objects.select_related('schema__data_source').annotate(
+    tables = Table.objects.select_related('schema__data_source', 'owner').defer(
+        'schema__data_source__processed_metadata'
+    ).annotate(
         column_count=Count('columns')
     )
     
@@ -157,23 +154,24 @@ def table_list(request):
 
 
 def table_detail(request, pk):
-    """Detail view for a table"""
-    table = get_object_or_404(
-        Table.objects.select_related('schema__data_source', 'owner'), 
-        pk=pk
-    )
-    columns = table.columns.all()
-    upstream = DataLineage.objects.filter(target_table=table).select_related('source_table')
-    downstream = DataLineage.objects.filter(source_table=table).select_related('target_table')
-    quality_rules = table.quality_rules.all()
-    
-    return render(request, 'tables/detail.html', {
-        'table': table,
-        'columns': columns,
-        'upstream': upstream,
-        'downstream': downstream,
-        'quality_rules': quality_rules
-    })
+    """Detail view for a table, served from cache until the table or its neighbours change"""
+    def build():
+        table = get_object_or_404(
+            Table.objects.select_related('schema__data_source', 'owner')
+            .defer('schema__data_source__processed_metadata'),
+            pk=pk
+        )
+        content = render_to_string('tables/detail_content.html', {
+            'table': table,
+            'columns': table.columns.all(),
+            'upstream': DataLineage.objects.filter(target_table=table).select_related('source_table'),
+            'downstream': DataLineage.objects.filter(source_table=table).select_related('target_table'),
+            'quality_rules': table.quality_rules.select_related('column', 'latest_status'),
+            'history': table_history(table, limit=20),
+        })
+        return {'title': table.name, 'content': content}
+
+    return render(request, 'tables/detail.html', cached_payload('table_detail', 'table', pk, build))
 
 
 def table_create(request):
@@ -205,21 +203,11 @@ def table_update(request, pk):
         'action': 'Update', 
         'table': table
     })
-def data_source_detail_view(request, uuid):
-    # Fetch the DataSource object by its UUID
-    data_source = get_object_or_404(DataSource, uuid=uuid)
-    
-    context = {
-        'data_source': data_source,
-        # The processed metadata is already available as a Python dictionary
-        'extracted_metadata': data_source.processed_metadata 
-    }
-    return render(request, 'data_sources/detail.html', context)
 
 # Lineage Views
 def lineage_view(request):
     """Data lineage visualization"""
-    tables = Table.objects.select_related('schema__data_source')
+    tables = Table.objects.select_related('schema__data_source').defer('schema__data_source__processed_metadata')
     lineages = DataLineage.objects.select_related('source_table', 'target_table')
     
     # Prepare data for visualization
@@ -258,7 +246,7 @@ def lineage_view(request):
 # Glossary Views
 def glossary_list(request):
     """List all glossary terms"""
-    terms = Glossary.objects.all()
+    terms = Glossary.objects.select_related('owner').prefetch_related('related_terms')
     search = request.GET.get('search', '')
     
     if search:
@@ -273,7 +261,9 @@ def glossary_list(request):
 def api_search_tables(request):
     """API endpoint to search tables"""
     query = request.GET.get('q', '')
-    tables = Table.objects.filter(name__icontains=query).select_related('schema__data_source')[:10]
+    tables = Table.objects.filter(name__icontains=query).select_related('schema__data_source').defer(
+        'schema__data_source__processed_metadata'
+    )[:10]
     
     results = [{
         'id': t.id,
@@ -283,4 +273,56 @@ def api_search_tables(request):
     
     return JsonResponse({'results': results})
 
-    
\ No newline at end of file
+
+def autocomplete(request, source):
+    """Paginated options for the foreign-key pickers (metadata.widgets), in select2's format"""
+    if source not in AUTOCOMPLETE_SOURCES:
+        return JsonResponse({'error': f'Unknown choices: {source}'}, status=404)
+    # Account names are not public catalog data
+    if AUTOCOMPLETE_SOURCES[source].get('login_required') and not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=403)
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 1
+    forwarded = request.GET.get('forward', '')
+    results, more = autocomplete_page(
+        source, request.GET.get('q', '').strip(), page, forwarded=int(forwarded) if forwarded.isdigit() else None
+    )
+    return JsonResponse({'results': results, 'pagination': {'more': more}})
+
+
+def catalog_export(request, entity):
+    """
+    Streams a catalog dump. `entity` is one of EXPORT_ENTITIES, or 'all' for
+    tagged NDJSON of every entity. Supports ?format=ndjson|parquet and ?since=<ISO>.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if entity != 'all' and entity not in EXPORT_ENTITIES:
+        return JsonResponse({'error': f'Unknown entity: {entity}'}, status=404)
+    if export_format not in ('ndjson', 'parquet') or (entity == 'all' and export_format != 'ndjson'):
+        return JsonResponse({'error': 'Unsupported format for this entity'}, status=400)
+
+    since = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return JsonResponse({'error': 'Invalid since timestamp'}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, dt_timezone.utc)
+
+    if export_format == 'parquet':
+        response = StreamingHttpResponse(iter_parquet(entity, since), content_type='application/vnd.apache.parquet')
+    else:
+        entities = list(EXPORT_ENTITIES) if entity == 'all' else [entity]
+        response = StreamingHttpResponse(
+            iter_ndjson(entities, since, tag_entity=entity == 'all'),
+            content_type='application/x-ndjson'
+        )
+    response['Content-Disposition'] = f'attachment; filename="catalog-{entity}.{export_format}"'
+    return response
+
+
+def metrics(request):
+    """Prometheus scrape endpoint"""
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
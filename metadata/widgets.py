@@ -0,0 +1,106 @@
+# metadata/widgets.py
+from django import forms
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from .models import Column, DataQualityRule, DataSource, Glossary, Schema, Table
+
+AUTOCOMPLETE_PAGE_SIZE = 20
+_SELECT2 = 'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist'
+
+
+def _schemas():
+    return Schema.objects.select_related('data_source').defer('data_source__processed_metadata')
+
+
+def _tables():
+    return Table.objects.select_related('schema__data_source').defer('schema__data_source__processed_metadata')
+
+
+def _columns():
+    return Column.objects.select_related('table')
+
+
+# Choices served by the autocomplete view: queryset (joining whatever the
+# option label, the object's str(), follows), field matched by prefix, an
+# optional filter taken from another form field, and whether only signed-in
+# users may list them
+AUTOCOMPLETE_SOURCES = {
+    'sources': {'queryset': DataSource.objects.all, 'search': 'name'},
+    'schemas': {'queryset': _schemas, 'search': 'name'},
+    'tables': {'queryset': _tables, 'search': 'name'},
+    'columns': {'queryset': _columns, 'search': 'name', 'forward': 'table'},
+    'glossary': {'queryset': Glossary.objects.all, 'search': 'term'},
+    'users': {'queryset': lambda: get_user_model().objects.filter(is_active=True), 'search': 'username',
+              'login_required': True},
+    'quality-rules': {'queryset': lambda: DataQualityRule.objects.select_related('table'), 'search': 'name'},
+}
+
+
+def autocomplete_page(source, term='', page=1, forwarded=None):
+    """
+    One page of [{'id', 'text'}] options whose search field starts with
+    `term`, and whether more follow. One query at any catalog size: an
+    extra row is fetched to tell if there is a next page, instead of
+    counting the matches.
+    """
+    config = AUTOCOMPLETE_SOURCES[source]
+    queryset = config['queryset']()
+    if term:
+        queryset = queryset.filter(**{f"{config['search']}__istartswith": term})
+    if config.get('forward') and forwarded:
+        queryset = queryset.filter(**{f"{config['forward']}_id": forwarded})
+    start = (max(page, 1) - 1) * AUTOCOMPLETE_PAGE_SIZE
+    rows = list(queryset.order_by(config['search'], 'pk')[start:start + AUTOCOMPLETE_PAGE_SIZE + 1])
+    options = [{'id': obj.pk, 'text': str(obj)} for obj in rows[:AUTOCOMPLETE_PAGE_SIZE]]
+    return options, len(rows) > AUTOCOMPLETE_PAGE_SIZE
+
+
+class AutocompleteMixin:
+    """
+    Renders only the selected options and lets select2 fetch the rest page
+    by page from the autocomplete view, so a picker over half a million
+    tables renders as fast as one over ten. `forward` names another field of
+    the form whose value narrows the choices (the table of a column picker).
+    """
+
+    def __init__(self, source, forward=None, attrs=None):
+        self.source = source
+        self.forward = forward
+        super().__init__(attrs)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs.setdefault('class', '')
+        attrs['class'] = f"{attrs['class']} catalog-autocomplete".strip()
+        attrs['data-autocomplete-url'] = reverse('autocomplete', args=[self.source])
+        attrs['data-placeholder'] = ''
+        if self.forward:
+            attrs['data-forward'] = self.forward
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        selected = {str(v) for v in value if v not in (None, '')}
+        groups = []
+        if not self.is_required and not self.allow_multiple_selected:
+            groups.append((None, [self.create_option(name, '', '', False, 0)], 0))
+        if selected:
+            chosen = AUTOCOMPLETE_SOURCES[self.source]['queryset']().filter(pk__in=selected)
+            for index, obj in enumerate(chosen, start=len(groups)):
+                groups.append((None, [self.create_option(name, obj.pk, str(obj), True, index)], index))
+        return groups
+
+    @property
+    def media(self):
+        return forms.Media(
+            css={'all': [f'{_SELECT2}/css/select2.min.css']},
+            js=[f'{_SELECT2}/js/select2.min.js', 'js/autocomplete.js'],
+        )
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
@@ -19,17 +19,21 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'crispy_forms',
     'crispy_bootstrap5',
+    'rest_framework',
     'metadata',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'metadata.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'metadata.middleware.MetricsMiddleware',
+    'metadata.middleware.PerformanceMiddleware',
 ]
 
 ROOT_URLCONF = 'metadata_manager.urls'
@@ -52,12 +56,73 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'metadata_manager.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Database: SQLite by default. Set DB_ENGINE=postgresql or mysql together with
+# DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT for a production server;
+# DB_REPLICA_HOSTS (comma-separated host[:port]) adds read replicas that share
+# the primary's credentials.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # Busy timeout: seconds a connection waits on the writer lock before "database is locked"
+            'OPTIONS': {'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))},
+        }
     }
-}
+else:
+    _DB_BACKENDS = {
+        'postgresql': 'django.db.backends.postgresql',
+        'postgres': 'django.db.backends.postgresql',
+        'mysql': 'django.db.backends.mysql',
+    }
+    _DB_OPTIONS = {
+        'django.db.backends.postgresql': {'connect_timeout': 5},
+        'django.db.backends.mysql': {'charset': 'utf8mb4', 'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"},
+    }
+    _engine = _DB_BACKENDS[DB_ENGINE]
+    DATABASES = {
+        'default': {
+            'ENGINE': _engine,
+            'NAME': os.environ.get('DB_NAME', 'metadata_manager'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', ''),
+            # Persistent connections, checked before reuse so a dropped one is replaced
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': _env_bool('DB_CONN_HEALTH_CHECKS', True),
+            'OPTIONS': _DB_OPTIONS[_engine],
+        }
+    }
+    for _index, _replica in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+        _host, _, _port = _replica.strip().partition(':')
+        DATABASES[f'replica_{_index}'] = {
+            **DATABASES['default'],
+            'HOST': _host,
+            'PORT': _port or DATABASES['default']['PORT'],
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Reads go to these aliases; writes and migrations always go to 'default'
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['metadata.db.ReplicaRouter']
+# How long a user's reads stay on the primary after they write
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+
+# Applied to every SQLite connection (metadata.db.configure_sqlite). SQLITE_WAL=1 lets
+# page reads proceed while an ingestion holds the writer lock; it is opt-in because
+# switching rewrites the database file header (and adds -wal/-shm files beside it).
+SQLITE_PRAGMAS = {'synchronous': 'NORMAL'}
+if _env_bool('SQLITE_WAL', False):
+    SQLITE_PRAGMAS['journal_mode'] = 'WAL'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -77,5 +142,67 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache: local memory by default. Set REDIS_URL (e.g. redis://localhost:6379/1) to
+# share one cache across worker processes; with several processes and locmem,
+# invalidation only reaches the process that handled the write.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'metadata_manager',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'metadata-manager',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Rendered detail fragments and API payloads keyed on per-object version stamps
+# (metadata.caching); stamps are bumped by model signals, the timeout only reclaims space
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 3600))
+
+# Parser output larger than this is stored as a compressed, content-addressed blob
+# (zstd when the zstandard package is installed, gzip otherwise) with only a summary
+# kept in DataSource.processed_metadata
+METADATA_BLOB_ROOT = os.environ.get('METADATA_BLOB_ROOT', BASE_DIR / 'metadata_blobs')
+METADATA_INLINE_MAX_BYTES = int(os.environ.get('METADATA_INLINE_MAX_BYTES', 16384))
+# Distinct values indexed per metadata key path (column names are never capped);
+# sources whose paths were cut off carry a '_truncated' index entry naming the path
+METADATA_INDEX_MAX_VALUES_PER_PATH = int(os.environ.get('METADATA_INDEX_MAX_VALUES_PER_PATH', 1000))
+# Schema history keeps a full structure snapshot every N versions and diffs in between
+SCHEMA_SNAPSHOT_INTERVAL = int(os.environ.get('SCHEMA_SNAPSHOT_INTERVAL', 20))
+# Zip/tar uploads are parsed member by member in this many forked processes, holding
+# at most ARCHIVE_MEMORY_BUDGET_BYTES of member content in memory at once
+ARCHIVE_PARSE_WORKERS = int(os.environ.get('ARCHIVE_PARSE_WORKERS', os.cpu_count() or 1))
+ARCHIVE_MEMORY_BUDGET_BYTES = int(os.environ.get('ARCHIVE_MEMORY_BUDGET_BYTES', 256 * 1024 * 1024))
+# xlsx uploads are streamed: header, sampled rows and the declared dimension of each sheet,
+# read on this many threads. EXCEL_FULL_LOAD loads every sheet instead (exact row counts)
+EXCEL_SHEET_WORKERS = int(os.environ.get('EXCEL_SHEET_WORKERS', os.cpu_count() or 1))
+EXCEL_FULL_LOAD = _env_bool('EXCEL_FULL_LOAD', False)
+# compact_quality_checks keeps raw check results and hourly rollups this many days;
+# daily rollups and the latest status per rule are kept indefinitely
+QUALITY_CHECK_RETENTION_DAYS = int(os.environ.get('QUALITY_CHECK_RETENTION_DAYS', 90))
+QUALITY_HOURLY_ROLLUP_RETENTION_DAYS = int(os.environ.get('QUALITY_HOURLY_ROLLUP_RETENTION_DAYS', 30))
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
-CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Per-request query/latency instrumentation (metadata.middleware.PerformanceMiddleware)
+PERF_INSTRUMENTATION = True
+PERF_DEBUG_PANEL = DEBUG
+
+# Prometheus metrics are served at /metrics. With several worker processes, export
+# PROMETHEUS_MULTIPROC_DIR (an empty, writable directory) before the workers start.
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'PAGE_SIZE': 100,
+    # The catalog is readable by anyone; writes, including batch/ upserts, need a signed-in user
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticatedOrReadOnly'],
+}
@@ -0,0 +1,26 @@
+// static/js/autocomplete.js
+// Turns every select rendered by metadata.widgets.AutocompleteSelect(Multiple)
+// into a select2 picker that loads its options page by page from the server.
+$(function () {
+    $('select.catalog-autocomplete').each(function () {
+        var $select = $(this);
+        var forward = $select.data('forward');
+        $select.select2({
+            width: '100%',
+            allowClear: !$select.prop('required'),
+            placeholder: $select.data('placeholder'),
+            ajax: {
+                url: $select.data('autocomplete-url'),
+                dataType: 'json',
+                delay: 250,
+                data: function (params) {
+                    var query = {q: params.term || '', page: params.page || 1};
+                    if (forward) {
+                        query.forward = $select.closest('form').find('[name="' + forward + '"]').val();
+                    }
+                    return query;
+                },
+            },
+        });
+    });
+});